@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sqlite3
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks import (
+    bench_cart,
+    bench_connection,
+    bench_database,
+    bench_history,
+    bench_pricing,
+    bench_search,
+    replay_trace,
+    stress_lanes,
+)
+
+Results = dict[str, dict[str, float]]
+
+SUITES: dict[str, dict[str, Callable[[], Results]]] = {
+    "quick": {
+        "search": lambda: bench_search.run((10_000,), repeat=30),
+        "database": lambda: bench_database.run(5_000, history_sales=1_000, repeat=50),
+        "cart": lambda: bench_cart.run(5_000, repeat=100),
+        "connection": lambda: bench_connection.run(5_000, repeat=50),
+        "lanes": lambda: stress_lanes.run(3, sales=100, catalog_size=5_000),
+        "history": lambda: bench_history.run(100_000, repeat=30),
+        "replay": lambda: replay_trace.run(5_000, customers=50),
+        "pricing": lambda: bench_pricing.run(5_000, rules=2_000, repeat=100),
+    },
+    "full": {
+        "search": lambda: bench_search.run(bench_search.DEFAULT_SIZES, repeat=50),
+        "database": lambda: bench_database.run(
+            bench_database.DEFAULT_CATALOG_SIZE,
+            history_sales=bench_database.DEFAULT_HISTORY_SALES,
+            repeat=200,
+        ),
+        "cart": lambda: bench_cart.run(bench_cart.DEFAULT_CATALOG_SIZE, repeat=300),
+        "connection": lambda: bench_connection.run(
+            bench_connection.DEFAULT_CATALOG_SIZE, repeat=300
+        ),
+        "lanes": lambda: stress_lanes.run(
+            4, sales=stress_lanes.DEFAULT_SALES, catalog_size=stress_lanes.DEFAULT_CATALOG_SIZE
+        ),
+        "history": lambda: bench_history.run(bench_history.DEFAULT_HISTORY_SALES, repeat=100),
+        "replay": lambda: replay_trace.run(customers=500),
+        "pricing": lambda: bench_pricing.run(repeat=500),
+    },
+}
+
+# A metric only counts as regressed if it is slower by both margins.
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA_MS = 0.05
+
+
+def compare(
+    current: Results,
+    baseline: Results,
+    metric: str,
+    tolerance: float,
+    min_delta_ms: float,
+) -> list[str]:
+    regressions = []
+    for name, stats in sorted(current.items()):
+        previous = baseline.get(name)
+        if previous is None or metric not in previous or metric not in stats:
+            continue
+        before, after = previous[metric], stats[metric]
+        if after - before > min_delta_ms and after > before * (1 + tolerance):
+            regressions.append(f"{name}: {metric} {before:.3f} ms -> {after:.3f} ms")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Headless CruchCount benchmarks with JSON output and regression checks.",
+    )
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--only", nargs="+", help="run only these benchmark groups")
+    parser.add_argument("--output", type=Path, help="write results as JSON to this file")
+    parser.add_argument("--baseline", type=Path, help="JSON results from a previous run")
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS)
+    args = parser.parse_args(argv)
+
+    groups = SUITES[args.suite]
+    selected = args.only or list(groups)
+    unknown = [name for name in selected if name not in groups]
+    if unknown:
+        parser.error(f"unknown benchmark group(s): {', '.join(unknown)}")
+
+    results: Results = {}
+    started = time.perf_counter()
+    for name in selected:
+        print(f"== {name}", file=sys.stderr)
+        results.update(groups[name]())
+
+    report = {
+        "meta": {
+            "suite": args.suite,
+            "groups": selected,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_s": round(time.perf_counter() - started, 2),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True)
+    if args.output is not None:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline is None:
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+    regressions = compare(results, baseline, args.metric, args.tolerance, args.min_delta_ms)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
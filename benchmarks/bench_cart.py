@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import (
+    catalog_barcodes,
+    measure,
+    offscreen_app,
+    open_catalog_database,
+    summarize,
+)
+
+DEFAULT_CATALOG_SIZE = 20_000
+CART_SIZES = (1, 60, 150)
+
+
+def _scan_until_total_changes(app, page, barcode: str) -> float:
+    label = page.total_qty_label
+    before = label.text()
+    started = time.perf_counter()
+    page.scan_input.setText(barcode)
+    page._on_scan_submitted()
+    while label.text() == before:
+        app.processEvents()
+    return (time.perf_counter() - started) * 1000
+
+
+def run(catalog_size: int, repeat: int) -> dict[str, dict[str, float]]:
+    app = offscreen_app()
+    from cruchcount.ui.pages.cart_page import CartPage
+
+    results: dict[str, dict[str, float]] = {}
+    barcodes = catalog_barcodes(catalog_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = open_catalog_database(Path(tmp), catalog_size)
+        page = CartPage(database=database)
+        page.show()
+        app.processEvents()
+
+        for cart_size in CART_SIZES:
+            page.cart_model.clear()
+            for barcode in barcodes[:cart_size]:
+                _scan_until_total_changes(app, page, barcode)
+
+            repeat_scans = [
+                _scan_until_total_changes(app, page, barcodes[i % cart_size])
+                for i in range(repeat)
+            ]
+            results[f"cart.scan_repeat.{cart_size}_lines"] = summarize(repeat_scans)
+
+            new_scans = [
+                _scan_until_total_changes(app, page, barcodes[cart_size + i])
+                for i in range(min(repeat, catalog_size - cart_size))
+            ]
+            results[f"cart.scan_new.{cart_size}_lines"] = summarize(new_scans)
+            page.cart_model.clear()
+
+        # Applying one page of suggestions to the combo box and its completer.
+        products = database.search_products("69", limit=page.suggestions.limit)
+        results["cart.apply_suggestions"] = measure(
+            lambda: page.suggestion_model._on_suggestions_ready("69", 0, products), repeat
+        )
+
+        page.shutdown()
+        page.close()
+        database.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scan-to-updated-total latency in CartPage.")
+    parser.add_argument("--catalog-size", type=int, default=DEFAULT_CATALOG_SIZE)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    for name, stats in run(args.catalog_size, args.repeat).items():
+        print(f"{name:<32} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
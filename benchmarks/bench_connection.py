@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.common import catalog_barcodes, measure, open_catalog_database, summarize
+from cruchcount.cart import CartItem
+from cruchcount.connection import ConnectionSettings
+
+DEFAULT_CATALOG_SIZE = 20_000
+BULK_BATCH_SIZE = 5_000
+
+PROFILES = {
+    # What a bare sqlite3.connect() gives: rollback journal, FULL sync, ~2 MB cache.
+    "default": ConnectionSettings(
+        journal_mode="DELETE",
+        synchronous="FULL",
+        cache_size_kib=2000,
+        mmap_size_mib=0,
+        cached_statements=128,
+    ),
+    "tuned": ConnectionSettings(),
+}
+
+
+def _cart(barcodes: list[str]) -> list[CartItem]:
+    return [
+        CartItem(barcode=barcode, name=f"商品{barcode[-4:]}", price_cents=350, quantity=1)
+        for barcode in barcodes
+    ]
+
+
+def _reads_during_bulk_write(database, barcodes: list[str], repeat: int) -> dict[str, dict]:
+    stop = threading.Event()
+    written = 0
+
+    def bulk_writer() -> None:
+        nonlocal written
+        batch_no = 0
+        while not stop.is_set():
+            rows = [
+                (f"72{batch_no:05d}{i:06d}", "批量写入商品", 550) for i in range(BULK_BATCH_SIZE)
+            ]
+            written += database.upsert_products(rows)
+            batch_no += 1
+
+    writer = threading.Thread(target=bulk_writer)
+    writer.start()
+    lookups: list[float] = []
+    searches: list[float] = []
+    try:
+        for i in range(repeat):
+            database.clear_product_cache()
+            started = time.perf_counter()
+            database.get_product_by_barcode(barcodes[i % len(barcodes)])
+            lookups.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            database.search_products("薯片")
+            searches.append((time.perf_counter() - started) * 1000)
+    finally:
+        stop.set()
+        writer.join()
+
+    results = {
+        "lookup_during_bulk_write": summarize(lookups),
+        "search_during_bulk_write": summarize(searches),
+    }
+    results["lookup_during_bulk_write"]["rows_written"] = written
+    return results
+
+
+def run(catalog_size: int, repeat: int) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+    barcodes = catalog_barcodes(catalog_size)
+    for profile, settings in PROFILES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            database = open_catalog_database(Path(tmp), catalog_size, settings=settings)
+            counter = iter(range(10**9))
+            results[f"connection.{profile}.upsert_product"] = measure(
+                lambda: database.upsert_product(f"70{next(counter):011d}", "新商品", 990),
+                repeat,
+            )
+            cart = _cart(barcodes[:20])
+            results[f"connection.{profile}.record_sale.20_lines"] = measure(
+                lambda: database.record_sale(cart), repeat
+            )
+            results[f"connection.{profile}.get_product_by_barcode.cold"] = measure(
+                lambda: (
+                    database.clear_product_cache(),
+                    database.get_product_by_barcode(barcodes[11]),
+                ),
+                repeat,
+            )
+            for name, stats in _reads_during_bulk_write(database, barcodes, repeat).items():
+                results[f"connection.{profile}.{name}"] = stats
+            database.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite connection settings and read/write split.")
+    parser.add_argument("--catalog-size", type=int, default=DEFAULT_CATALOG_SIZE)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    for name, stats in run(args.catalog_size, args.repeat).items():
+        print(f"{name:<56} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
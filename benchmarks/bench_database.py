@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import catalog_barcodes, measure, open_catalog_database, summarize
+from cruchcount.cart import CartItem
+
+DEFAULT_CATALOG_SIZE = 20_000
+DEFAULT_HISTORY_SALES = 5_000
+CART_SIZES = (10, 60, 150)
+LOW_STOCK_EVERY = 100
+BULK_LOOKUP_SIZE = 100
+PARKED_CART_SIZE = 60
+
+
+def _cart(barcodes: list[str], size: int, offset: int = 0) -> list[CartItem]:
+    return [
+        CartItem(
+            barcode=barcode, name=f"商品{barcode[-4:]}", price_cents=350, quantity=1 + i % 3
+        )
+        for i, barcode in enumerate(barcodes[offset : offset + size])
+    ]
+
+
+def run(catalog_size: int, history_sales: int, repeat: int) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+    barcodes = catalog_barcodes(catalog_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = open_catalog_database(Path(tmp), catalog_size)
+
+        counter = iter(range(10**9))
+        results["db.upsert_product"] = measure(
+            lambda: database.upsert_product(f"70{next(counter):011d}", "新商品", 990),
+            repeat,
+        )
+        batch = [(f"71{i:011d}", "批量商品", 550) for i in range(1000)]
+        stats = measure(lambda: database.upsert_products(batch), max(3, repeat // 20))
+        stats["rows_per_sec"] = len(batch) * 1000 / stats["mean_ms"]
+        results["db.upsert_products_1000"] = stats
+
+        results["db.get_product_by_barcode.cold"] = measure(
+            lambda: (database.clear_product_cache(), database.get_product_by_barcode(barcodes[7])),
+            repeat,
+        )
+        results["db.get_product_by_barcode.cached"] = measure(
+            lambda: database.get_product_by_barcode(barcodes[7]), repeat
+        )
+
+        order = barcodes[1000 : 1000 + BULK_LOOKUP_SIZE]
+        results[f"db.get_product_by_barcode.cold_x{BULK_LOOKUP_SIZE}"] = measure(
+            lambda: (
+                database.clear_product_cache(),
+                [database.get_product_by_barcode(barcode) for barcode in order],
+            ),
+            repeat,
+        )
+        results[f"db.get_products_by_barcodes.cold_{BULK_LOOKUP_SIZE}"] = measure(
+            lambda: (database.clear_product_cache(), database.get_products_by_barcodes(order)),
+            repeat,
+        )
+
+        history_cart = _cart(barcodes, 20)
+        started = time.perf_counter()
+        for _ in range(history_sales):
+            database.record_sale(history_cart)
+        print(
+            f"sales history of {history_sales} generated in {time.perf_counter() - started:.1f}s",
+            file=sys.stderr,
+        )
+
+        for size in CART_SIZES:
+            cart = _cart(barcodes, size, offset=size)
+            results[f"db.record_sale.{size}_lines"] = measure(
+                lambda cart=cart: database.record_sale(cart), repeat
+            )
+
+        parked_cart = _cart(barcodes, PARKED_CART_SIZE)
+        parked_id = database.park_cart(parked_cart)
+        results[f"db.park_cart.{PARKED_CART_SIZE}_lines"] = measure(
+            lambda: database.delete_parked_cart(database.park_cart(parked_cart)), repeat
+        )
+        stats = measure(lambda: database.parked_cart_items(parked_id), repeat)
+        with database.read_pool.connection() as connection:
+            stats["payload_bytes"] = connection.execute(
+                "SELECT length(payload) FROM parked_carts WHERE id = ?", (parked_id,)
+            ).fetchone()[0]
+        results[f"db.parked_cart_items.{PARKED_CART_SIZE}_lines"] = stats
+
+        # No stock was ever received, so every product given a reorder level is low.
+        for barcode in barcodes[::LOW_STOCK_EVERY]:
+            database.upsert_product(barcode, f"商品{barcode[-4:]}", 350, reorder_level=5)
+        stats = measure(lambda: database.low_stock_products(), repeat)
+        stats["rows"] = len(database.low_stock_products())
+        results["db.low_stock_products"] = stats
+        database.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Database write and checkout costs.")
+    parser.add_argument("--catalog-size", type=int, default=DEFAULT_CATALOG_SIZE)
+    parser.add_argument("--history-sales", type=int, default=DEFAULT_HISTORY_SALES)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+    for name, stats in run(args.catalog_size, args.history_sales, args.repeat).items():
+        print(f"{name:<40} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
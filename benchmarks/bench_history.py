@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from benchmarks.common import measure
+from cruchcount.history import SaleFilter
+
+DEFAULT_HISTORY_SALES = 1_000_000
+LINES_PER_SALE = 3
+DEEP_PAGES = 100
+PAGE_SIZE = 200
+
+
+def _iter_sales(count: int, seed: int = 11) -> Iterator[tuple[int, str, int, int, str]]:
+    # One year of sales, spread evenly, from three lanes.
+    rnd = random.Random(seed)
+    seconds_per_sale = 365 * 24 * 3600 / count
+    start = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, -1))
+    for sale_id in range(1, count + 1):
+        created_at = time.strftime(
+            "%Y-%m-%d %H:%M:%S", time.localtime(start + sale_id * seconds_per_sale)
+        )
+        yield sale_id, created_at, LINES_PER_SALE, rnd.randint(100, 20_000), str(1 + sale_id % 3)
+
+
+def _iter_lines(count: int, seed: int = 13) -> Iterator[tuple[int, int, str, str, int, int]]:
+    rnd = random.Random(seed)
+    for sale_id in range(1, count + 1):
+        for line_no in range(1, LINES_PER_SALE + 1):
+            yield sale_id, line_no, f"69{rnd.randint(0, 19_999):011d}", "商品", 100, 1
+
+
+def populate_history(path: Path, count: int) -> None:
+    connection = sqlite3.connect(str(path))
+    with connection:
+        connection.executemany(
+            """
+            INSERT INTO sales(id, created_at, total_quantity, total_cents, lane_id)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            _iter_sales(count),
+        )
+        connection.executemany(
+            """
+            INSERT INTO sale_items(sale_id, line_no, barcode, name, price_cents, quantity)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            _iter_lines(count),
+        )
+    connection.close()
+
+
+def run(history_sales: int, repeat: int) -> dict[str, dict[str, float]]:
+    from cruchcount.db import Database
+
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "history.db"
+        database = Database(path)
+        database.init_schema()
+        started = time.perf_counter()
+        populate_history(path, history_sales)
+        print(
+            f"history of {history_sales} sales generated in {time.perf_counter() - started:.1f}s",
+            file=sys.stderr,
+        )
+
+        everything = SaleFilter()
+        results["history.first_page"] = measure(
+            lambda: database.sales_page(everything, limit=PAGE_SIZE), repeat
+        )
+        after = None
+        for _ in range(DEEP_PAGES):
+            page = database.sales_page(everything, after, PAGE_SIZE)
+            after = (page[-1]["created_at"], page[-1]["id"])
+        results[f"history.page_{DEEP_PAGES + 1}"] = measure(
+            lambda: database.sales_page(everything, after, PAGE_SIZE), repeat
+        )
+        filters = {
+            "one_day": SaleFilter(start_day="2025-06-10", end_day="2025-06-10"),
+            "amount_range": SaleFilter(min_cents=19_990, max_cents=19_999),
+            "amount_min": SaleFilter(min_cents=10_000),
+            "barcode": SaleFilter(barcode="6900000000123"),
+            "barcode_one_month": SaleFilter(
+                barcode="6900000000123", start_day="2025-03-01", end_day="2025-03-31"
+            ),
+        }
+        for name, sale_filter in filters.items():
+            results[f"history.filter.{name}"] = measure(
+                lambda sale_filter=sale_filter: database.sales_page(sale_filter, limit=PAGE_SIZE),
+                repeat,
+            )
+        results["history.sale_lines"] = measure(
+            lambda: database.sale_lines(history_sales // 2), repeat
+        )
+        database.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sales history paging and filters.")
+    parser.add_argument("--history-sales", type=int, default=DEFAULT_HISTORY_SALES)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    for name, stats in run(args.history_sales, args.repeat).items():
+        print(f"{name:<40} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import KINDS, catalog_barcodes, open_catalog_database, summarize
+from cruchcount.barcodes import barcode_key
+from cruchcount.pricing import PricingEngine, price_cart
+
+DEFAULT_CATALOG_SIZE = 20_000
+DEFAULT_RULES = 5_000
+CART_SIZES = (60, 300, 1000)
+
+
+def populate_promotions(path: Path, barcodes: list[str], count: int, seed: int = 11) -> None:
+    # Products get one of the KINDS as category. Rules: a 满减 per category,
+    # a few store-wide 满减 tiers, and the rest per-barcode multi-buys and
+    # member prices.
+    rnd = random.Random(seed)
+    connection = sqlite3.connect(str(path))
+    with connection:
+        connection.executemany(
+            "UPDATE products SET category = ? WHERE barcode_key = ?",
+            ((KINDS[i % len(KINDS)], barcode_key(b)) for i, b in enumerate(barcodes)),
+        )
+        rows = []
+        for category in KINDS:
+            rows.append((f"{category}满 50 减 5", "spend_threshold", None, category, 5000, 500))
+        for spend, off in ((10_000, 1000), (20_000, 2500), (50_000, 8000)):
+            name = f"全场满 {spend // 100} 减 {off // 100}"
+            rows.append((name, "spend_threshold", None, None, spend, off))
+        while len(rows) < count:
+            barcode = barcode_key(rnd.choice(barcodes))
+            if rnd.random() < 0.6:
+                buy = rnd.randint(2, 5)
+                rows.append((f"{buy} 件优惠", "multi_buy", barcode, None, buy, buy * 250))
+            else:
+                rows.append(("会员价", "member_price", barcode, None, 0, rnd.randint(50, 500)))
+        connection.executemany(
+            """
+            INSERT INTO promotions(name, kind, barcode_key, category, threshold, amount_cents)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+    connection.close()
+
+
+def run(
+    catalog_size: int = DEFAULT_CATALOG_SIZE, rules: int = DEFAULT_RULES, repeat: int = 200
+) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+    barcodes = catalog_barcodes(catalog_size)
+    rnd = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = open_catalog_database(Path(tmp), catalog_size)
+        populate_promotions(database.path, barcodes, rules)
+        database.optimize()
+
+        for cart_size in CART_SIZES:
+            cart = rnd.sample(barcodes, cart_size)
+            prices = {barcode: rnd.randint(100, 3000) for barcode in cart}
+            quantities = {barcode: rnd.randint(1, 5) for barcode in cart}
+
+            load_ms = []
+            for _ in range(max(1, repeat // 10)):
+                started = time.perf_counter()
+                cart_rules = database.promotions_for(cart)
+                load_ms.append((time.perf_counter() - started) * 1000)
+            results[f"pricing.load_rules.{cart_size}_lines"] = summarize(load_ms)
+
+            engine = PricingEngine(lambda batch: cart_rules)
+            engine.prefetch(cart)
+            for barcode in cart:
+                engine.update_line(barcode, prices[barcode], quantities[barcode])
+
+            # One scan: a line's quantity goes up by one and the discount total
+            # has to be right again.
+            incremental_ms, full_ms = [], []
+            evaluations_before = engine.evaluations
+            for _ in range(repeat):
+                barcode = rnd.choice(cart)
+                quantities[barcode] += 1
+                started = time.perf_counter()
+                engine.update_line(barcode, prices[barcode], quantities[barcode])
+                incremental = engine.discount_cents
+                incremental_ms.append((time.perf_counter() - started) * 1000)
+
+                lines = [(b, prices[b], quantities[b]) for b in cart]
+                started = time.perf_counter()
+                full = price_cart(lines, cart_rules, engine.member)
+                full_ms.append((time.perf_counter() - started) * 1000)
+                if incremental != full:
+                    raise RuntimeError(
+                        f"incremental pricing gave {incremental}, full evaluation {full}"
+                    )
+            results[f"pricing.scan_incremental.{cart_size}_lines"] = summarize(incremental_ms)
+            results[f"pricing.scan_full.{cart_size}_lines"] = summarize(full_ms)
+            results[f"pricing.rules_per_scan.{cart_size}_lines"] = {
+                "incremental": (engine.evaluations - evaluations_before) / repeat,
+                "full": sum(len(cart_rules[b]) for b in cart),
+            }
+
+            toggle_ms = []
+            for _ in range(max(1, repeat // 10)):
+                started = time.perf_counter()
+                engine.set_member(not engine.member)
+                toggle_ms.append((time.perf_counter() - started) * 1000)
+                lines = [(b, prices[b], quantities[b]) for b in cart]
+                if engine.discount_cents != price_cart(lines, cart_rules, engine.member):
+                    raise RuntimeError("incremental pricing disagrees after a member toggle")
+            results[f"pricing.member_toggle.{cart_size}_lines"] = summarize(toggle_ms)
+
+        database.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Incremental vs full cart pricing with thousands of promotions."
+    )
+    parser.add_argument("--catalog-size", type=int, default=DEFAULT_CATALOG_SIZE)
+    parser.add_argument("--rules", type=int, default=DEFAULT_RULES)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    for name, stats in run(args.catalog_size, args.rules, args.repeat).items():
+        if "p50_ms" not in stats:
+            print(f"{name:<40} " + "  ".join(f"{k} {v:.1f}" for k, v in stats.items()))
+            continue
+        print(f"{name:<40} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import measure, open_catalog_database
+from cruchcount.search import search_products
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+QUERIES = {
+    "empty": "",
+    "barcode_prefix_short": "69",
+    "barcode_prefix_long": "690000012",
+    "name_2_chars": "薯片",
+    "name_trigram": "巧克力草莓",
+    "name_miss": "不存在的商品",
+    "name_short_miss": "无",
+}
+
+
+def legacy_search(connection: sqlite3.Connection, query: str, limit: int = 20) -> list:
+    q = query.strip()
+    if not q:
+        return connection.execute(
+            "SELECT barcode, name, price_cents FROM products NOT INDEXED ORDER BY updated_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    return connection.execute(
+        """
+        SELECT barcode, name, price_cents
+        FROM products NOT INDEXED
+        WHERE barcode LIKE ? OR name LIKE ?
+        ORDER BY
+            CASE WHEN barcode LIKE ? THEN 0 ELSE 1 END,
+            updated_at DESC
+        LIMIT ?
+        """,
+        (f"{q}%", f"%{q}%", f"{q}%", limit),
+    ).fetchall()
+
+
+def run(sizes: tuple[int, ...], repeat: int) -> dict[str, dict[str, dict[str, float]]]:
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            started = time.perf_counter()
+            database = open_catalog_database(Path(tmp), size, f"search_{size}.db")
+            print(f"[{size}] catalog generated in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+            connection = sqlite3.connect(str(database.path))
+            connection.row_factory = sqlite3.Row
+            for label, query in QUERIES.items():
+                indexed = measure(lambda q=query: search_products(connection, q), repeat)
+                legacy = measure(lambda q=query: legacy_search(connection, q), max(3, repeat // 5))
+                results[f"search.{label}.{size}"] = indexed
+                results[f"search_legacy.{label}.{size}"] = legacy
+                print(
+                    f"[{size}] {label:<22} indexed p50 {indexed['p50_ms']:8.3f} ms "
+                    f"p95 {indexed['p95_ms']:8.3f} ms | legacy p50 {legacy['p50_ms']:9.3f} ms",
+                    file=sys.stderr,
+                )
+            connection.close()
+            database.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Product search latency by catalog size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    run(tuple(args.sizes), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
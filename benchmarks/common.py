@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import random
+import sqlite3
+import statistics
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+BRANDS = ("乐事", "可比克", "奥利奥", "德芙", "旺旺", "卫龙", "三只松鼠", "良品铺子", "康师傅", "统一")
+KINDS = ("薯片", "饼干", "巧克力", "牛奶", "辣条", "坚果", "果冻", "方便面", "可乐", "矿泉水")
+FLAVORS = ("原味", "番茄味", "黄瓜味", "烧烤味", "香辣味", "海苔味", "草莓味", "抹茶味")
+
+
+def iter_catalog(size: int, seed: int = 7) -> Iterator[tuple[str, str, int, str]]:
+    rnd = random.Random(seed)
+    for i in range(size):
+        barcode = f"69{i:011d}"
+        name = f"{rnd.choice(BRANDS)}{rnd.choice(KINDS)}{rnd.choice(FLAVORS)}{rnd.randint(30, 500)}g"
+        price_cents = round(rnd.uniform(1, 80) * 100)
+        updated_at = f"2026-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:{i % 59:02d}"
+        yield barcode, name, price_cents, updated_at
+
+
+def populate_catalog(path: Path, size: int, seed: int = 7) -> None:
+    from cruchcount.barcodes import barcode_key
+
+    connection = sqlite3.connect(str(path))
+    with connection:
+        connection.executemany(
+            """
+            INSERT INTO products(barcode, name, price_cents, updated_at, barcode_key)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            ((*row, barcode_key(row[0])) for row in iter_catalog(size, seed)),
+        )
+    connection.close()
+
+
+def catalog_barcodes(size: int) -> list[str]:
+    return [f"69{i:011d}" for i in range(size)]
+
+
+def open_catalog_database(directory: Path, size: int, name: str = "bench.db", settings=None):
+    from cruchcount.db import Database
+
+    path = directory / name
+    database = Database(path, settings=settings)
+    database.init_schema()
+    populate_catalog(path, size)
+    return database
+
+
+def offscreen_app():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
+
+
+def summarize(samples_ms: list[float]) -> dict[str, float]:
+    samples = sorted(samples_ms)
+    return {
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "mean_ms": statistics.fmean(samples),
+        "ops_per_sec": 1000 / statistics.fmean(samples) if statistics.fmean(samples) else 0.0,
+        "samples": len(samples),
+    }
+
+
+def measure(func: Callable[[], object], repeat: int, warmup: int = 2) -> dict[str, float]:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.common import catalog_barcodes, offscreen_app, open_catalog_database, summarize
+from cruchcount.cart import parse_scan
+from cruchcount.trace import TRACE_ENV, read_trace
+
+DEFAULT_CATALOG_SIZE = 20_000
+DEFAULT_CUSTOMERS = 200
+POPULAR_ITEMS = 200
+SPEEDS = {"1x": 1.0, "10x": 10.0, "max": None}
+
+
+def synthetic_trace(barcodes: list[str], customers: int, seed: int = 5) -> list[dict[str, Any]]:
+    # A lunch rush: customers back to back, each a burst of scans a fraction of
+    # a second apart, mostly from a few hundred popular items. Now and then a
+    # case is scanned as "12*<barcode>", an item twice, a quantity corrected or
+    # a line removed; paying takes 5-20 s.
+    rnd = random.Random(seed)
+    popular = barcodes[:POPULAR_ITEMS]
+    events: list[dict[str, Any]] = []
+    t = 0.0
+    for _ in range(customers):
+        basket: list[str] = []
+        for _ in range(rnd.randint(1, 25)):
+            barcode = rnd.choice(popular) if rnd.random() < 0.8 else rnd.choice(barcodes)
+            basket.append(barcode)
+            t += rnd.uniform(0.25, 1.2)
+            text = f"{rnd.randint(2, 24)}*{barcode}" if rnd.random() < 0.05 else barcode
+            events.append({"t": t, "kind": "scan", "text": text})
+            if rnd.random() < 0.2:
+                t += rnd.uniform(0.2, 0.5)
+                events.append({"t": t, "kind": "scan", "text": barcode})
+        if rnd.random() < 0.1:
+            t += rnd.uniform(2, 5)
+            barcode = rnd.choice(basket)
+            events.append(
+                {"t": t, "kind": "quantity", "barcode": barcode, "quantity": rnd.randint(1, 6)}
+            )
+        if rnd.random() < 0.05:
+            t += rnd.uniform(2, 5)
+            events.append({"t": t, "kind": "remove", "barcode": rnd.choice(basket)})
+        t += rnd.uniform(5, 20)
+        events.append({"t": t, "kind": "checkout"})
+        t += rnd.uniform(1, 5)
+    return events
+
+
+def write_trace(path: Path, events: list[dict[str, Any]]) -> None:
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write(json.dumps({"t": 0.0, "kind": "start", "lane_id": "synthetic"}) + "\n")
+        for event in events:
+            line = {**event, "t": round(event["t"], 4)}
+            handle.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def _replayable(event: dict[str, Any]) -> bool:
+    # A scan the page would answer with a warning box would block a headless run.
+    if event["kind"] not in ("scan", "manual"):
+        return True
+    try:
+        parse_scan(event["text"])
+    except ValueError:
+        return False
+    return True
+
+
+def _apply(page, event: dict[str, Any]) -> None:
+    from cruchcount.ui.cart_model import QUANTITY_COLUMN
+
+    kind = event["kind"]
+    model = page.cart_model
+    if kind == "scan":
+        page.submit_scan(event["text"])
+    elif kind == "manual":
+        page.submit_manual(event["text"])
+    elif kind == "quantity":
+        row = model.row_for(event["barcode"])
+        if row is not None:
+            model.setData(model.index(row, QUANTITY_COLUMN), event["quantity"])
+    elif kind == "remove":
+        model.remove_barcode(event["barcode"])
+    elif kind == "clear":
+        model.clear()
+    elif kind == "unknown":
+        page.scan_queue.drain()
+        page.answer_unknown_product(event["barcode"], event.get("price_cents"))
+    elif kind == "member":
+        page.member_check.setChecked(bool(event["member"]))
+    elif kind == "checkout":
+        page.scan_queue.drain()
+        if not model.is_empty():
+            page.complete_checkout()
+
+
+def replay(app, page, events: list[dict[str, Any]], speed: float | None) -> dict[str, Any]:
+    # Feeds events through the real CartPage at `speed` times the recorded pace
+    # (None: back to back). Each event's latency runs until the page is idle
+    # again, i.e. its scans have been looked up and applied to the cart.
+    latencies: dict[str, list[float]] = {}
+    lag_ms: list[float] = []
+    skipped = 0
+    started = time.perf_counter()
+    for event in events:
+        if not _replayable(event):
+            skipped += 1
+            continue
+        if speed is not None:
+            due = started + event["t"] / speed
+            while (remaining := due - time.perf_counter()) > 0:
+                app.processEvents()
+                time.sleep(min(remaining, 0.001))
+            lag_ms.append((time.perf_counter() - due) * 1000)
+        begin = time.perf_counter()
+        _apply(page, event)
+        while page.scan_queue.pending_count():
+            app.processEvents()
+        latencies.setdefault(event["kind"], []).append((time.perf_counter() - begin) * 1000)
+    elapsed = time.perf_counter() - started
+
+    results: dict[str, Any] = {
+        f"replay.{kind}": summarize(samples) for kind, samples in sorted(latencies.items())
+    }
+    replayed = sum(len(samples) for samples in latencies.values())
+    checkouts = len(latencies.get("checkout", ()))
+    results["replay.throughput"] = {
+        "events": replayed,
+        "skipped": skipped,
+        "checkouts": checkouts,
+        "elapsed_s": elapsed,
+        "events_per_sec": replayed / elapsed if elapsed else 0.0,
+        "checkouts_per_min": checkouts * 60 / elapsed if elapsed else 0.0,
+    }
+    if lag_ms:
+        # How far behind the recorded schedule the page fell.
+        results["replay.lag"] = summarize(lag_ms)
+    return results
+
+
+def _copy_database(source: Path, target: Path) -> None:
+    # Replays write sales; they go to a copy, never to the database given.
+    source_connection = sqlite3.connect(f"{source.resolve().as_uri()}?mode=ro", uri=True)
+    target_connection = sqlite3.connect(str(target))
+    try:
+        source_connection.backup(target_connection)
+    finally:
+        target_connection.close()
+        source_connection.close()
+
+
+def run(
+    catalog_size: int = DEFAULT_CATALOG_SIZE,
+    customers: int = DEFAULT_CUSTOMERS,
+    speed: float | None = None,
+    trace: Path | None = None,
+    database_path: Path | None = None,
+) -> dict[str, Any]:
+    os.environ.pop(TRACE_ENV, None)
+    app = offscreen_app()
+    from cruchcount.db import Database
+    from cruchcount.ui.pages.cart_page import CartPage
+
+    if trace is not None:
+        events = list(read_trace(trace))
+    else:
+        events = synthetic_trace(catalog_barcodes(catalog_size), customers)
+    with tempfile.TemporaryDirectory() as tmp:
+        if database_path is not None:
+            path = Path(tmp) / database_path.name
+            _copy_database(database_path, path)
+            database = Database(path)
+            database.init_schema()
+        else:
+            database = open_catalog_database(Path(tmp), catalog_size)
+        page = CartPage(database=database)
+        page.show()
+        app.processEvents()
+        try:
+            results = replay(app, page, events, speed)
+        finally:
+            page.shutdown()
+            page.close()
+            database.close()
+    return results
+
+
+def _speed(value: str) -> float | None:
+    if value in SPEEDS:
+        return SPEEDS[value]
+    return float(value.rstrip("x"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded or synthetic scan trace through CartPage, headless."
+    )
+    parser.add_argument("trace", type=Path, nargs="?", help="trace recorded with CRUCHCOUNT_TRACE")
+    parser.add_argument("--db", type=Path, help="replay against a copy of this database")
+    parser.add_argument("--speed", type=_speed, default=None, help="1x, 10x, max or a factor")
+    parser.add_argument("--customers", type=int, default=DEFAULT_CUSTOMERS)
+    parser.add_argument("--catalog-size", type=int, default=DEFAULT_CATALOG_SIZE)
+    parser.add_argument("--save-trace", type=Path, help="write the synthetic trace to this file")
+    args = parser.parse_args()
+
+    if args.save_trace is not None:
+        barcodes = catalog_barcodes(args.catalog_size)
+        write_trace(args.save_trace, synthetic_trace(barcodes, args.customers))
+        print(f"trace written to {args.save_trace}", file=sys.stderr)
+        return
+    results = run(args.catalog_size, args.customers, args.speed, args.trace, args.db)
+    throughput = results.pop("replay.throughput")
+    for name, stats in results.items():
+        print(
+            f"{name:<24} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms  "
+            f"p99 {stats['p99_ms']:8.3f} ms  n={stats['samples']}"
+        )
+    print(
+        f"{throughput['events']} events ({throughput['skipped']} skipped) in "
+        f"{throughput['elapsed_s']:.2f} s: {throughput['events_per_sec']:.0f} events/s, "
+        f"{throughput['checkouts_per_min']:.0f} checkouts/min"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import catalog_barcodes, populate_catalog, summarize
+
+DEFAULT_LANES = 3
+DEFAULT_SALES = 300
+DEFAULT_CATALOG_SIZE = 20_000
+EDIT_EVERY = 10
+WATCHED_BARCODE = "6900000000000"
+
+
+def _lane(
+    path: Path,
+    lane_no: int,
+    sales: int,
+    catalog_size: int,
+    barrier,
+    results,
+) -> None:
+    from cruchcount.cart import CartItem
+    from cruchcount.db import CATALOG_POLL_INTERVAL_S, Database
+
+    rnd = random.Random(lane_no)
+    barcodes = catalog_barcodes(catalog_size)
+    database = Database(path, lane_id=f"lane{lane_no}")
+    database.init_schema()
+    barrier.wait()
+
+    sale_ms: list[float] = []
+    edit_ms: list[float] = []
+    errors = 0
+    recorded = 0
+    for sale_no in range(sales):
+        cart = []
+        for barcode in rnd.sample(barcodes, rnd.randint(3, 20)):
+            product = database.get_product_by_barcode(barcode)
+            if product is not None:
+                cart.append(
+                    CartItem(barcode, product["name"], product["price_cents"], rnd.randint(1, 3))
+                )
+        try:
+            started = time.perf_counter()
+            database.record_sale(cart)
+            sale_ms.append((time.perf_counter() - started) * 1000)
+            recorded += 1
+            if sale_no % EDIT_EVERY == lane_no % EDIT_EVERY:
+                barcode = rnd.choice(barcodes)
+                started = time.perf_counter()
+                database.upsert_product(barcode, f"改价商品{lane_no}", rnd.randint(100, 9000))
+                edit_ms.append((time.perf_counter() - started) * 1000)
+        except sqlite3.OperationalError:
+            errors += 1
+
+    # Lane 0 changes a price every other lane has cached; after one poll
+    # interval they must all see the new price.
+    database.get_product_by_barcode(WATCHED_BARCODE)
+    barrier.wait()
+    if lane_no == 0:
+        database.upsert_product(WATCHED_BARCODE, "观察商品", 4321)
+    barrier.wait()
+    time.sleep(CATALOG_POLL_INTERVAL_S * 1.5)
+    watched = database.get_product_by_barcode(WATCHED_BARCODE)
+
+    results.put(
+        {
+            "lane": lane_no,
+            "recorded": recorded,
+            "errors": errors,
+            "write_retries": database.write_retries,
+            "stale": watched is None or watched["price_cents"] != 4321,
+            "sale_ms": sale_ms,
+            "edit_ms": edit_ms,
+        }
+    )
+    database.close()
+
+
+def _check_consistency(path: Path) -> list[str]:
+    problems = []
+    connection = sqlite3.connect(str(path))
+    if connection.execute("PRAGMA integrity_check").fetchone()[0] != "ok":
+        problems.append("integrity_check failed")
+    mismatched = connection.execute(
+        """
+        SELECT count(*) FROM sales
+        WHERE total_cents + discount_cents != (
+            SELECT sum(price_cents * quantity) FROM sale_items WHERE sale_id = sales.id
+        )
+        """
+    ).fetchone()[0]
+    if mismatched:
+        problems.append(f"{mismatched} sales whose total does not match their lines")
+    sales, rolled_up = connection.execute(
+        "SELECT (SELECT count(*) FROM sales), (SELECT sum(sale_count) FROM report_daily)"
+    ).fetchone()
+    if sales != rolled_up:
+        problems.append(f"report_daily counts {rolled_up} sales, sales table has {sales}")
+    paid, discounts, list_revenue = connection.execute(
+        """
+        SELECT
+            (SELECT sum(revenue_cents) FROM report_daily),
+            (SELECT sum(discount_cents) FROM report_daily),
+            (SELECT sum(revenue_cents) FROM report_sku)
+        """
+    ).fetchone()
+    if (paid or 0) + (discounts or 0) != (list_revenue or 0):
+        problems.append(
+            f"report_sku has {list_revenue} cents before discounts, "
+            f"report_daily {paid} paid plus {discounts} off"
+        )
+    connection.close()
+    return problems
+
+
+def run(lanes: int, sales: int, catalog_size: int) -> dict[str, dict[str, float]]:
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "lanes.db"
+        from cruchcount.db import Database
+
+        database = Database(path)
+        database.init_schema()
+        database.close()
+        populate_catalog(path, catalog_size)
+
+        barrier = context.Barrier(lanes)
+        results = context.Queue()
+        started = time.perf_counter()
+        processes = [
+            context.Process(
+                target=_lane, args=(path, lane_no, sales, catalog_size, barrier, results)
+            )
+            for lane_no in range(lanes)
+        ]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        problems = _check_consistency(path)
+        recorded = sum(report["recorded"] for report in reports)
+        problems.extend(
+            f"lane {report['lane']} recorded {report['recorded']} of {sales} sales"
+            for report in reports
+            if report["recorded"] != sales
+        )
+        problems.extend(
+            f"lane {report['lane']} still sees the old price after a poll interval"
+            for report in reports
+            if report["stale"]
+        )
+        for problem in problems:
+            print(f"PROBLEM {problem}", file=sys.stderr)
+
+    sale_stats = summarize([ms for report in reports for ms in report["sale_ms"]])
+    sale_stats["lanes"] = lanes
+    sale_stats["sales_per_sec"] = recorded / elapsed
+    sale_stats["errors"] = sum(report["errors"] for report in reports)
+    sale_stats["write_retries"] = sum(report["write_retries"] for report in reports)
+    sale_stats["problems"] = len(problems)
+    results_out = {f"lanes.{lanes}.record_sale": sale_stats}
+    edit_ms = [ms for report in reports for ms in report["edit_ms"]]
+    if edit_ms:
+        results_out[f"lanes.{lanes}.upsert_product"] = summarize(edit_ms)
+    if problems:
+        raise RuntimeError(f"{len(problems)} multi-lane consistency problem(s)")
+    return results_out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Several register processes on one database.")
+    parser.add_argument("--lanes", type=int, default=DEFAULT_LANES)
+    parser.add_argument("--sales", type=int, default=DEFAULT_SALES, help="sales per lane")
+    parser.add_argument("--catalog-size", type=int, default=DEFAULT_CATALOG_SIZE)
+    args = parser.parse_args()
+    print(json.dumps(run(args.lanes, args.sales, args.catalog_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
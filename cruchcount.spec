@@ -1,9 +1,50 @@
 # -*- mode: python ; coding: utf-8 -*-
 
-from PyInstaller.utils.hooks import collect_submodules
+# Only the Qt modules CruchCount imports; PyInstaller's PyQt6 hooks pull in the
+# matching Qt libraries and plugins for these and nothing else.
+hiddenimports = [
+    "PyQt6.sip",
+    "PyQt6.QtCore",
+    "PyQt6.QtGui",
+    "PyQt6.QtWidgets",
+]
 
-
-hiddenimports = collect_submodules("PyQt6")
+excludes = [
+    "PyQt6.Qt3DCore",
+    "PyQt6.QtBluetooth",
+    "PyQt6.QtCharts",
+    "PyQt6.QtDBus",
+    "PyQt6.QtDesigner",
+    "PyQt6.QtHelp",
+    "PyQt6.QtMultimedia",
+    "PyQt6.QtMultimediaWidgets",
+    "PyQt6.QtNetwork",
+    "PyQt6.QtNfc",
+    "PyQt6.QtOpenGL",
+    "PyQt6.QtOpenGLWidgets",
+    "PyQt6.QtPdf",
+    "PyQt6.QtPdfWidgets",
+    "PyQt6.QtPositioning",
+    "PyQt6.QtPrintSupport",
+    "PyQt6.QtQml",
+    "PyQt6.QtQuick",
+    "PyQt6.QtQuickWidgets",
+    "PyQt6.QtRemoteObjects",
+    "PyQt6.QtSensors",
+    "PyQt6.QtSerialPort",
+    "PyQt6.QtSpatialAudio",
+    "PyQt6.QtSql",
+    "PyQt6.QtSvg",
+    "PyQt6.QtSvgWidgets",
+    "PyQt6.QtTest",
+    "PyQt6.QtTextToSpeech",
+    "PyQt6.QtWebChannel",
+    "PyQt6.QtWebEngineCore",
+    "PyQt6.QtWebEngineWidgets",
+    "PyQt6.QtWebSockets",
+    "PyQt6.QtXml",
+    "tkinter",
+]
 
 a = Analysis(
     ["main.py"],
@@ -14,7 +55,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=excludes,
     noarchive=False,
     optimize=0,
 )
@@ -1,20 +1,36 @@
 from __future__ import annotations
 
-from pathlib import Path
+import time
 
 from PyQt6.QtWidgets import QApplication
 
-from cruchcount.db import Database
+from cruchcount.db import DEFAULT_DATABASE_PATH, Database
+from cruchcount.startup import StartupTimer, startup_timing_mode
 from cruchcount.ui.main_window import MainWindow
 
 
-def run_app() -> None:
+def run_app(started_at: float | None = None) -> None:
+    timing_mode = startup_timing_mode()
+    timer = None
+    if timing_mode is not None:
+        timer = StartupTimer(
+            started_at if started_at is not None else time.perf_counter(),
+            exit_after_paint=timing_mode == "exit",
+        )
+        timer.mark("import_ms")
+
     app = QApplication([])
-    data_dir = Path(__file__).resolve().parent.parent / "data"
-    database = Database(data_dir / "cruchcount.db")
+    if timer is not None:
+        timer.mark("qapplication_ms")
+    database = Database(DEFAULT_DATABASE_PATH)
     database.init_schema()
+    if timer is not None:
+        timer.mark("db_open_ms")
 
     window = MainWindow(database=database)
+    if timer is not None:
+        timer.mark("window_build_ms")
+        timer.watch_first_paint(window)
     window.show()
     app.exec()
     window.database.close()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import functools
+import re
+
+# A GTIN can reach us as EAN-8, UPC-A, EAN-13 or GTIN-14 (and UPC-A often as
+# EAN-13 with a leading zero). Left-padded to 14 digits they are one number.
+GTIN_LENGTHS = (8, 12, 13, 14)
+GTIN_KEY_LENGTH = 14
+# Supplemental add-ons (periodical issue, book price) printed after UPC-A/EAN-13.
+ADDON_LENGTHS = (2, 5)
+_ADDON_BASE_LENGTHS = (12, 13)
+
+_WHITESPACE = re.compile(r"\s+")
+_SEPARATED_ADDON = re.compile(r"(\d+)[-+](\d{2}|\d{5})")
+
+
+def gtin_check_digit(body: str) -> int:
+    # Weights alternate 3, 1, 3, ... from the digit next to the check digit.
+    total = 3 * sum(map(int, body[::-2])) + sum(map(int, body[-2::-2]))
+    return (10 - total % 10) % 10
+
+
+def _is_digits(code: str) -> bool:
+    return code.isascii() and code.isdigit()
+
+
+def is_valid_gtin(code: str) -> bool:
+    return (
+        len(code) in GTIN_LENGTHS
+        and _is_digits(code)
+        and gtin_check_digit(code[:-1]) == int(code[-1])
+    )
+
+
+def has_bad_check_digit(raw: str) -> bool:
+    # Numeric and GTIN-sized but failing the check: most likely a mistyped code.
+    code = clean_barcode(raw)
+    return len(code) in GTIN_LENGTHS and _is_digits(code) and not is_valid_gtin(code)
+
+
+def clean_barcode(raw: str) -> str:
+    # The barcode with scanner noise removed: whitespace and control characters
+    # anywhere in it, and an add-on after a valid UPC-A/EAN-13, either appended
+    # directly or after '-' / '+'.
+    # Scans are almost always clean already; skip the regex for those.
+    code = raw if raw.isalnum() else _WHITESPACE.sub("", raw)
+    separated = _SEPARATED_ADDON.fullmatch(code)
+    if separated is not None and is_valid_gtin(separated.group(1)):
+        return separated.group(1)
+    if _is_digits(code) and not is_valid_gtin(code):
+        for addon_length in ADDON_LENGTHS:
+            base = code[:-addon_length]
+            if len(base) in _ADDON_BASE_LENGTHS and is_valid_gtin(base):
+                return base
+    return code
+
+
+# Every scan goes through barcode_key; the same few thousand codes repeat all day.
+@functools.lru_cache(maxsize=8192)
+def barcode_key(raw: str) -> str:
+    # What products.barcode_key holds: every spelling of one GTIN maps to the
+    # same 14 digits; anything else (store codes, bad check digits) is kept
+    # as cleaned, so it only matches itself.
+    code = clean_barcode(raw)
+    if is_valid_gtin(code):
+        return code.zfill(GTIN_KEY_LENGTH)
+    return code
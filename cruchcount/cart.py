@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from cruchcount.barcodes import clean_barcode
+
+# Largest quantity accepted in front of a scan, as in "24*6901234567892".
+MAX_SCAN_QUANTITY = 9999
+_QUANTITY_PREFIX = re.compile(r"\s*(\d+)\s*[*×＊]\s*(.*)", re.DOTALL)
+
+
+@dataclass(slots=True)
+class CartItem:
+    barcode: str
+    name: str
+    price_cents: int
+    quantity: int
+
+    @property
+    def subtotal_cents(self) -> int:
+        return self.price_cents * self.quantity
+
+
+@dataclass(slots=True)
+class CartTotals:
+    quantity: int = 0
+    amount_cents: int = 0
+
+    def add(self, price_cents: int, quantity: int) -> None:
+        self.quantity += quantity
+        self.amount_cents += price_cents * quantity
+
+    def reset(self) -> None:
+        self.quantity = 0
+        self.amount_cents = 0
+
+
+def parse_scan(text: str) -> tuple[str, int]:
+    # "<barcode>" or "<quantity>*<barcode>" -> (barcode, quantity). The barcode
+    # is empty if there was none; a quantity outside 1..MAX_SCAN_QUANTITY
+    # raises ValueError.
+    match = _QUANTITY_PREFIX.fullmatch(text)
+    if match is None:
+        return clean_barcode(text), 1
+    quantity = int(match.group(1))
+    if not 0 < quantity <= MAX_SCAN_QUANTITY:
+        raise ValueError(f"quantity out of range: {quantity}")
+    return clean_barcode(match.group(2)), quantity
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import csv
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from pathlib import Path
+
+from cruchcount.cart import MAX_SCAN_QUANTITY, parse_scan
+from cruchcount.db import Database
+from cruchcount.money import cents_to_text, to_cents
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_ENCODING = "utf-8-sig"
+CATALOG_FIELDS = ("barcode", "name", "price")
+ORDER_FIELDS = ("barcode",)
+HEADER_ALIASES = {
+    "barcode": "barcode",
+    "条码": "barcode",
+    "name": "name",
+    "商品名称": "name",
+    "名称": "name",
+    "price": "price",
+    "售价": "price",
+    "quantity": "quantity",
+    "qty": "quantity",
+    "数量": "quantity",
+}
+
+# Called with (rows processed, bytes read, file size); returning False cancels.
+ProgressCallback = Callable[[int, int, int], bool | None]
+
+
+class CatalogFormatError(ValueError):
+    pass
+
+
+@dataclass
+class RejectedRow:
+    line_no: int
+    reason: str
+    values: list[str]
+
+
+@dataclass
+class OrderFile:
+    lines: list[tuple[str, int]] = field(default_factory=list)
+    rejected: list[RejectedRow] = field(default_factory=list)
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    rejected: list[RejectedRow] = field(default_factory=list)
+    cancelled: bool = False
+
+
+def delimiter_for(path: Path) -> str:
+    return "\t" if path.suffix.lower() in {".tsv", ".tab"} else ","
+
+
+def iter_catalog_rows(
+    path: Path, encoding: str = DEFAULT_ENCODING
+) -> Iterator[tuple[int, list[str], int]]:
+    with path.open("rb") as handle:
+        position = 0
+
+        def lines() -> Iterator[str]:
+            nonlocal position
+            for raw_line in handle:
+                position += len(raw_line)
+                yield raw_line.decode(encoding)
+
+        reader = csv.reader(lines(), delimiter=delimiter_for(path))
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            yield reader.line_num, values, position
+
+
+def parse_header(
+    values: list[str], required: tuple[str, ...] = CATALOG_FIELDS
+) -> dict[str, int]:
+    columns: dict[str, int] = {}
+    for index, value in enumerate(values):
+        key = HEADER_ALIASES.get(value.strip().lower())
+        if key is not None and key not in columns:
+            columns[key] = index
+    missing = [name for name in required if name not in columns]
+    if missing:
+        raise CatalogFormatError(f"缺少列：{', '.join(missing)}")
+    return columns
+
+
+def validate_row(values: list[str], columns: dict[str, int]) -> tuple[str, str, int] | str:
+    def cell(name: str) -> str:
+        index = columns[name]
+        return values[index].strip() if index < len(values) else ""
+
+    barcode = cell("barcode")
+    name = cell("name")
+    if not barcode:
+        return "条码为空"
+    if not name:
+        return "商品名称为空"
+    try:
+        price_cents = to_cents(cell("price"))
+    except ValueError:
+        return "请输入有效售价"
+    if price_cents <= 0:
+        return "请输入有效售价"
+    return barcode, name, price_cents
+
+
+def import_catalog(
+    database: Database,
+    path: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: ProgressCallback | None = None,
+    encoding: str = DEFAULT_ENCODING,
+) -> ImportResult:
+    result = ImportResult()
+    total_bytes = path.stat().st_size
+    rows = iter_catalog_rows(path, encoding)
+
+    try:
+        header = next(rows, None)
+        if header is None:
+            return result
+        columns = parse_header(header[1])
+
+        processed = 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            valid: list[tuple[str, str, int]] = []
+            for line_no, values, _ in chunk:
+                checked = validate_row(values, columns)
+                if isinstance(checked, str):
+                    result.rejected.append(RejectedRow(line_no, checked, values))
+                else:
+                    valid.append(checked)
+            if valid:
+                result.imported += database.upsert_products(valid)
+
+            processed += len(chunk)
+            if progress is not None and progress(processed, chunk[-1][2], total_bytes) is False:
+                result.cancelled = True
+                break
+    finally:
+        rows.close()
+    return result
+
+
+def read_order_file(path: Path, encoding: str = DEFAULT_ENCODING) -> OrderFile:
+    # A saved shopping list or order: CSV/TSV with 条码 and an optional 数量
+    # column, or no header at all and one scan per line ("6901234567892" or
+    # "24*6901234567892", optionally followed by a quantity column).
+    result = OrderFile()
+    source = iter_catalog_rows(path, encoding)
+    try:
+        first = next(source, None)
+        if first is None:
+            return result
+        rows: Iterator[tuple[int, list[str], int]] = source
+        try:
+            columns: dict[str, int] | None = parse_header(first[1], ORDER_FIELDS)
+        except CatalogFormatError:
+            columns = None
+            rows = chain([first], source)
+        for line_no, values, _ in rows:
+            checked = _order_line(values, columns)
+            if isinstance(checked, str):
+                result.rejected.append(RejectedRow(line_no, checked, values))
+            else:
+                result.lines.append(checked)
+    finally:
+        source.close()
+    return result
+
+
+def _order_line(values: list[str], columns: dict[str, int] | None) -> tuple[str, int] | str:
+    def cell(index: int | None) -> str:
+        return values[index].strip() if index is not None and index < len(values) else ""
+
+    if columns is None:
+        scan, quantity_text = cell(0), cell(1)
+    else:
+        scan, quantity_text = cell(columns["barcode"]), cell(columns.get("quantity"))
+    try:
+        barcode, quantity = parse_scan(scan)
+        if quantity_text:
+            quantity *= int(quantity_text)
+    except ValueError:
+        return "数量必须是大于 0 的整数"
+    if not barcode:
+        return "条码为空"
+    if not 0 < quantity <= MAX_SCAN_QUANTITY:
+        return "数量必须是大于 0 的整数"
+    return barcode, quantity
+
+
+def export_catalog(
+    database: Database, path: Path, encoding: str = DEFAULT_ENCODING
+) -> int:
+    count = 0
+    with path.open("w", encoding=encoding, newline="") as handle:
+        writer = csv.writer(handle, delimiter=delimiter_for(path))
+        writer.writerow(CATALOG_FIELDS)
+        for product in database.iter_products():
+            writer.writerow((product["barcode"], product["name"], cents_to_text(product["price_cents"])))
+            count += 1
+    return count
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any
+
+from cruchcount.catalog_io import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_ENCODING,
+    CatalogFormatError,
+    export_catalog,
+    import_catalog,
+)
+from cruchcount.db import DEFAULT_DATABASE_PATH, Database
+from cruchcount.maintenance import (
+    MaintenanceSettings,
+    backup_database,
+    list_backups,
+    restore_database,
+    rotate_backups,
+    run_maintenance,
+)
+from cruchcount.money import format_cents, to_cents
+from cruchcount.promotions import MEMBER_PRICE, MULTI_BUY, PROMOTION_KINDS, SPEND_THRESHOLD
+
+MAX_REPORTED_REJECTS = 20
+
+
+def _open_database(path: Path) -> Database:
+    database = Database(path)
+    database.init_schema()
+    return database
+
+
+def _print_progress(processed: int, bytes_read: int, total_bytes: int) -> None:
+    percent = bytes_read * 100 // total_bytes if total_bytes else 100
+    print(f"\r已处理 {processed} 行（{percent}%）", end="", file=sys.stderr, flush=True)
+
+
+def _import(args: argparse.Namespace) -> int:
+    # The same failures the GUI import worker reports: a bad or unreadable
+    # file, or a database that is locked or cannot be opened.
+    try:
+        database = _open_database(args.db)
+    except sqlite3.Error as exc:
+        print(f"导入失败：{exc}", file=sys.stderr)
+        return 2
+    try:
+        result = import_catalog(
+            database,
+            args.file,
+            chunk_size=args.chunk_size,
+            progress=None if args.quiet else _print_progress,
+            encoding=args.encoding,
+        )
+    except (CatalogFormatError, UnicodeDecodeError, OSError, sqlite3.Error) as exc:
+        if not args.quiet:
+            print(file=sys.stderr)
+        print(f"导入失败：{exc}", file=sys.stderr)
+        return 2
+    finally:
+        database.close()
+
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"导入 {result.imported} 条，拒绝 {len(result.rejected)} 条")
+    for rejected in result.rejected[:MAX_REPORTED_REJECTS]:
+        print(f"  第 {rejected.line_no} 行：{rejected.reason}")
+    if len(result.rejected) > MAX_REPORTED_REJECTS:
+        print(f"  ……其余 {len(result.rejected) - MAX_REPORTED_REJECTS} 条略")
+    return 1 if result.rejected else 0
+
+
+def _export(args: argparse.Namespace) -> int:
+    try:
+        database = _open_database(args.db)
+        try:
+            count = export_catalog(database, args.file, encoding=args.encoding)
+        finally:
+            database.close()
+    except (OSError, UnicodeEncodeError, sqlite3.Error) as exc:
+        print(f"导出失败：{exc}", file=sys.stderr)
+        return 2
+    print(f"导出 {count} 条商品到 {args.file}")
+    return 0
+
+
+def _backup(args: argparse.Namespace) -> int:
+    if not args.db.exists():
+        print(f"数据库不存在：{args.db}", file=sys.stderr)
+        return 2
+    keep = args.keep or MaintenanceSettings.from_env().backup_keep
+    path = backup_database(args.db, args.dir)
+    removed = rotate_backups(args.db, keep, args.dir)
+    print(f"已备份到 {path}")
+    if removed:
+        print(f"已删除 {len(removed)} 个旧备份（保留 {keep} 个）")
+    return 0
+
+
+def _restore(args: argparse.Namespace) -> int:
+    backup = args.file
+    if backup is None:
+        backups = list_backups(args.db, args.dir)
+        if not backups:
+            print("没有可用的备份", file=sys.stderr)
+            return 2
+        backup = backups[-1]
+    if not args.yes:
+        answer = input(f"将用 {backup} 覆盖 {args.db}，请先关闭所有收银程序。继续？[y/N] ")
+        if answer.strip().lower() != "y":
+            return 1
+    try:
+        restore_database(backup, args.db)
+    except sqlite3.DatabaseError as exc:
+        print(f"恢复失败：{exc}", file=sys.stderr)
+        return 2
+    print(f"已从 {backup} 恢复")
+    return 0
+
+
+def _maintain(args: argparse.Namespace) -> int:
+    database = _open_database(args.db)
+    try:
+        released = run_maintenance(database)
+    finally:
+        database.close()
+    print(f"已更新统计信息，释放 {released} 个空闲页")
+    return 0
+
+
+_PROMOTION_KIND_NAMES = {MEMBER_PRICE: "会员价", MULTI_BUY: "多件优惠", SPEND_THRESHOLD: "满减"}
+
+
+def _promotion_terms(kind: str, threshold: int, amount_cents: int) -> str:
+    if kind == MEMBER_PRICE:
+        return format_cents(amount_cents)
+    if kind == MULTI_BUY:
+        return f"{threshold} 件 {format_cents(amount_cents)}"
+    return f"满 {format_cents(threshold)} 减 {format_cents(amount_cents)}"
+
+
+def _describe_promotion(promotion: dict[str, Any]) -> str:
+    kind = promotion["kind"]
+    terms = _promotion_terms(kind, promotion["threshold"], promotion["amount_cents"])
+    if promotion["barcode_key"]:
+        scope = f"条码 {promotion['barcode_key']}"
+    elif promotion["category"]:
+        scope = f"分类 {promotion['category']}"
+    else:
+        scope = "全场"
+    period = ""
+    if promotion["starts_on"] or promotion["ends_on"]:
+        period = f"  {promotion['starts_on'] or '…'} 至 {promotion['ends_on'] or '…'}"
+    return (
+        f"{promotion['id']:>5}  {promotion['name']}  "
+        f"{_PROMOTION_KIND_NAMES.get(kind, kind)}：{terms}  [{scope}]{period}"
+    )
+
+
+def _promo_list(args: argparse.Namespace) -> int:
+    try:
+        database = _open_database(args.db)
+        try:
+            promotions = database.list_promotions()
+        finally:
+            database.close()
+    except sqlite3.Error as exc:
+        print(f"读取失败：{exc}", file=sys.stderr)
+        return 2
+    for promotion in promotions:
+        print(_describe_promotion(promotion))
+    print(f"共 {len(promotions)} 条促销")
+    return 0
+
+
+def _promo_add(args: argparse.Namespace) -> int:
+    try:
+        if args.kind == MEMBER_PRICE:
+            threshold, amount_cents = 0, to_cents(args.price or "0")
+        elif args.kind == MULTI_BUY:
+            threshold, amount_cents = args.buy or 0, to_cents(args.price or "0")
+        else:
+            threshold, amount_cents = to_cents(args.spend or "0"), to_cents(args.off or "0")
+        default_name = _promotion_terms(args.kind, threshold, amount_cents)
+        if args.kind == MEMBER_PRICE:
+            default_name = f"会员价 {default_name}"
+        database = _open_database(args.db)
+        try:
+            promotion_id = database.add_promotion(
+                args.name or default_name,
+                args.kind,
+                amount_cents,
+                threshold,
+                barcode=args.barcode,
+                category=args.category,
+                starts_on=args.starts,
+                ends_on=args.ends,
+            )
+        finally:
+            database.close()
+    except (ValueError, sqlite3.Error) as exc:
+        print(f"添加失败：{exc}", file=sys.stderr)
+        return 2
+    print(f"已添加促销 {promotion_id}：{args.name or default_name}")
+    return 0
+
+
+def _promo_remove(args: argparse.Namespace) -> int:
+    try:
+        database = _open_database(args.db)
+        try:
+            removed = database.delete_promotion(args.id)
+        finally:
+            database.close()
+    except sqlite3.Error as exc:
+        print(f"删除失败：{exc}", file=sys.stderr)
+        return 2
+    if not removed:
+        print(f"没有编号为 {args.id} 的促销", file=sys.stderr)
+        return 2
+    print(f"已删除促销 {args.id}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cruchcount", description="CruchCount 命令行工具")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DATABASE_PATH, help="数据库文件路径")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="从 CSV/TSV 批量导入商品")
+    import_parser.add_argument("file", type=Path)
+    import_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    import_parser.add_argument("--encoding", default=DEFAULT_ENCODING)
+    import_parser.add_argument("--quiet", action="store_true")
+    import_parser.set_defaults(handler=_import)
+
+    export_parser = commands.add_parser("export", help="导出商品到 CSV/TSV")
+    export_parser.add_argument("file", type=Path)
+    export_parser.add_argument("--encoding", default=DEFAULT_ENCODING)
+    export_parser.set_defaults(handler=_export)
+
+    backup_parser = commands.add_parser("backup", help="在线备份数据库（收银时也可运行）")
+    backup_parser.add_argument("--dir", type=Path, help="备份目录，默认为数据库旁的 backups/")
+    backup_parser.add_argument("--keep", type=int, help="保留的备份个数")
+    backup_parser.set_defaults(handler=_backup)
+
+    restore_parser = commands.add_parser("restore", help="从备份恢复数据库（需先关闭收银程序）")
+    restore_parser.add_argument("file", type=Path, nargs="?", help="备份文件，默认为最新备份")
+    restore_parser.add_argument("--dir", type=Path, help="备份目录，默认为数据库旁的 backups/")
+    restore_parser.add_argument("--yes", action="store_true", help="不再确认")
+    restore_parser.set_defaults(handler=_restore)
+
+    maintain_parser = commands.add_parser(
+        "maintain", help="更新查询统计信息（ANALYZE / PRAGMA optimize）并回收空闲页"
+    )
+    maintain_parser.set_defaults(handler=_maintain)
+
+    promo_parser = commands.add_parser("promo", help="管理促销（会员价、多件优惠、满减）")
+    promo_commands = promo_parser.add_subparsers(dest="promo_command", required=True)
+    promo_commands.add_parser("list", help="列出全部促销").set_defaults(handler=_promo_list)
+    add_parser = promo_commands.add_parser("add", help="添加促销")
+    add_parser.add_argument("kind", choices=PROMOTION_KINDS)
+    scope = add_parser.add_mutually_exclusive_group()
+    scope.add_argument("--barcode", help="只对该条码生效")
+    scope.add_argument("--category", help="对该分类的商品生效；都不给则为全场（仅满减）")
+    add_parser.add_argument("--price", help="会员价，或多件优惠的组合价")
+    add_parser.add_argument("--buy", type=int, help="多件优惠的件数")
+    add_parser.add_argument("--spend", help="满减门槛金额")
+    add_parser.add_argument("--off", help="满减减免金额")
+    add_parser.add_argument("--name", help="显示在小票上的名称")
+    add_parser.add_argument("--starts", help="开始日期 YYYY-MM-DD（含）")
+    add_parser.add_argument("--ends", help="结束日期 YYYY-MM-DD（含）")
+    add_parser.set_defaults(handler=_promo_add)
+    remove_parser = promo_commands.add_parser("remove", help="删除促销")
+    remove_parser.add_argument("id", type=int)
+    remove_parser.set_defaults(handler=_promo_remove)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
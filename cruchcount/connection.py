@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+SETTINGS_ENV_PREFIX = "CRUCHCOUNT_SQLITE_"
+JOURNAL_MODES = frozenset({"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"})
+SYNCHRONOUS_MODES = frozenset({"OFF", "NORMAL", "FULL", "EXTRA"})
+
+
+@dataclass(frozen=True)
+class ConnectionSettings:
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size_kib: int = 16 * 1024
+    mmap_size_mib: int = 128
+    busy_timeout_ms: int = 5000
+    read_pool_size: int = 4
+    cached_statements: int = 256
+    write_retries: int = 5
+    retry_backoff_ms: int = 25
+
+    def __post_init__(self) -> None:
+        if self.journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"unsupported journal_mode: {self.journal_mode!r}")
+        if self.synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"unsupported synchronous: {self.synchronous!r}")
+        if self.read_pool_size < 1:
+            raise ValueError("read_pool_size must be at least 1")
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] | None = None) -> ConnectionSettings:
+        # e.g. CRUCHCOUNT_SQLITE_SYNCHRONOUS=FULL or CRUCHCOUNT_SQLITE_READ_POOL_SIZE=2
+        environ = os.environ if environ is None else environ
+        overrides: dict[str, str | int] = {}
+        for field in fields(cls):
+            raw = environ.get(SETTINGS_ENV_PREFIX + field.name.upper(), "").strip()
+            if not raw:
+                continue
+            if isinstance(field.default, int):
+                overrides[field.name] = int(raw)
+            else:
+                overrides[field.name] = raw.upper()
+        return cls(**overrides)  # type: ignore[arg-type]
+
+
+def connect_writer(path: Path, settings: ConnectionSettings) -> sqlite3.Connection:
+    # Shared across threads; callers serialize access with Database's write lock.
+    # Write transactions start IMMEDIATE so another lane's writer makes us wait
+    # in the busy handler up front instead of failing halfway through.
+    connection = sqlite3.connect(
+        str(path),
+        timeout=settings.busy_timeout_ms / 1000,
+        isolation_level="IMMEDIATE",
+        check_same_thread=False,
+        cached_statements=settings.cached_statements,
+    )
+    try:
+        _configure(connection, settings)
+        connection.execute(f"PRAGMA journal_mode = {settings.journal_mode}")
+        connection.execute(f"PRAGMA synchronous = {settings.synchronous}")
+    except sqlite3.Error:
+        connection.close()
+        raise
+    return connection
+
+
+def connect_read_only(
+    path: Path, settings: ConnectionSettings | None = None
+) -> sqlite3.Connection:
+    settings = settings or ConnectionSettings()
+    connection = sqlite3.connect(
+        f"{path.resolve().as_uri()}?mode=ro",
+        uri=True,
+        timeout=settings.busy_timeout_ms / 1000,
+        check_same_thread=False,
+        cached_statements=settings.cached_statements,
+    )
+    _configure(connection, settings)
+    return connection
+
+
+def is_busy_error(exc: sqlite3.Error) -> bool:
+    code = getattr(exc, "sqlite_errorcode", None)
+    if code is None:
+        return "locked" in str(exc) or "busy" in str(exc)
+    return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
+def _configure(connection: sqlite3.Connection, settings: ConnectionSettings) -> None:
+    connection.row_factory = sqlite3.Row
+    connection.execute(f"PRAGMA cache_size = {-settings.cache_size_kib}")
+    connection.execute(f"PRAGMA mmap_size = {settings.mmap_size_mib * 1024 * 1024}")
+
+
+class ReadPool:
+    # In WAL mode these readers never wait for the writer, so lookups from the
+    # GUI and worker threads keep running while a bulk import is committing.
+    def __init__(self, path: Path, settings: ConnectionSettings) -> None:
+        self.path = path
+        self.settings = settings
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("read pool is closed")
+            create = self._opened < self.settings.read_pool_size
+            if create:
+                self._opened += 1
+        if create:
+            try:
+                return connect_read_only(self.path, self.settings)
+            except BaseException:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.settings.busy_timeout_ms / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError("no read connection available") from None
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        with self._lock:
+            if self._closed:
+                self._opened -= 1
+                connection.close()
+                return
+        self._idle.put(connection)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._opened -= 1
+            connection.close()
@@ -1,79 +1,612 @@
 from __future__ import annotations
 
+import os
+import random
+import re
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from pathlib import Path
-from typing import Any
+from typing import Any, Protocol, TypeVar
+
+from cruchcount import history, parked, promotions, reports, stock
+from cruchcount.barcodes import barcode_key, clean_barcode
+from cruchcount.cart import CartItem
+from cruchcount.connection import (
+    ConnectionSettings,
+    ReadPool,
+    connect_writer,
+    is_busy_error,
+)
+from cruchcount.instrumentation import timed
+from cruchcount.migrations import migrate
+from cruchcount.search import init_search_index, search_products
+
+DEFAULT_DATABASE_PATH = Path(__file__).resolve().parent.parent / "data" / "cruchcount.db"
+DEFAULT_PRODUCT_CACHE_SIZE = 1024
+LANE_ENV = "CRUCHCOUNT_LANE"
+DEFAULT_LANE_ID = "1"
+# How often a lane checks catalog_changes for products edited by other lanes.
+CATALOG_POLL_INTERVAL_S = 0.5
+# catalog_changes rows kept after pruning; a lane further behind drops its cache.
+CATALOG_CHANGES_KEEP = 10_000
+# Barcodes per IN (...) in a bulk lookup, well under SQLite's parameter limit.
+LOOKUP_CHUNK_SIZE = 500
+# Rows ANALYZE samples per index, so refreshing statistics takes milliseconds.
+ANALYSIS_LIMIT = 1000
+
+_LANE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,32}")
+_MISSING = object()
+
+T = TypeVar("T")
+
+
+def lane_id_from_env() -> str:
+    lane_id = os.environ.get(LANE_ENV, "").strip() or DEFAULT_LANE_ID
+    if not _LANE_ID_PATTERN.fullmatch(lane_id):
+        raise ValueError(f"{LANE_ENV} must be 1-32 letters, digits, '-' or '_': {lane_id!r}")
+    return lane_id
+
+
+class SaleLine(Protocol):
+    barcode: str
+    name: str
+    price_cents: int
+    quantity: int
 
 
 class Database:
-    def __init__(self, path: Path) -> None:
+    def __init__(
+        self,
+        path: Path,
+        product_cache_size: int = DEFAULT_PRODUCT_CACHE_SIZE,
+        settings: ConnectionSettings | None = None,
+        lane_id: str | None = None,
+    ) -> None:
         self.path = path
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._connection = sqlite3.connect(str(path))
-        self._connection.row_factory = sqlite3.Row
+        self.settings = settings or ConnectionSettings.from_env()
+        self.lane_id = lane_id or lane_id_from_env()
+        # Every write goes through this one connection, under _write_lock, so
+        # worker threads can write without fighting over SQLite's file lock.
+        # Reads use read_pool and never wait on the lock.
+        self._connection = connect_writer(path, self.settings)
+        self._write_lock = threading.RLock()
+        self.read_pool = ReadPool(path, self.settings)
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+        self._product_cache: OrderedDict[str, dict[str, Any] | None] = OrderedDict()
+        self._product_cache_size = max(0, product_cache_size)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.write_retries = 0
+        self._catalog_change_id = 0
+        self._next_catalog_poll = 0.0
 
     def close(self) -> None:
-        self._connection.close()
+        self.read_pool.close()
+        with self._write_lock:
+            self._connection.close()
+
+    def interrupt(self) -> None:
+        # Aborts what the write connection is running (a migration, say); safe
+        # from any thread. The interrupted call raises sqlite3.OperationalError.
+        try:
+            self._connection.interrupt()
+        except sqlite3.ProgrammingError:
+            # Already closed.
+            pass
+
+    def clear_product_cache(self) -> None:
+        with self._cache_lock:
+            self._cache_generation += 1
+            self._product_cache.clear()
+
+    def cache_stats(self) -> dict[str, int]:
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self._product_cache),
+            "capacity": self._product_cache_size,
+        }
 
     def init_schema(self) -> None:
+        with self._write_lock:
+            self._init_schema()
+        with self.read_pool.connection() as connection:
+            self._catalog_change_id = _latest_catalog_change(connection)
+        self._next_catalog_poll = time.monotonic() + CATALOG_POLL_INTERVAL_S
+
+    def _init_schema(self) -> None:
+        if self._connection.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() is None:
+            # Free pages are only ever released with incremental_vacuum: a full
+            # VACUUM would renumber products' rowids under the search index.
+            # Switching modes needs a VACUUM, which is free on an empty file.
+            self._connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self._connection.execute("VACUUM")
+        migrate(self._connection)
         self._connection.execute(
             """
             CREATE TABLE IF NOT EXISTS products (
                 barcode TEXT PRIMARY KEY,
                 name TEXT NOT NULL,
-                price REAL NOT NULL CHECK(price > 0),
-                updated_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+                price_cents INTEGER NOT NULL CHECK(price_cents > 0),
+                updated_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+                stock INTEGER NOT NULL DEFAULT 0,
+                reorder_level INTEGER NOT NULL DEFAULT 0,
+                barcode_key TEXT NOT NULL,
+                category TEXT NOT NULL DEFAULT ''
             )
             """
         )
-        self._connection.commit()
-
-    def upsert_product(self, barcode: str, name: str, price: float) -> None:
+        # One product per GTIN however it was scanned; see barcodes.barcode_key.
         self._connection.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_products_barcode_key ON products(barcode_key)"
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sales (
+                id INTEGER PRIMARY KEY,
+                created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+                total_quantity INTEGER NOT NULL,
+                total_cents INTEGER NOT NULL,
+                lane_id TEXT NOT NULL DEFAULT '1',
+                discount_cents INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sale_items (
+                sale_id INTEGER NOT NULL REFERENCES sales(id),
+                line_no INTEGER NOT NULL,
+                barcode TEXT NOT NULL,
+                name TEXT NOT NULL,
+                price_cents INTEGER NOT NULL,
+                quantity INTEGER NOT NULL CHECK(quantity > 0),
+                PRIMARY KEY (sale_id, line_no)
+            ) WITHOUT ROWID
             """
-            INSERT INTO products(barcode, name, price, updated_at)
-            VALUES(?, ?, ?, datetime('now', 'localtime'))
-            ON CONFLICT(barcode) DO UPDATE SET
-                name = excluded.name,
-                price = excluded.price,
-                updated_at = datetime('now', 'localtime')
-            """,
-            (barcode, name, price),
         )
+        _init_catalog_changes(self._connection)
+        init_search_index(self._connection)
+        stock.init_stock_schema(self._connection)
+        history.init_history_schema(self._connection)
+        parked.init_parked_schema(self._connection)
+        promotions.init_promotion_schema(self._connection)
+        reports.init_report_schema(self._connection)
+        reports.apply_pending_rollups(self._connection)
         self._connection.commit()
 
-    def get_product_by_barcode(self, barcode: str) -> dict[str, Any] | None:
-        cursor = self._connection.execute(
-            "SELECT barcode, name, price FROM products WHERE barcode = ?",
-            (barcode,),
+    @timed("db.upsert_product")
+    def upsert_product(
+        self,
+        barcode: str,
+        name: str,
+        price_cents: int,
+        received: int = 0,
+        reorder_level: int | None = None,
+        category: str | None = None,
+    ) -> None:
+        def write(connection: sqlite3.Connection) -> None:
+            _upsert_products(connection, [(barcode, name, price_cents)])
+            if received:
+                stock.receive_stock(connection, barcode, received)
+            if reorder_level is not None:
+                stock.set_reorder_level(connection, barcode, reorder_level)
+            if category is not None:
+                promotions.set_category(connection, barcode, category)
+
+        self._run_write(write)
+        self._invalidate_products([barcode])
+
+    def upsert_products(self, products: Iterable[tuple[str, str, int]]) -> int:
+        rows = list(products)
+        self._run_write(lambda connection: _upsert_products(connection, rows))
+        self._invalidate_products(barcode for barcode, _, _ in rows)
+        return len(rows)
+
+    def iter_products(self, batch_size: int = 1000) -> Iterator[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            cursor = connection.execute(
+                "SELECT barcode, name, price_cents FROM products ORDER BY barcode"
+            )
+            while batch := cursor.fetchmany(batch_size):
+                for row in batch:
+                    yield dict(row)
+
+    def record_sale(
+        self, items: Sequence[SaleLine], discounts: Sequence[tuple[int, str, int]] = ()
+    ) -> int:
+        # `discounts` are (promotion id, name, amount) as PricingEngine.applied()
+        # gives them; total_cents is what was paid, after discounts.
+        if not items:
+            raise ValueError("cannot record an empty sale")
+
+        total_quantity = sum(item.quantity for item in items)
+        discount_cents = sum(amount for _, _, amount in discounts)
+        total_cents = sum(item.price_cents * item.quantity for item in items) - discount_cents
+        if discount_cents < 0 or total_cents < 0:
+            raise ValueError("discounts must be between zero and the sale total")
+        lines = [
+            (line_no, item.barcode, item.name, item.price_cents, item.quantity)
+            for line_no, item in enumerate(items, start=1)
+        ]
+
+        def write(connection: sqlite3.Connection) -> int:
+            cursor = connection.execute(
+                """
+                INSERT INTO sales(total_quantity, total_cents, lane_id, discount_cents)
+                VALUES (?, ?, ?, ?)
+                """,
+                (total_quantity, total_cents, self.lane_id, discount_cents),
+            )
+            sale_id = int(cursor.lastrowid)
+            connection.executemany(
+                """
+                INSERT INTO sale_items(sale_id, line_no, barcode, name, price_cents, quantity)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [(sale_id, *line) for line in lines],
+            )
+            if discounts:
+                promotions.record_sale_discounts(connection, sale_id, discounts)
+            stock.deduct_sale(connection, sale_id)
+            reports.apply_pending_rollups(connection)
+            return sale_id
+
+        return self._run_write(write)
+
+    def park_cart(self, items: Sequence[SaleLine]) -> int:
+        if not items:
+            raise ValueError("cannot park an empty cart")
+        cart = [
+            CartItem(item.barcode, item.name, item.price_cents, item.quantity) for item in items
+        ]
+        return self._run_write(lambda connection: parked.park_cart(connection, self.lane_id, cart))
+
+    def parked_carts(self) -> list[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            return parked.parked_carts(connection, self.lane_id)
+
+    def parked_cart_items(self, parked_id: int) -> list[CartItem] | None:
+        with self.read_pool.connection() as connection:
+            return parked.parked_cart_items(connection, parked_id)
+
+    def delete_parked_cart(self, parked_id: int) -> bool:
+        return self._run_write(lambda connection: parked.delete_parked_cart(connection, parked_id))
+
+    def promotions_for(self, barcodes: Sequence[str]) -> dict[str, list[promotions.Promotion]]:
+        with self.read_pool.connection() as connection:
+            return promotions.promotions_for(connection, barcodes, time.strftime("%Y-%m-%d"))
+
+    def add_promotion(
+        self,
+        name: str,
+        kind: str,
+        amount_cents: int,
+        threshold: int = 0,
+        barcode: str | None = None,
+        category: str | None = None,
+        starts_on: str | None = None,
+        ends_on: str | None = None,
+    ) -> int:
+        return self._run_write(
+            lambda connection: promotions.add_promotion(
+                connection,
+                name,
+                kind,
+                amount_cents,
+                threshold,
+                barcode,
+                category,
+                starts_on,
+                ends_on,
+            )
+        )
+
+    def delete_promotion(self, promotion_id: int) -> bool:
+        return self._run_write(
+            lambda connection: promotions.delete_promotion(connection, promotion_id)
         )
-        row = cursor.fetchone()
-        return dict(row) if row else None
 
-    def search_products(self, query: str, limit: int = 20) -> list[dict[str, Any]]:
-        q = query.strip()
-        if not q:
-            cursor = self._connection.execute(
+    def list_promotions(self) -> list[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            return promotions.list_promotions(connection)
+
+    def product_category(self, barcode: str) -> str | None:
+        with self.read_pool.connection() as connection:
+            return promotions.product_category(connection, barcode)
+
+    def sale_discounts(self, sale_id: int) -> list[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            return promotions.sale_discounts(connection, sale_id)
+
+    def stock_level(self, barcode: str) -> dict[str, Any] | None:
+        with self.read_pool.connection() as connection:
+            return stock.stock_level(connection, barcode)
+
+    def low_stock_products(self, limit: int = 200) -> list[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            return stock.low_stock_products(connection, limit)
+
+    def sales_page(
+        self,
+        sale_filter: history.SaleFilter,
+        after: history.SaleCursor | None = None,
+        limit: int = 200,
+    ) -> list[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            return history.sales_page(connection, sale_filter, after, limit)
+
+    def sale_lines(self, sale_id: int) -> list[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            return history.sale_lines(connection, sale_id)
+
+    def daily_report(self, start_day: str, end_day: str) -> list[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            return reports.daily_report(connection, start_day, end_day)
+
+    def hourly_report(self, day: str) -> list[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            return reports.hourly_report(connection, day)
+
+    def product_report(
+        self, start_day: str | None = None, end_day: str | None = None, limit: int = 50
+    ) -> list[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            return reports.product_report(connection, start_day, end_day, limit)
+
+    def rebuild_reports(self) -> int:
+        return self._run_write(reports.rebuild_rollups)
+
+    def optimize(self) -> None:
+        def write(connection: sqlite3.Connection) -> None:
+            connection.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            connection.execute("ANALYZE")
+            connection.execute("PRAGMA optimize")
+
+        self._run_write(write)
+
+    def incremental_vacuum(self, pages: int) -> int:
+        # Returns the number of free pages given back; 0 once there are none
+        # left or when the database was not created with auto_vacuum.
+        def write(connection: sqlite3.Connection) -> int:
+            before = connection.execute("PRAGMA freelist_count").fetchone()[0]
+            connection.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            return before - connection.execute("PRAGMA freelist_count").fetchone()[0]
+
+        return self._run_write(write)
+
+    def _run_write(self, write: Callable[[sqlite3.Connection], T]) -> T:
+        # The busy timeout covers ordinary contention between lanes; this retries
+        # what is left (a lane holding the lock for longer than the timeout).
+        attempt = 0
+        while True:
+            try:
+                with self._write_lock, self._connection:
+                    return write(self._connection)
+            except sqlite3.OperationalError as exc:
+                if attempt >= self.settings.write_retries or not is_busy_error(exc):
+                    raise
+            attempt += 1
+            self.write_retries += 1
+            backoff_s = self.settings.retry_backoff_ms / 1000 * 2 ** (attempt - 1)
+            time.sleep(backoff_s * random.uniform(0.5, 1.5))
+
+    @timed("db.get_product_by_barcode")
+    def get_product_by_barcode(self, barcode: str) -> dict[str, Any] | None:
+        if time.monotonic() >= self._next_catalog_poll:
+            self.poll_catalog_changes()
+        key = barcode_key(barcode)
+        with self._cache_lock:
+            cached = self._product_cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                self.cache_hits += 1
+                self._product_cache.move_to_end(key)
+                return dict(cached) if cached is not None else None
+            self.cache_misses += 1
+            generation = self._cache_generation
+
+        with self.read_pool.connection() as connection:
+            row = connection.execute(
+                "SELECT barcode, name, price_cents FROM products WHERE barcode_key = ?",
+                (key,),
+            ).fetchone()
+        product = dict(row) if row else None
+        with self._cache_lock:
+            # A write that landed while we were reading may have made `row` stale.
+            if generation == self._cache_generation:
+                self._remember_product(key, product)
+        return dict(product) if product is not None else None
+
+    @timed("db.get_products_by_barcodes")
+    def get_products_by_barcodes(self, barcodes: Iterable[str]) -> dict[str, dict[str, Any]]:
+        # Bulk get_product_by_barcode: cached products are served from the cache
+        # and the rest fetched with one IN (...) query per LOOKUP_CHUNK_SIZE keys.
+        # Maps each barcode as given to its product; unknown barcodes are left out.
+        if time.monotonic() >= self._next_catalog_poll:
+            self.poll_catalog_changes()
+        keys = {barcode: barcode_key(barcode) for barcode in barcodes}
+        products: dict[str, dict[str, Any] | None] = {}
+        missing: list[str] = []
+        with self._cache_lock:
+            for key in dict.fromkeys(keys.values()):
+                cached = self._product_cache.get(key, _MISSING)
+                if cached is _MISSING:
+                    missing.append(key)
+                else:
+                    self._product_cache.move_to_end(key)
+                    products[key] = cached
+            self.cache_hits += len(products)
+            self.cache_misses += len(missing)
+            generation = self._cache_generation
+
+        if missing:
+            fetched: dict[str, dict[str, Any] | None] = dict.fromkeys(missing)
+            with self.read_pool.connection() as connection:
+                for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+                    chunk = missing[start : start + LOOKUP_CHUNK_SIZE]
+                    rows = connection.execute(
+                        f"""
+                        SELECT barcode_key, barcode, name, price_cents
+                        FROM products
+                        WHERE barcode_key IN ({", ".join("?" * len(chunk))})
+                        """,
+                        chunk,
+                    )
+                    for key, barcode, name, price_cents in rows:
+                        fetched[key] = {"barcode": barcode, "name": name, "price_cents": price_cents}
+            with self._cache_lock:
+                if generation == self._cache_generation:
+                    for key, product in fetched.items():
+                        self._remember_product(key, product)
+            products.update(fetched)
+
+        found: dict[str, dict[str, Any]] = {}
+        for barcode, key in keys.items():
+            product = products[key]
+            if product is not None:
+                found[barcode] = dict(product)
+        return found
+
+    def poll_catalog_changes(self) -> int:
+        # Drops cached products that another lane (or process) has changed.
+        self._next_catalog_poll = time.monotonic() + CATALOG_POLL_INTERVAL_S
+        with self.read_pool.connection() as connection:
+            latest = _latest_catalog_change(connection)
+            seen = self._catalog_change_id
+            if latest <= seen:
+                return 0
+            if latest - seen > min(CATALOG_CHANGES_KEEP, self._product_cache_size):
+                self._catalog_change_id = latest
+                self.clear_product_cache()
+                return latest - seen
+            barcodes = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT barcode FROM catalog_changes WHERE id > ? AND id <= ?",
+                    (seen, latest),
+                )
+            ]
+        self._catalog_change_id = latest
+        self._invalidate_products(barcodes)
+        return len(barcodes)
+
+    def _invalidate_products(self, barcodes: Iterable[str]) -> None:
+        with self._cache_lock:
+            self._cache_generation += 1
+            for barcode in barcodes:
+                self._product_cache.pop(barcode_key(barcode), None)
+
+    def _remember_product(self, key: str, product: dict[str, Any] | None) -> None:
+        if self._product_cache_size == 0:
+            return
+        self._product_cache[key] = product
+        self._product_cache.move_to_end(key)
+        while len(self._product_cache) > self._product_cache_size:
+            self._product_cache.popitem(last=False)
+
+    def search_products(
+        self, query: str, limit: int = 20, offset: int = 0
+    ) -> list[dict[str, Any]]:
+        with self.read_pool.connection() as connection:
+            return search_products(connection, query, limit, offset)
+
+    def warm_up(self, limit: int | None = None) -> int:
+        # Preloads the best sellers and most recently updated products into the
+        # product cache and pages in the indexes behind the first suggestions.
+        limit = self._product_cache_size if limit is None else min(limit, self._product_cache_size)
+        if limit == 0:
+            return 0
+        with self.read_pool.connection() as connection:
+            with self._cache_lock:
+                generation = self._cache_generation
+            recent = connection.execute(
                 """
-                SELECT barcode, name, price
-                FROM products
+                SELECT barcode, name, price_cents
+                FROM products INDEXED BY idx_products_updated_at
                 ORDER BY updated_at DESC
                 LIMIT ?
                 """,
                 (limit,),
-            )
-            return [dict(row) for row in cursor.fetchall()]
+            ).fetchall()
+            best_sellers = connection.execute(
+                """
+                SELECT products.barcode, products.name, products.price_cents
+                FROM report_sku INDEXED BY idx_report_sku_revenue
+                JOIN products ON products.barcode = report_sku.barcode
+                ORDER BY report_sku.revenue_cents DESC
+                LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+            search_products(connection, "")
+
+        # Best sellers go in last so they are the last to be evicted.
+        with self._cache_lock:
+            if generation != self._cache_generation:
+                return 0
+            for row in [*reversed(recent), *reversed(best_sellers)]:
+                self._remember_product(barcode_key(row["barcode"]), dict(row))
+            return len(self._product_cache)
+
 
-        cursor = self._connection.execute(
+def _init_catalog_changes(connection: sqlite3.Connection) -> None:
+    # Every product write, from any lane or tool, leaves a row here so other
+    # lanes can tell which cached products went stale.
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_changes (
+            id INTEGER PRIMARY KEY,
+            barcode TEXT NOT NULL
+        )
+        """
+    )
+    # Stock and reorder levels are not cached, so only name and price updates count.
+    for name, event, row in (
+        ("insert", "INSERT", "new"),
+        ("update", "UPDATE OF barcode, name, price_cents", "new"),
+        ("delete", "DELETE", "old"),
+    ):
+        connection.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS products_changes_{name}
+            AFTER {event} ON products BEGIN
+                INSERT INTO catalog_changes(barcode) VALUES ({row}.barcode);
+            END
             """
-            SELECT barcode, name, price
-            FROM products
-            WHERE barcode LIKE ? OR name LIKE ?
-            ORDER BY
-                CASE WHEN barcode LIKE ? THEN 0 ELSE 1 END,
-                updated_at DESC
-            LIMIT ?
-            """,
-            (f"{q}%", f"%{q}%", f"{q}%", limit),
         )
-        return [dict(row) for row in cursor.fetchall()]
+
+
+def _upsert_products(connection: sqlite3.Connection, rows: list[tuple[str, str, int]]) -> None:
+    # Another spelling of a product already on file updates that product and
+    # keeps its stored barcode.
+    connection.executemany(
+        """
+        INSERT INTO products(barcode, name, price_cents, updated_at, barcode_key)
+        VALUES(?, ?, ?, datetime('now', 'localtime'), ?)
+        ON CONFLICT(barcode_key) DO UPDATE SET
+            name = excluded.name,
+            price_cents = excluded.price_cents,
+            updated_at = datetime('now', 'localtime')
+        """,
+        [
+            (clean_barcode(barcode), name, price_cents, barcode_key(barcode))
+            for barcode, name, price_cents in rows
+        ],
+    )
+    _prune_catalog_changes(connection)
+
+
+def _latest_catalog_change(connection: sqlite3.Connection) -> int:
+    return connection.execute("SELECT max(id) FROM catalog_changes").fetchone()[0] or 0
+
+
+def _prune_catalog_changes(connection: sqlite3.Connection) -> None:
+    connection.execute(
+        "DELETE FROM catalog_changes WHERE id <= (SELECT max(id) FROM catalog_changes) - ?",
+        (CATALOG_CHANGES_KEEP,),
+    )
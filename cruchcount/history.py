@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+from cruchcount.barcodes import barcode_key, clean_barcode
+
+# Below this many matching sales a barcode or amount filter drives the query.
+SPARSE_MATCH_LIMIT = 2000
+
+# Position of the last row of a page: (created_at, id). The next page starts
+# strictly after it in (created_at DESC, id DESC) order.
+SaleCursor = tuple[str, int]
+
+
+@dataclass(frozen=True)
+class SaleFilter:
+    start_day: str | None = None
+    end_day: str | None = None
+    min_cents: int | None = None
+    max_cents: int | None = None
+    barcode: str | None = None
+    lane_id: str | None = None
+
+
+def init_history_schema(connection: sqlite3.Connection) -> None:
+    # idx_sales_created_at ends in the rowid, so it hands rows out already in
+    # (created_at, id) order: pages are index range scans that stop at LIMIT.
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_sales_created_at ON sales(created_at)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_sales_total ON sales(total_cents)")
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sale_items_barcode ON sale_items(barcode, sale_id)"
+    )
+
+
+def sales_page(
+    connection: sqlite3.Connection,
+    sale_filter: SaleFilter,
+    after: SaleCursor | None = None,
+    limit: int = 200,
+) -> list[dict[str, Any]]:
+    conditions: list[str] = []
+    params: list[Any] = []
+    if after is not None:
+        conditions.append("(created_at, id) < (?, ?)")
+        params.extend(after)
+    if sale_filter.start_day:
+        conditions.append("created_at >= ?")
+        params.append(sale_filter.start_day)
+    if sale_filter.end_day:
+        conditions.append("created_at < ?")
+        params.append(_next_day(sale_filter.end_day))
+    if sale_filter.lane_id:
+        conditions.append("lane_id = ?")
+        params.append(sale_filter.lane_id)
+
+    # Walking idx_sales_created_at and stopping at LIMIT is cheapest unless a
+    # barcode or amount filter matches so few sales that most of the walk
+    # would be wasted; then the rows come from that filter's index and only
+    # those few are sorted.
+    source = "sales INDEXED BY idx_sales_created_at"
+    amount = _amount_condition(sale_filter)
+    if amount is not None:
+        conditions.append(amount[0])
+        params.extend(amount[1])
+    if sale_filter.barcode:
+        barcode = _sold_barcode(connection, sale_filter.barcode)
+        if _is_sparse(
+            connection,
+            "sale_items INDEXED BY idx_sale_items_barcode WHERE barcode = ?",
+            (barcode,),
+        ):
+            source = "sales"
+            conditions.append(
+                "id IN (SELECT sale_id FROM sale_items INDEXED BY idx_sale_items_barcode"
+                " WHERE barcode = ?)"
+            )
+        else:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM sale_items WHERE sale_id = sales.id AND barcode = ?)"
+            )
+        params.append(barcode)
+    elif amount is not None and _is_sparse(
+        connection, f"sales INDEXED BY idx_sales_total WHERE {amount[0]}", amount[1]
+    ):
+        source = "sales INDEXED BY idx_sales_total"
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cursor = connection.execute(
+        f"""
+        SELECT id, created_at, lane_id, total_quantity, total_cents, discount_cents
+        FROM {source}
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+        """,
+        (*params, limit),
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def sale_lines(connection: sqlite3.Connection, sale_id: int) -> list[dict[str, Any]]:
+    cursor = connection.execute(
+        """
+        SELECT line_no, barcode, name, price_cents, quantity
+        FROM sale_items
+        WHERE sale_id = ?
+        ORDER BY line_no
+        """,
+        (sale_id,),
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def _sold_barcode(connection: sqlite3.Connection, barcode: str) -> str:
+    # Sale lines carry the product's stored barcode, whichever variant was scanned.
+    row = connection.execute(
+        "SELECT barcode FROM products WHERE barcode_key = ?", (barcode_key(barcode),)
+    ).fetchone()
+    return row[0] if row else clean_barcode(barcode)
+
+
+def _amount_condition(sale_filter: SaleFilter) -> tuple[str, tuple[int, ...]] | None:
+    if sale_filter.min_cents is not None and sale_filter.max_cents is not None:
+        return "total_cents BETWEEN ? AND ?", (sale_filter.min_cents, sale_filter.max_cents)
+    if sale_filter.min_cents is not None:
+        return "total_cents >= ?", (sale_filter.min_cents,)
+    if sale_filter.max_cents is not None:
+        return "total_cents <= ?", (sale_filter.max_cents,)
+    return None
+
+
+def _is_sparse(connection: sqlite3.Connection, source: str, params: tuple[Any, ...]) -> bool:
+    matches = connection.execute(
+        f"SELECT count(*) FROM (SELECT 1 FROM {source} LIMIT ?)",
+        (*params, SPARSE_MATCH_LIMIT),
+    ).fetchone()[0]
+    return matches < SPARSE_MATCH_LIMIT
+
+
+def _next_day(day: str) -> str:
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import time
+from array import array
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+DIAGNOSTICS_ENV = "CRUCHCOUNT_DIAGNOSTICS"
+DEFAULT_CAPACITY = 2048
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class RingBuffer:
+    __slots__ = ("capacity", "total_calls", "_samples", "_next")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.capacity = capacity
+        self.total_calls = 0
+        self._samples = array("d", bytes(8 * capacity))
+        self._next = 0
+
+    def append(self, value_ms: float) -> None:
+        self._samples[self._next] = value_ms
+        self._next = (self._next + 1) % self.capacity
+        self.total_calls += 1
+
+    def values(self) -> list[float]:
+        if self.total_calls >= self.capacity:
+            return list(self._samples[self._next :]) + list(self._samples[: self._next])
+        return list(self._samples[: self._next])
+
+    def clear(self) -> None:
+        self.total_calls = 0
+        self._next = 0
+
+    def summary(self) -> dict[str, float]:
+        samples = sorted(self.values())
+        if not samples:
+            return {"calls": 0, "window": 0}
+
+        def percentile(fraction: float) -> float:
+            return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+        return {
+            "calls": self.total_calls,
+            "window": len(samples),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": samples[-1],
+            "mean_ms": sum(samples) / len(samples),
+        }
+
+
+class Instrumentation:
+    def __init__(self, enabled: bool = False, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.enabled = enabled
+        self.capacity = capacity
+        self.buffers: dict[str, RingBuffer] = {}
+
+    def buffer(self, name: str) -> RingBuffer:
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            buffer = self.buffers[name] = RingBuffer(self.capacity)
+        return buffer
+
+    def record(self, name: str, value_ms: float) -> None:
+        self.buffer(name).append(value_ms)
+
+    def reset(self) -> None:
+        for buffer in self.buffers.values():
+            buffer.clear()
+
+    def summaries(self) -> dict[str, dict[str, float]]:
+        return {name: buffer.summary() for name, buffer in sorted(self.buffers.items())}
+
+    def dump_json(self, path: Path, extra: dict[str, Any] | None = None) -> None:
+        payload = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "enabled": self.enabled,
+            "timings": self.summaries(),
+            **(extra or {}),
+        }
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+instrumentation = Instrumentation(
+    enabled=os.environ.get(DIAGNOSTICS_ENV, "").strip().lower() in {"1", "true", "yes"}
+)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    def decorate(func: F) -> F:
+        buffer = instrumentation.buffer(name)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                buffer.append((time.perf_counter() - started) * 1000)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from cruchcount.cart import CartItem
+
+JOURNAL_SUFFIX = ".cart.jsonl"
+# How long the writer waits for more records before paying for one fsync.
+DEFAULT_GROUP_COMMIT_S = 0.02
+
+
+def journal_path_for(database_path: Path, lane_id: str) -> Path:
+    # One journal per lane: registers sharing a database each keep their own cart.
+    return database_path.with_name(f"{database_path.stem}.lane-{lane_id}{JOURNAL_SUFFIX}")
+
+
+def add_op(item: CartItem, quantity: int) -> dict[str, Any]:
+    return {
+        "op": "add",
+        "barcode": item.barcode,
+        "name": item.name,
+        "price_cents": item.price_cents,
+        "quantity": quantity,
+    }
+
+
+def set_op(barcode: str, quantity: int) -> dict[str, Any]:
+    return {"op": "set", "barcode": barcode, "quantity": quantity}
+
+
+def remove_op(barcode: str) -> dict[str, Any]:
+    return {"op": "remove", "barcode": barcode}
+
+
+def replay(path: Path) -> list[CartItem]:
+    items: dict[str, CartItem] = {}
+    try:
+        handle = path.open("rb")
+    except FileNotFoundError:
+        return []
+    with handle:
+        for raw in handle:
+            try:
+                record = json.loads(raw)
+                op = record["op"]
+                if op == "add":
+                    item = items.get(record["barcode"])
+                    if item is None:
+                        item = items[record["barcode"]] = CartItem(
+                            barcode=str(record["barcode"]),
+                            name=str(record["name"]),
+                            price_cents=int(record["price_cents"]),
+                            quantity=0,
+                        )
+                    item.quantity += int(record["quantity"])
+                elif op == "set" and record["barcode"] in items:
+                    items[record["barcode"]].quantity = int(record["quantity"])
+                elif op == "remove":
+                    items.pop(record["barcode"], None)
+            except (ValueError, KeyError, TypeError):
+                # A crash can leave a torn last line; skip anything unreadable.
+                continue
+    return [item for item in items.values() if item.quantity > 0 and item.price_cents > 0]
+
+
+class CartJournal:
+    # Append-only log of cart operations. append() only queues the record; a
+    # background thread writes everything queued so far with a single fsync.
+    def __init__(self, path: Path, group_commit_s: float = DEFAULT_GROUP_COMMIT_S) -> None:
+        self.path = path
+        self._group_commit_s = group_commit_s
+        self._pending: list[bytes] = []
+        self._appended = 0
+        self._durable = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._io_lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("ab")
+        self._thread = threading.Thread(target=self._run, name="cart-journal", daemon=True)
+        self._thread.start()
+
+    def append(self, record: dict[str, Any]) -> None:
+        line = _encode(record)
+        with self._condition:
+            if self._closed:
+                return
+            self._pending.append(line)
+            self._appended += 1
+            if len(self._pending) == 1:
+                self._condition.notify_all()
+
+    def flush(self) -> None:
+        with self._condition:
+            target = self._appended
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: self._durable >= target or self._closed)
+
+    def compact(self, items: Iterable[CartItem] = ()) -> None:
+        # Rewrites the journal as a snapshot of `items`, superseding anything queued.
+        lines = [_encode(add_op(item, item.quantity)) for item in items]
+        with self._io_lock:
+            with self._condition:
+                self._pending.clear()
+                self._durable = self._appended
+                self._condition.notify_all()
+            self._file.close()
+            temporary = self.path.with_name(self.path.name + ".tmp")
+            with temporary.open("wb") as handle:
+                handle.writelines(lines)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temporary, self.path)
+            self._file = self.path.open("ab")
+
+    def close(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        with self._io_lock:
+            self._file.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending and self._closed:
+                    return
+                if not self._closed:
+                    # Let a burst of scans pile up so they share one fsync.
+                    self._condition.wait(self._group_commit_s)
+            with self._io_lock:
+                with self._condition:
+                    batch, self._pending = self._pending, []
+                    target = self._appended
+                if batch:
+                    self._file.writelines(batch)
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+            with self._condition:
+                self._durable = max(self._durable, target)
+                self._condition.notify_all()
+
+
+def _encode(record: dict[str, Any]) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
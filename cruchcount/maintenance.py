@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+from cruchcount.connection import connect_read_only
+from cruchcount.db import Database
+
+SETTINGS_ENV_PREFIX = "CRUCHCOUNT_MAINTENANCE_"
+BACKUP_DIR_NAME = "backups"
+BACKUP_SUFFIX = ".db"
+_TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+
+class MaintenanceCancelled(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class MaintenanceSettings:
+    # 0 disables the scheduled backup; manual backups still work.
+    backup_interval_s: int = 6 * 3600
+    backup_keep: int = 7
+    maintenance_interval_s: int = 6 * 3600
+    # How long the register has to be quiet before anything runs.
+    idle_after_s: int = 30
+    backup_pages_per_step: int = 256
+    vacuum_pages_per_step: int = 256
+    step_pause_ms: int = 20
+
+    def __post_init__(self) -> None:
+        if self.backup_keep < 1:
+            raise ValueError("backup_keep must be at least 1")
+        if self.backup_pages_per_step < 1 or self.vacuum_pages_per_step < 1:
+            raise ValueError("pages per step must be at least 1")
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] | None = None) -> MaintenanceSettings:
+        # e.g. CRUCHCOUNT_MAINTENANCE_BACKUP_KEEP=14
+        environ = os.environ if environ is None else environ
+        overrides: dict[str, int] = {}
+        for field in fields(cls):
+            raw = environ.get(SETTINGS_ENV_PREFIX + field.name.upper(), "").strip()
+            if raw:
+                overrides[field.name] = int(raw)
+        return cls(**overrides)
+
+
+def backup_dir_for(database_path: Path) -> Path:
+    return database_path.parent / BACKUP_DIR_NAME
+
+
+def list_backups(database_path: Path, backup_dir: Path | None = None) -> list[Path]:
+    # Oldest first; the timestamp in the name sorts chronologically.
+    backup_dir = backup_dir or backup_dir_for(database_path)
+    return sorted(backup_dir.glob(f"{database_path.stem}-*{BACKUP_SUFFIX}"))
+
+
+def backup_database(
+    database_path: Path,
+    backup_dir: Path | None = None,
+    pages_per_step: int = MaintenanceSettings.backup_pages_per_step,
+    between_steps: Callable[[], None] | None = None,
+) -> Path:
+    # Copies through SQLite's online backup API, a few pages per step, so the
+    # database stays usable throughout and the copy is never torn. The copy is
+    # written under a temporary name and renamed into place once complete.
+    # between_steps must not wait long: the source snapshot stays pinned
+    # meanwhile. To pause, it raises, which drops the copy and the snapshot.
+    backup_dir = backup_dir or backup_dir_for(database_path)
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime(_TIMESTAMP_FORMAT)
+    target_path = backup_dir / f"{database_path.stem}-{stamp}{BACKUP_SUFFIX}"
+    temporary = target_path.with_name(target_path.name + ".tmp")
+
+    source = connect_read_only(database_path)
+    target = sqlite3.connect(str(temporary))
+    try:
+        # One read transaction for the whole copy: every step reads the same
+        # WAL snapshot, so sales committed meanwhile (by this or another lane)
+        # do not make SQLite restart the backup from the first page. While it
+        # is held, checkpoints cannot pass it and the -wal file grows.
+        source.execute("BEGIN")
+        source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        source.backup(
+            target,
+            pages=pages_per_step,
+            progress=(lambda _status, _remaining, _total: between_steps())
+            if between_steps is not None
+            else None,
+            sleep=0,
+        )
+        target.execute("PRAGMA journal_mode = DELETE")
+        target.close()
+        os.replace(temporary, target_path)
+    except BaseException:
+        target.close()
+        temporary.unlink(missing_ok=True)
+        raise
+    finally:
+        source.close()
+    return target_path
+
+
+def rotate_backups(database_path: Path, keep: int, backup_dir: Path | None = None) -> list[Path]:
+    backups = list_backups(database_path, backup_dir)
+    removed = backups[:-keep] if keep > 0 else backups
+    for path in removed:
+        path.unlink(missing_ok=True)
+    return removed
+
+
+def verify_backup(backup_path: Path) -> str:
+    connection = sqlite3.connect(f"{backup_path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return connection.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def restore_database(backup_path: Path, database_path: Path) -> None:
+    # Writes the backup into the live file through the backup API rather than
+    # copying it over, so SQLite deals with any -wal/-shm files. Every other
+    # program using the database should be closed first.
+    result = verify_backup(backup_path)
+    if result != "ok":
+        raise sqlite3.DatabaseError(f"backup failed quick_check: {result}")
+    source = sqlite3.connect(f"{backup_path.resolve().as_uri()}?mode=ro", uri=True)
+    target = sqlite3.connect(str(database_path))
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def run_maintenance(
+    database: Database,
+    pages_per_step: int = MaintenanceSettings.vacuum_pages_per_step,
+    between_steps: Callable[[], None] | None = None,
+) -> int:
+    # Refreshes planner statistics and hands free pages back to the file
+    # system a few at a time. Returns the pages released.
+    database.optimize()
+    released = 0
+    while True:
+        if between_steps is not None:
+            between_steps()
+        step = database.incremental_vacuum(pages_per_step)
+        released += step
+        if step < pages_per_step:
+            return released
+
+
+class MaintenanceScheduler:
+    # Runs backups and maintenance on a background thread, only once the
+    # register has been quiet for idle_after_s, and stops between steps as
+    # soon as note_activity() reports a scan.
+    def __init__(
+        self,
+        database: Database,
+        settings: MaintenanceSettings | None = None,
+        backup_dir: Path | None = None,
+    ) -> None:
+        self.settings = settings or MaintenanceSettings.from_env()
+        self._database = database
+        self._backup_dir = backup_dir
+        self._condition = threading.Condition()
+        self._last_activity = time.monotonic()
+        self._next_maintenance = time.monotonic()
+        self._stopped = False
+        self.backups_written = 0
+        self.maintenance_runs = 0
+        self.last_error: str | None = None
+        self._thread = threading.Thread(target=self._run, name="maintenance", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def note_activity(self) -> None:
+        # Cheap enough to call on every scan: no notify, the worker notices
+        # the new timestamp the next time it checks between steps.
+        self._last_activity = time.monotonic()
+
+    def set_database(self, database: Database) -> None:
+        with self._condition:
+            self._database = database
+            self._last_activity = time.monotonic()
+            self._next_maintenance = time.monotonic()
+            self._condition.notify_all()
+
+    def backup_due(self) -> bool:
+        interval = self.settings.backup_interval_s
+        if interval <= 0:
+            return False
+        backups = list_backups(self._database.path, self._backup_dir)
+        return not backups or time.time() - backups[-1].stat().st_mtime >= interval
+
+    def _idle_for(self) -> float:
+        return time.monotonic() - self._last_activity
+
+    def _wait_until_idle(self) -> None:
+        # Called between steps: returns once the register is quiet again.
+        with self._condition:
+            while True:
+                if self._stopped:
+                    raise MaintenanceCancelled()
+                remaining = self.settings.idle_after_s - self._idle_for()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            pause = self.settings.step_pause_ms / 1000
+            if pause:
+                self._condition.wait(pause)
+            if self._stopped:
+                raise MaintenanceCancelled()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._wait_until_idle()
+                with self._condition:
+                    database = self._database
+                if self.backup_due():
+                    backup_database(
+                        database.path,
+                        self._backup_dir,
+                        self.settings.backup_pages_per_step,
+                        self._step_check(database, wait=False),
+                    )
+                    rotate_backups(database.path, self.settings.backup_keep, self._backup_dir)
+                    self.backups_written += 1
+                if time.monotonic() >= self._next_maintenance:
+                    run_maintenance(
+                        database, self.settings.vacuum_pages_per_step, self._step_check(database)
+                    )
+                    self.maintenance_runs += 1
+                    self._next_maintenance = (
+                        time.monotonic() + self.settings.maintenance_interval_s
+                    )
+            except MaintenanceCancelled:
+                if self._stopped:
+                    return
+                continue
+            except (OSError, sqlite3.Error) as exc:
+                self.last_error = str(exc)
+            with self._condition:
+                if self._stopped:
+                    return
+                self._condition.wait(self.settings.idle_after_s)
+
+    def _pause_if_idle(self) -> None:
+        # For steps that hold a read snapshot: rather than waiting a rush out
+        # with the snapshot pinned, give up; the task starts over from the
+        # beginning once the register is quiet again.
+        with self._condition:
+            if self._stopped or self._idle_for() < self.settings.idle_after_s:
+                raise MaintenanceCancelled()
+            pause = self.settings.step_pause_ms / 1000
+            if pause:
+                self._condition.wait(pause)
+            if self._stopped:
+                raise MaintenanceCancelled()
+
+    def _step_check(self, database: Database, wait: bool = True) -> Callable[[], None]:
+        def check() -> None:
+            if wait:
+                self._wait_until_idle()
+            else:
+                self._pause_if_idle()
+            if database is not self._database:
+                # Switched to another database mid-task; start over with it.
+                raise MaintenanceCancelled()
+
+        return check
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Callable
+
+from cruchcount.barcodes import barcode_key
+
+# PRAGMA user_version of a fully migrated database.
+SCHEMA_VERSION = 5
+
+
+def migrate(connection: sqlite3.Connection) -> None:
+    if _user_version(connection) >= SCHEMA_VERSION:
+        return
+
+    # IMMEDIATE so that two lanes starting together do not both migrate: the
+    # version is bumped in the same transaction, so the lane that gets the
+    # lock second finds the steps already done.
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        version = _user_version(connection)
+        for target, step in _STEPS:
+            if version < target:
+                step(connection)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+
+
+def _user_version(connection: sqlite3.Connection) -> int:
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _columns(connection: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+
+
+def _money_to_cents(connection: sqlite3.Connection) -> None:
+    # Version 1 stores money as integer cents. Old REAL prices are rounded once
+    # here; rowids are kept so the external-content search index stays valid.
+    product_columns = _columns(connection, "products")
+    sale_columns = _columns(connection, "sales")
+    if "price" not in product_columns and "total_amount" not in sale_columns:
+        return
+
+    if "price" in product_columns:
+        connection.execute("DROP INDEX IF EXISTS idx_products_updated_at")
+        connection.execute("DROP INDEX IF EXISTS idx_products_barcode_nocase")
+        connection.execute(
+            """
+            CREATE TABLE products_v1 (
+                barcode TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                price_cents INTEGER NOT NULL CHECK(price_cents > 0),
+                updated_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+            )
+            """
+        )
+        connection.execute(
+            """
+            INSERT INTO products_v1(rowid, barcode, name, price_cents, updated_at)
+            SELECT rowid, barcode, name, max(1, CAST(round(price * 100) AS INTEGER)), updated_at
+            FROM products
+            """
+        )
+        connection.execute("DROP TABLE products")
+        connection.execute("ALTER TABLE products_v1 RENAME TO products")
+
+    if "total_amount" in sale_columns:
+        connection.execute(
+            """
+            CREATE TABLE sales_v1 (
+                id INTEGER PRIMARY KEY,
+                created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+                total_quantity INTEGER NOT NULL,
+                total_cents INTEGER NOT NULL
+            )
+            """
+        )
+        connection.execute(
+            """
+            INSERT INTO sales_v1(id, created_at, total_quantity, total_cents)
+            SELECT id, created_at, total_quantity, CAST(round(total_amount * 100) AS INTEGER)
+            FROM sales
+            """
+        )
+        connection.execute(
+            """
+            CREATE TABLE sale_items_v1 (
+                sale_id INTEGER NOT NULL REFERENCES sales(id),
+                line_no INTEGER NOT NULL,
+                barcode TEXT NOT NULL,
+                name TEXT NOT NULL,
+                price_cents INTEGER NOT NULL,
+                quantity INTEGER NOT NULL CHECK(quantity > 0),
+                PRIMARY KEY (sale_id, line_no)
+            ) WITHOUT ROWID
+            """
+        )
+        connection.execute(
+            """
+            INSERT INTO sale_items_v1(sale_id, line_no, barcode, name, price_cents, quantity)
+            SELECT sale_id, line_no, barcode, name, CAST(round(price * 100) AS INTEGER), quantity
+            FROM sale_items
+            """
+        )
+        connection.execute("DROP TABLE sale_items")
+        connection.execute("DROP TABLE sales")
+        connection.execute("ALTER TABLE sales_v1 RENAME TO sales")
+        connection.execute("ALTER TABLE sale_items_v1 RENAME TO sale_items")
+
+    for table in (
+        "report_daily",
+        "report_hourly",
+        "report_daily_sku",
+        "report_sku",
+        "report_state",
+    ):
+        connection.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def _sale_lanes(connection: sqlite3.Connection) -> None:
+    # Version 2 records which register (lane) rang up each sale.
+    sale_columns = _columns(connection, "sales")
+    if sale_columns and "lane_id" not in sale_columns:
+        connection.execute("ALTER TABLE sales ADD COLUMN lane_id TEXT NOT NULL DEFAULT '1'")
+
+
+def _stock_levels(connection: sqlite3.Connection) -> None:
+    # Version 3 keeps a quantity on hand and a reorder level per product. The
+    # catalog change trigger is recreated so stock movements do not count as
+    # catalog edits that every lane has to drop from its cache.
+    product_columns = _columns(connection, "products")
+    if product_columns and "stock" not in product_columns:
+        connection.execute("ALTER TABLE products ADD COLUMN stock INTEGER NOT NULL DEFAULT 0")
+        connection.execute(
+            "ALTER TABLE products ADD COLUMN reorder_level INTEGER NOT NULL DEFAULT 0"
+        )
+    connection.execute("DROP TRIGGER IF EXISTS products_changes_update")
+
+
+def _barcode_keys(connection: sqlite3.Connection) -> None:
+    # Version 4 looks products up by a canonical barcode key, unique per
+    # product. Rows that turn out to be spellings of the same GTIN are folded
+    # into the most recently updated one: stock is added up, the highest
+    # reorder level kept, and past sales move over to the surviving barcode.
+    # Rows are deleted (never rebuilt), so rowids and the search index hold.
+    product_columns = _columns(connection, "products")
+    if not product_columns or "barcode_key" in product_columns:
+        return
+    # SQLite wants a default to add a NOT NULL column; every row gets its key below.
+    connection.execute("ALTER TABLE products ADD COLUMN barcode_key TEXT NOT NULL DEFAULT ''")
+
+    groups: dict[str, list[tuple[int, str]]] = {}
+    for rowid, barcode in connection.execute(
+        "SELECT rowid, barcode FROM products ORDER BY updated_at DESC, rowid DESC"
+    ):
+        groups.setdefault(barcode_key(barcode), []).append((rowid, barcode))
+    connection.executemany(
+        "UPDATE products SET barcode_key = ? WHERE rowid = ?",
+        [(key, members[0][0]) for key, members in groups.items()],
+    )
+
+    duplicates = [members for members in groups.values() if len(members) > 1]
+    # A catalog that has never rung up a sale may not have sale_items yet.
+    has_sales = bool(_columns(connection, "sale_items"))
+    for (keep_rowid, keep_barcode), *folded in duplicates:
+        for rowid, barcode in folded:
+            connection.execute(
+                """
+                UPDATE products SET
+                    stock = products.stock + old.stock,
+                    reorder_level = max(products.reorder_level, old.reorder_level)
+                FROM (SELECT stock, reorder_level FROM products WHERE rowid = ?) AS old
+                WHERE products.rowid = ?
+                """,
+                (rowid, keep_rowid),
+            )
+            if has_sales:
+                connection.execute(
+                    "UPDATE sale_items SET barcode = ? WHERE barcode = ?", (keep_barcode, barcode)
+                )
+            connection.execute("DELETE FROM products WHERE rowid = ?", (rowid,))
+    if duplicates:
+        # Per-product rollups still name the folded barcodes; all rollups are
+        # rebuilt from the sales tables on startup.
+        for table in (
+            "report_daily",
+            "report_hourly",
+            "report_daily_sku",
+            "report_sku",
+            "report_state",
+        ):
+            connection.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def _promotions(connection: sqlite3.Connection) -> None:
+    # Version 5 prices carts with promotions: products get a category that
+    # promotions can target, and sales keep the discount they were given
+    # (total_cents stays what was paid).
+    product_columns = _columns(connection, "products")
+    if product_columns and "category" not in product_columns:
+        connection.execute("ALTER TABLE products ADD COLUMN category TEXT NOT NULL DEFAULT ''")
+    sale_columns = _columns(connection, "sales")
+    if sale_columns and "discount_cents" not in sale_columns:
+        connection.execute(
+            "ALTER TABLE sales ADD COLUMN discount_cents INTEGER NOT NULL DEFAULT 0"
+        )
+    # Earlier sales had no discounts, so existing daily rollups stay right at 0.
+    report_columns = _columns(connection, "report_daily")
+    if report_columns and "discount_cents" not in report_columns:
+        connection.execute(
+            "ALTER TABLE report_daily ADD COLUMN discount_cents INTEGER NOT NULL DEFAULT 0"
+        )
+
+
+_STEPS: tuple[tuple[int, Callable[[sqlite3.Connection], None]], ...] = (
+    (1, _money_to_cents),
+    (2, _sale_lanes),
+    (3, _stock_levels),
+    (4, _barcode_keys),
+    (5, _promotions),
+)
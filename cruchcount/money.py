@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+_CENT = Decimal("0.01")
+
+
+def to_cents(value: float | int | str | Decimal) -> int:
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation as exc:
+        raise ValueError(f"invalid amount: {value!r}") from exc
+    if not amount.is_finite():
+        raise ValueError(f"invalid amount: {value!r}")
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def cents_to_text(cents: int) -> str:
+    sign = "-" if cents < 0 else ""
+    whole, fraction = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{fraction:02d}"
+
+
+def format_cents(cents: int) -> str:
+    return f"¥{cents_to_text(cents)}"
+
+
+def cents_to_float(cents: int) -> float:
+    return cents / 100
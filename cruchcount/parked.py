@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import zlib
+from collections.abc import Sequence
+from typing import Any
+
+from cruchcount.cart import CartItem
+
+
+def init_parked_schema(connection: sqlite3.Connection) -> None:
+    # One row per suspended cart. The items travel as a compressed payload that
+    # keeps each line's name and price, so resuming never looks products up.
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS parked_carts (
+            id INTEGER PRIMARY KEY,
+            lane_id TEXT NOT NULL,
+            parked_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            line_count INTEGER NOT NULL,
+            total_quantity INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            payload BLOB NOT NULL
+        )
+        """
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_parked_carts_lane ON parked_carts(lane_id, id)"
+    )
+
+
+def encode_cart(items: Sequence[CartItem]) -> bytes:
+    lines = [[item.barcode, item.name, item.price_cents, item.quantity] for item in items]
+    return zlib.compress(
+        json.dumps(lines, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    )
+
+
+def decode_cart(payload: bytes) -> list[CartItem]:
+    return [
+        CartItem(barcode=str(barcode), name=str(name), price_cents=int(price), quantity=int(qty))
+        for barcode, name, price, qty in json.loads(zlib.decompress(payload))
+    ]
+
+
+def park_cart(connection: sqlite3.Connection, lane_id: str, items: Sequence[CartItem]) -> int:
+    cursor = connection.execute(
+        """
+        INSERT INTO parked_carts(lane_id, line_count, total_quantity, total_cents, payload)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (
+            lane_id,
+            len(items),
+            sum(item.quantity for item in items),
+            sum(item.subtotal_cents for item in items),
+            encode_cart(items),
+        ),
+    )
+    return int(cursor.lastrowid)
+
+
+def parked_carts(connection: sqlite3.Connection, lane_id: str) -> list[dict[str, Any]]:
+    # Summaries only; payloads stay on disk until a cart is resumed.
+    rows = connection.execute(
+        """
+        SELECT id, parked_at, line_count, total_quantity, total_cents
+        FROM parked_carts
+        WHERE lane_id = ?
+        ORDER BY id
+        """,
+        (lane_id,),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def parked_cart_items(connection: sqlite3.Connection, parked_id: int) -> list[CartItem] | None:
+    row = connection.execute(
+        "SELECT payload FROM parked_carts WHERE id = ?", (parked_id,)
+    ).fetchone()
+    return decode_cart(row[0]) if row else None
+
+
+def delete_parked_cart(connection: sqlite3.Connection, parked_id: int) -> bool:
+    return connection.execute("DELETE FROM parked_carts WHERE id = ?", (parked_id,)).rowcount > 0
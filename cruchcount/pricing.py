@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+
+from cruchcount.promotions import MEMBER_PRICE, MULTI_BUY, SPEND_THRESHOLD, Promotion
+
+# Barcodes -> the promotions touching each one (see promotions.promotions_for).
+PromotionLoader = Callable[[list[str]], Mapping[str, Sequence[Promotion]]]
+
+
+def line_discount(
+    rules: Sequence[Promotion], price_cents: int, quantity: int, member: bool
+) -> tuple[int, Promotion | None]:
+    # The best of the line's member price and multi-buy rules; they do not stack.
+    best, best_rule = 0, None
+    for rule in rules:
+        if rule.kind == MEMBER_PRICE:
+            if not member:
+                continue
+            discount = (price_cents - rule.amount_cents) * quantity
+        elif rule.kind == MULTI_BUY:
+            bundles = quantity // rule.threshold
+            discount = bundles * (price_cents * rule.threshold - rule.amount_cents)
+        else:
+            continue
+        if discount > best:
+            best, best_rule = discount, rule
+    return best, best_rule
+
+
+def threshold_discount(rule: Promotion, spend_cents: int) -> int:
+    # 满减: the scope's spend after line discounts must reach the threshold.
+    if spend_cents < rule.threshold:
+        return 0
+    return min(rule.amount_cents, spend_cents)
+
+
+def cap_thresholds(amounts: Mapping[int, int], net_cents: int) -> dict[int, int]:
+    # 满减 in overlapping scopes (store-wide and a category, say) each apply,
+    # but together never take off more than is left to pay. Rules are cut
+    # back in id order, so the earliest ones keep their full amount.
+    capped: dict[int, int] = {}
+    remaining = max(0, net_cents)
+    for rule_id in sorted(amounts):
+        amount = min(amounts[rule_id], remaining)
+        if amount:
+            capped[rule_id] = amount
+        remaining -= amount
+    return capped
+
+
+def price_cart(
+    lines: Iterable[tuple[str, int, int]],
+    rules: Mapping[str, Sequence[Promotion]],
+    member: bool = False,
+) -> int:
+    # Evaluates every rule against the whole cart from scratch. PricingEngine
+    # must always agree with it; it is what the benchmark compares against.
+    total = 0
+    net = 0
+    spend: dict[int, int] = {}
+    thresholds: dict[int, Promotion] = {}
+    for barcode, price_cents, quantity in lines:
+        line_rules = rules.get(barcode, ())
+        discount, _rule = line_discount(line_rules, price_cents, quantity, member)
+        total += discount
+        net += price_cents * quantity - discount
+        for rule in line_rules:
+            if rule.kind == SPEND_THRESHOLD:
+                thresholds[rule.id] = rule
+                spend[rule.id] = spend.get(rule.id, 0) + price_cents * quantity - discount
+    return total + min(
+        sum(threshold_discount(thresholds[id_], spend[id_]) for id_ in thresholds), max(0, net)
+    )
+
+
+@dataclass(slots=True)
+class _Line:
+    price_cents: int
+    quantity: int
+    rules: tuple[Promotion, ...]
+    thresholds: tuple[Promotion, ...]
+    discount_cents: int = 0
+    rule: Promotion | None = None
+
+    @property
+    def net_cents(self) -> int:
+        return self.price_cents * self.quantity - self.discount_cents
+
+
+class PricingEngine:
+    # Keeps the cart's discounts up to date one line at a time. A change to a
+    # line re-evaluates that line's own rules and the spend thresholds whose
+    # scope includes it; nothing else in the cart is looked at. Promotions are
+    # loaded per barcode the first time it is scanned and kept until the cart
+    # is cleared, so edits to promotions apply from the next customer on.
+    def __init__(self, loader: PromotionLoader | None = None) -> None:
+        self._loader = loader
+        self.member = False
+        self._rules: dict[str, tuple[tuple[Promotion, ...], tuple[Promotion, ...]]] = {}
+        self._lines: dict[str, _Line] = {}
+        self._spend: dict[int, int] = {}
+        self._threshold_rules: dict[int, Promotion] = {}
+        self._threshold_discounts: dict[int, int] = {}
+        self.line_discount_cents = 0
+        # What the cart costs after line discounts, and the 满减 before capping.
+        self._net_cents = 0
+        self._threshold_total = 0
+        # Rules evaluated so far; the benchmark reports it per change.
+        self.evaluations = 0
+
+    @property
+    def discount_cents(self) -> int:
+        return self.line_discount_cents + self.threshold_discount_cents
+
+    @property
+    def threshold_discount_cents(self) -> int:
+        return min(self._threshold_total, max(0, self._net_cents))
+
+    def set_loader(self, loader: PromotionLoader | None) -> None:
+        self._loader = loader
+        self.clear()
+
+    def prefetch(self, barcodes: Iterable[str]) -> None:
+        # One loader call for all barcodes whose promotions are not known yet.
+        missing = [barcode for barcode in dict.fromkeys(barcodes) if barcode not in self._rules]
+        if not missing:
+            return
+        loaded = self._loader(missing) if self._loader is not None else {}
+        for barcode in missing:
+            rules = tuple(loaded.get(barcode, ()))
+            self._rules[barcode] = (
+                tuple(rule for rule in rules if rule.kind != SPEND_THRESHOLD),
+                tuple(rule for rule in rules if rule.kind == SPEND_THRESHOLD),
+            )
+
+    def line_discount(self, barcode: str) -> int:
+        line = self._lines.get(barcode)
+        return line.discount_cents if line is not None else 0
+
+    def update_line(self, barcode: str, price_cents: int, quantity: int) -> bool:
+        # Sets a line's price and quantity (0 removes it). Returns whether the
+        # line's own discount changed.
+        line = self._lines.get(barcode)
+        if line is None:
+            if quantity <= 0:
+                return False
+            self.prefetch((barcode,))
+            rules, thresholds = self._rules[barcode]
+            line = self._lines[barcode] = _Line(0, 0, rules, thresholds)
+        old_discount, old_net = line.discount_cents, line.net_cents
+        line.price_cents, line.quantity = price_cents, max(0, quantity)
+        line.discount_cents, line.rule = line_discount(
+            line.rules, line.price_cents, line.quantity, self.member
+        )
+        self.evaluations += len(line.rules)
+        self.line_discount_cents += line.discount_cents - old_discount
+        self._net_cents += line.net_cents - old_net
+        self._add_spend(line, line.net_cents - old_net)
+        if line.quantity == 0:
+            del self._lines[barcode]
+        return line.discount_cents != old_discount
+
+    def remove_line(self, barcode: str) -> bool:
+        line = self._lines.get(barcode)
+        return line is not None and self.update_line(barcode, line.price_cents, 0)
+
+    def set_member(self, member: bool) -> list[str]:
+        # Returns the barcodes whose line discount changed. Only lines with a
+        # member price are re-evaluated.
+        if member == self.member:
+            return []
+        self.member = member
+        changed = []
+        for barcode, line in list(self._lines.items()):
+            if any(rule.kind == MEMBER_PRICE for rule in line.rules):
+                if self.update_line(barcode, line.price_cents, line.quantity):
+                    changed.append(barcode)
+        return changed
+
+    def clear(self) -> None:
+        # Drops the lines and the promotions loaded for them; the member flag
+        # is per customer too.
+        self.member = False
+        self._rules.clear()
+        self._lines.clear()
+        self._spend.clear()
+        self._threshold_rules.clear()
+        self._threshold_discounts.clear()
+        self.line_discount_cents = 0
+        self._net_cents = 0
+        self._threshold_total = 0
+
+    def applied(self) -> list[tuple[int, str, int]]:
+        # (promotion id, name, amount) for each promotion that gave something.
+        amounts: dict[int, int] = {}
+        names: dict[int, str] = {}
+        for line in self._lines.values():
+            if line.rule is not None and line.discount_cents:
+                amounts[line.rule.id] = amounts.get(line.rule.id, 0) + line.discount_cents
+                names[line.rule.id] = line.rule.name
+        capped = cap_thresholds(self._threshold_discounts, self._net_cents)
+        for rule_id, amount in capped.items():
+            amounts[rule_id] = amounts.get(rule_id, 0) + amount
+            names[rule_id] = self._threshold_rules[rule_id].name
+        return [(rule_id, names[rule_id], amounts[rule_id]) for rule_id in sorted(amounts)]
+
+    def _add_spend(self, line: _Line, delta_cents: int) -> None:
+        if not delta_cents:
+            return
+        for rule in line.thresholds:
+            spend = self._spend.get(rule.id, 0) + delta_cents
+            discount = threshold_discount(rule, spend)
+            self.evaluations += 1
+            self._threshold_total += discount - self._threshold_discounts.get(rule.id, 0)
+            if spend:
+                self._spend[rule.id] = spend
+                self._threshold_rules[rule.id] = rule
+                self._threshold_discounts[rule.id] = discount
+            else:
+                self._spend.pop(rule.id, None)
+                self._threshold_rules.pop(rule.id, None)
+                self._threshold_discounts.pop(rule.id, None)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from cruchcount.barcodes import barcode_key
+
+# Promotion kinds and what threshold / amount_cents mean for each:
+#   member_price     -          member unit price, members only
+#   multi_buy        N items    price for N ("3 件 ¥10")
+#   spend_threshold  spend      taken off once the scope's spend reaches it (满减)
+MEMBER_PRICE = "member_price"
+MULTI_BUY = "multi_buy"
+SPEND_THRESHOLD = "spend_threshold"
+PROMOTION_KINDS = (MEMBER_PRICE, MULTI_BUY, SPEND_THRESHOLD)
+# Kinds priced per cart line; at most one of them applies to a line.
+LINE_KINDS = (MEMBER_PRICE, MULTI_BUY)
+# Barcodes per IN (...) when loading the promotions for a cart.
+PROMOTION_CHUNK_SIZE = 500
+
+_COLUMNS = ", ".join(
+    f"promotions.{column}"
+    for column in ("id", "name", "kind", "barcode_key", "category", "threshold", "amount_cents")
+)
+_ACTIVE = "(starts_on IS NULL OR starts_on <= ?) AND (ends_on IS NULL OR ends_on >= ?)"
+
+
+@dataclass(frozen=True, slots=True)
+class Promotion:
+    id: int
+    name: str
+    kind: str
+    # The scope: one barcode, one category, or (both None) the whole cart.
+    barcode_key: str | None
+    category: str | None
+    threshold: int
+    amount_cents: int
+
+
+def init_promotion_schema(connection: sqlite3.Connection) -> None:
+    # Rules are found from the cart side: by barcode key and by the category
+    # of a line's product, each through its own partial index, so loading a
+    # line's rules costs the same with ten rules on file or ten thousand.
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS promotions (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL CHECK(kind IN ('member_price', 'multi_buy', 'spend_threshold')),
+            barcode_key TEXT,
+            category TEXT,
+            threshold INTEGER NOT NULL DEFAULT 0 CHECK(threshold >= 0),
+            amount_cents INTEGER NOT NULL CHECK(amount_cents >= 0),
+            starts_on TEXT,
+            ends_on TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            CHECK(barcode_key IS NULL OR category IS NULL),
+            CHECK(kind = 'spend_threshold' OR barcode_key IS NOT NULL OR category IS NOT NULL)
+        )
+        """
+    )
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_promotions_barcode
+        ON promotions(barcode_key) WHERE barcode_key IS NOT NULL
+        """
+    )
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_promotions_category
+        ON promotions(category) WHERE category IS NOT NULL
+        """
+    )
+    # What each sale was given, per promotion, for receipts and audits.
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sale_discounts (
+            sale_id INTEGER NOT NULL REFERENCES sales(id),
+            promotion_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            amount_cents INTEGER NOT NULL CHECK(amount_cents > 0),
+            PRIMARY KEY (sale_id, promotion_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def add_promotion(
+    connection: sqlite3.Connection,
+    name: str,
+    kind: str,
+    amount_cents: int,
+    threshold: int = 0,
+    barcode: str | None = None,
+    category: str | None = None,
+    starts_on: str | None = None,
+    ends_on: str | None = None,
+) -> int:
+    if kind not in PROMOTION_KINDS:
+        raise ValueError(f"unknown promotion kind: {kind!r}")
+    if barcode and category:
+        raise ValueError("a promotion applies to a barcode or a category, not both")
+    if kind in LINE_KINDS and not (barcode or category):
+        raise ValueError(f"{kind} needs a barcode or a category")
+    if kind == MEMBER_PRICE and amount_cents <= 0:
+        raise ValueError("member price must be positive")
+    if kind == MULTI_BUY and (threshold < 2 or amount_cents <= 0):
+        raise ValueError("multi-buy needs at least 2 items and a positive price")
+    if kind == SPEND_THRESHOLD and (threshold <= 0 or amount_cents <= 0):
+        raise ValueError("spend threshold and amount off must be positive")
+    # Stored as YYYY-MM-DD so they compare as text against today's date.
+    starts_on = date.fromisoformat(starts_on).isoformat() if starts_on else None
+    ends_on = date.fromisoformat(ends_on).isoformat() if ends_on else None
+    cursor = connection.execute(
+        """
+        INSERT INTO promotions(
+            name, kind, barcode_key, category, threshold, amount_cents, starts_on, ends_on
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            name,
+            kind,
+            barcode_key(barcode) if barcode else None,
+            category or None,
+            threshold,
+            amount_cents,
+            starts_on,
+            ends_on,
+        ),
+    )
+    return int(cursor.lastrowid)
+
+
+def delete_promotion(connection: sqlite3.Connection, promotion_id: int) -> bool:
+    return connection.execute("DELETE FROM promotions WHERE id = ?", (promotion_id,)).rowcount > 0
+
+
+def list_promotions(connection: sqlite3.Connection) -> list[dict[str, Any]]:
+    rows = connection.execute(
+        f"SELECT {_COLUMNS}, starts_on, ends_on FROM promotions ORDER BY id"
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def promotions_for(
+    connection: sqlite3.Connection, barcodes: Sequence[str], day: str
+) -> dict[str, list[Promotion]]:
+    # Maps each barcode to the promotions running on `day` that touch it: its
+    # own, its category's and the store-wide ones.
+    keys = {barcode: barcode_key(barcode) for barcode in barcodes}
+    by_key: dict[str, list[Promotion]] = {key: [] for key in keys.values()}
+    unique_keys = list(by_key)
+    for start in range(0, len(unique_keys), PROMOTION_CHUNK_SIZE):
+        chunk = unique_keys[start : start + PROMOTION_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        rows = connection.execute(
+            f"""
+            SELECT promotions.barcode_key, {_COLUMNS}
+            FROM promotions INDEXED BY idx_promotions_barcode
+            WHERE promotions.barcode_key IN ({placeholders}) AND {_ACTIVE}
+            UNION ALL
+            SELECT products.barcode_key, {_COLUMNS}
+            FROM products
+            JOIN promotions INDEXED BY idx_promotions_category
+                ON promotions.category = products.category
+            WHERE products.barcode_key IN ({placeholders}) AND {_ACTIVE}
+            """,
+            (*chunk, day, day, *chunk, day, day),
+        )
+        for key, *values in rows:
+            by_key[key].append(Promotion(*values))
+    store_wide = [
+        Promotion(*row)
+        for row in connection.execute(
+            f"""
+            SELECT {_COLUMNS} FROM promotions
+            WHERE barcode_key IS NULL AND category IS NULL AND {_ACTIVE}
+            """,
+            (day, day),
+        )
+    ]
+    return {barcode: [*by_key[key], *store_wide] for barcode, key in keys.items()}
+
+
+def set_category(connection: sqlite3.Connection, barcode: str, category: str) -> None:
+    connection.execute(
+        "UPDATE products SET category = ? WHERE barcode_key = ?",
+        (category.strip(), barcode_key(barcode)),
+    )
+
+
+def product_category(connection: sqlite3.Connection, barcode: str) -> str | None:
+    row = connection.execute(
+        "SELECT category FROM products WHERE barcode_key = ?", (barcode_key(barcode),)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def record_sale_discounts(
+    connection: sqlite3.Connection, sale_id: int, discounts: Sequence[tuple[int, str, int]]
+) -> None:
+    connection.executemany(
+        """
+        INSERT INTO sale_discounts(sale_id, promotion_id, name, amount_cents)
+        VALUES (?, ?, ?, ?)
+        """,
+        [(sale_id, *discount) for discount in discounts if discount[2] > 0],
+    )
+
+
+def sale_discounts(connection: sqlite3.Connection, sale_id: int) -> list[dict[str, Any]]:
+    rows = connection.execute(
+        """
+        SELECT promotion_id, name, amount_cents
+        FROM sale_discounts
+        WHERE sale_id = ?
+        ORDER BY promotion_id
+        """,
+        (sale_id,),
+    ).fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Any
+
+
+def init_report_schema(connection: sqlite3.Connection) -> None:
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS report_daily (
+            day TEXT PRIMARY KEY,
+            sale_count INTEGER NOT NULL,
+            units INTEGER NOT NULL,
+            revenue_cents INTEGER NOT NULL,
+            discount_cents INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """
+    )
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS report_hourly (
+            day TEXT NOT NULL,
+            hour INTEGER NOT NULL,
+            sale_count INTEGER NOT NULL,
+            units INTEGER NOT NULL,
+            revenue_cents INTEGER NOT NULL,
+            PRIMARY KEY (day, hour)
+        ) WITHOUT ROWID
+        """
+    )
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS report_daily_sku (
+            day TEXT NOT NULL,
+            barcode TEXT NOT NULL,
+            name TEXT NOT NULL,
+            units INTEGER NOT NULL,
+            revenue_cents INTEGER NOT NULL,
+            PRIMARY KEY (day, barcode)
+        ) WITHOUT ROWID
+        """
+    )
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS report_sku (
+            barcode TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            units INTEGER NOT NULL,
+            revenue_cents INTEGER NOT NULL
+        )
+        """
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_report_sku_revenue ON report_sku(revenue_cents)"
+    )
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS report_state (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            last_sale_id INTEGER NOT NULL
+        )
+        """
+    )
+    connection.execute("INSERT OR IGNORE INTO report_state(id, last_sale_id) VALUES (1, 0)")
+
+
+def apply_pending_rollups(connection: sqlite3.Connection) -> int:
+    last_sale_id = connection.execute(
+        "SELECT last_sale_id FROM report_state WHERE id = 1"
+    ).fetchone()[0]
+    newest_sale_id = connection.execute("SELECT max(id) FROM sales").fetchone()[0]
+    if newest_sale_id is None or newest_sale_id <= last_sale_id:
+        return 0
+
+    window = (last_sale_id, newest_sale_id)
+    # Sales revenue is what was paid; per-SKU revenue is price * quantity
+    # before discounts, which is daily revenue plus discount_cents.
+    connection.execute(
+        """
+        INSERT INTO report_daily(day, sale_count, units, revenue_cents, discount_cents)
+        SELECT
+            substr(created_at, 1, 10),
+            count(*),
+            sum(total_quantity),
+            sum(total_cents),
+            sum(discount_cents)
+        FROM sales
+        WHERE id > ? AND id <= ?
+        GROUP BY 1
+        ON CONFLICT(day) DO UPDATE SET
+            sale_count = sale_count + excluded.sale_count,
+            units = units + excluded.units,
+            revenue_cents = revenue_cents + excluded.revenue_cents,
+            discount_cents = discount_cents + excluded.discount_cents
+        """,
+        window,
+    )
+    connection.execute(
+        """
+        INSERT INTO report_hourly(day, hour, sale_count, units, revenue_cents)
+        SELECT
+            substr(created_at, 1, 10),
+            CAST(substr(created_at, 12, 2) AS INTEGER),
+            count(*),
+            sum(total_quantity),
+            sum(total_cents)
+        FROM sales
+        WHERE id > ? AND id <= ?
+        GROUP BY 1, 2
+        ON CONFLICT(day, hour) DO UPDATE SET
+            sale_count = sale_count + excluded.sale_count,
+            units = units + excluded.units,
+            revenue_cents = revenue_cents + excluded.revenue_cents
+        """,
+        window,
+    )
+    connection.execute(
+        """
+        INSERT INTO report_daily_sku(day, barcode, name, units, revenue_cents)
+        SELECT
+            substr(sales.created_at, 1, 10),
+            sale_items.barcode,
+            max(sale_items.name),
+            sum(sale_items.quantity),
+            sum(sale_items.price_cents * sale_items.quantity)
+        FROM sale_items
+        JOIN sales ON sales.id = sale_items.sale_id
+        WHERE sale_items.sale_id > ? AND sale_items.sale_id <= ?
+        GROUP BY 1, 2
+        ON CONFLICT(day, barcode) DO UPDATE SET
+            name = excluded.name,
+            units = units + excluded.units,
+            revenue_cents = revenue_cents + excluded.revenue_cents
+        """,
+        window,
+    )
+    connection.execute(
+        """
+        INSERT INTO report_sku(barcode, name, units, revenue_cents)
+        SELECT barcode, max(name), sum(quantity), sum(price_cents * quantity)
+        FROM sale_items
+        WHERE sale_id > ? AND sale_id <= ?
+        GROUP BY barcode
+        ON CONFLICT(barcode) DO UPDATE SET
+            name = excluded.name,
+            units = units + excluded.units,
+            revenue_cents = revenue_cents + excluded.revenue_cents
+        """,
+        window,
+    )
+    connection.execute(
+        "UPDATE report_state SET last_sale_id = ? WHERE id = 1",
+        (newest_sale_id,),
+    )
+    return newest_sale_id - last_sale_id
+
+
+def rebuild_rollups(connection: sqlite3.Connection) -> int:
+    for table in ("report_daily", "report_hourly", "report_daily_sku", "report_sku"):
+        connection.execute(f"DELETE FROM {table}")
+    connection.execute("UPDATE report_state SET last_sale_id = 0 WHERE id = 1")
+    return apply_pending_rollups(connection)
+
+
+def daily_report(connection: sqlite3.Connection, start_day: str, end_day: str) -> list[dict[str, Any]]:
+    cursor = connection.execute(
+        """
+        SELECT day, sale_count, units, revenue_cents, discount_cents
+        FROM report_daily
+        WHERE day >= ? AND day <= ?
+        ORDER BY day
+        """,
+        (start_day, end_day),
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def hourly_report(connection: sqlite3.Connection, day: str) -> list[dict[str, Any]]:
+    cursor = connection.execute(
+        """
+        SELECT hour, sale_count, units, revenue_cents
+        FROM report_hourly
+        WHERE day = ?
+        ORDER BY hour
+        """,
+        (day,),
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def product_report(
+    connection: sqlite3.Connection,
+    start_day: str | None = None,
+    end_day: str | None = None,
+    limit: int = 50,
+) -> list[dict[str, Any]]:
+    if start_day is None or end_day is None:
+        cursor = connection.execute(
+            """
+            SELECT barcode, name, units, revenue_cents
+            FROM report_sku INDEXED BY idx_report_sku_revenue
+            ORDER BY revenue_cents DESC
+            LIMIT ?
+            """,
+            (limit,),
+        )
+    else:
+        cursor = connection.execute(
+            """
+            SELECT barcode, max(name) AS name, sum(units) AS units, sum(revenue_cents) AS revenue_cents
+            FROM report_daily_sku
+            WHERE day >= ? AND day <= ?
+            GROUP BY barcode
+            ORDER BY revenue_cents DESC
+            LIMIT ?
+            """,
+            (start_day, end_day, limit),
+        )
+    return [dict(row) for row in cursor.fetchall()]
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Any
+
+from cruchcount.instrumentation import timed
+
+# Above this many candidate rows it is cheaper to look for the top hits among
+# the most recently updated products than to fetch and sort every candidate.
+DENSE_MATCH_THRESHOLD = 2000
+RECENT_WINDOW = 5000
+TRIGRAM_MIN_LENGTH = 3
+
+_COLUMNS = "barcode, name, price_cents"
+
+
+def init_search_index(connection: sqlite3.Connection) -> bool:
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_products_updated_at ON products(updated_at)"
+    )
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_products_barcode_nocase
+        ON products(barcode COLLATE NOCASE)
+        """
+    )
+
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+    ).fetchone()
+    try:
+        connection.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name,
+                content = 'products',
+                content_rowid = 'rowid',
+                tokenize = 'trigram'
+            )
+            """
+        )
+    except sqlite3.OperationalError:
+        return False
+
+    connection.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, name) VALUES (new.rowid, new.name);
+        END
+        """
+    )
+    connection.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name)
+            VALUES ('delete', old.rowid, old.name);
+        END
+        """
+    )
+    connection.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name)
+            VALUES ('delete', old.rowid, old.name);
+            INSERT INTO products_fts(rowid, name) VALUES (new.rowid, new.name);
+        END
+        """
+    )
+    if not exists:
+        rebuild_search_index(connection)
+    return True
+
+
+def rebuild_search_index(connection: sqlite3.Connection) -> None:
+    connection.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+@timed("db.search_products")
+def search_products(
+    connection: sqlite3.Connection, query: str, limit: int = 20, offset: int = 0
+) -> list[dict[str, Any]]:
+    # Later pages re-run the search for offset + limit rows: the density checks
+    # and recent-window shortcut below depend on the full limit.
+    if offset:
+        return _search(connection, query, offset + limit)[offset:]
+    return _search(connection, query, limit)
+
+
+def _search(connection: sqlite3.Connection, query: str, limit: int) -> list[dict[str, Any]]:
+    q = query.strip()
+    if not q:
+        cursor = connection.execute(
+            f"""
+            SELECT {_COLUMNS}
+            FROM products INDEXED BY idx_products_updated_at
+            ORDER BY updated_at DESC
+            LIMIT ?
+            """,
+            (limit,),
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+    prefix = f"{q}%"
+    products = _barcode_prefix_matches(connection, prefix, limit)
+    remaining = limit - len(products)
+    if remaining > 0:
+        products.extend(_name_matches(connection, q, prefix, remaining))
+    return products
+
+
+def _barcode_prefix_matches(
+    connection: sqlite3.Connection, prefix: str, limit: int
+) -> list[dict[str, Any]]:
+    candidates = connection.execute(
+        """
+        SELECT count(*) FROM (
+            SELECT 1 FROM products INDEXED BY idx_products_barcode_nocase
+            WHERE barcode LIKE ?
+            LIMIT ?
+        )
+        """,
+        (prefix, DENSE_MATCH_THRESHOLD),
+    ).fetchone()[0]
+    if candidates == 0:
+        return []
+    if candidates >= DENSE_MATCH_THRESHOLD:
+        products = _recent_matches(connection, "barcode LIKE ?", (prefix,), limit)
+        if products is not None:
+            return products
+
+    cursor = connection.execute(
+        f"""
+        SELECT {_COLUMNS}
+        FROM products INDEXED BY idx_products_barcode_nocase
+        WHERE barcode LIKE ?
+        ORDER BY updated_at DESC
+        LIMIT ?
+        """,
+        (prefix, limit),
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def _name_matches(
+    connection: sqlite3.Connection, q: str, prefix: str, limit: int
+) -> list[dict[str, Any]]:
+    name_filter = "name LIKE ? AND NOT barcode LIKE ?"
+    name_params = (f"%{q}%", prefix)
+
+    if len(q) >= TRIGRAM_MIN_LENGTH:
+        phrase = '"' + q.replace('"', '""') + '"'
+        try:
+            candidates = connection.execute(
+                """
+                SELECT count(*) FROM (
+                    SELECT 1 FROM products_fts WHERE products_fts MATCH ? LIMIT ?
+                )
+                """,
+                (phrase, DENSE_MATCH_THRESHOLD),
+            ).fetchone()[0]
+        except sqlite3.OperationalError as exc:
+            if "products_fts" not in str(exc):
+                raise
+        else:
+            if candidates == 0:
+                return []
+            if candidates >= DENSE_MATCH_THRESHOLD:
+                products = _recent_matches(connection, name_filter, name_params, limit)
+                if products is not None:
+                    return products
+            cursor = connection.execute(
+                f"""
+                SELECT {_COLUMNS}
+                FROM products
+                WHERE rowid IN (
+                    SELECT rowid FROM products_fts WHERE products_fts MATCH ?
+                )
+                AND NOT barcode LIKE ?
+                ORDER BY updated_at DESC
+                LIMIT ?
+                """,
+                (phrase, prefix, limit),
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    products = _recent_matches(connection, name_filter, name_params, limit)
+    if products is not None:
+        return products
+    cursor = connection.execute(
+        f"""
+        SELECT {_COLUMNS}
+        FROM products NOT INDEXED
+        WHERE {name_filter}
+        ORDER BY updated_at DESC
+        LIMIT ?
+        """,
+        (*name_params, limit),
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def _recent_matches(
+    connection: sqlite3.Connection,
+    condition: str,
+    params: tuple[str, ...],
+    limit: int,
+) -> list[dict[str, Any]] | None:
+    # The newest RECENT_WINDOW rows hold the top `limit` matches whenever they
+    # hold at least `limit` matches; otherwise the caller falls back to a scan.
+    # The subquery runs as a co-routine in index order, so the outer LIMIT
+    # stops the walk early and no extra sort is needed.
+    cursor = connection.execute(
+        f"""
+        SELECT {_COLUMNS}
+        FROM (
+            SELECT barcode, name, price_cents, updated_at
+            FROM products INDEXED BY idx_products_updated_at
+            ORDER BY updated_at DESC
+            LIMIT ?
+        )
+        WHERE {condition}
+        LIMIT ?
+        """,
+        (RECENT_WINDOW, *params, limit),
+    )
+    products = [dict(row) for row in cursor.fetchall()]
+    return products if len(products) >= limit else None
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+
+from PyQt6.QtCore import QEvent, QObject, QTimer
+
+STARTUP_TIMING_ENV = "CRUCHCOUNT_STARTUP_TIMING"
+
+
+def startup_timing_mode() -> str | None:
+    value = os.environ.get(STARTUP_TIMING_ENV, "").strip().lower()
+    if value in {"", "0", "false", "no"}:
+        return None
+    return "exit" if value == "exit" else "report"
+
+
+class StartupTimer(QObject):
+    def __init__(self, started_at: float, exit_after_paint: bool = False) -> None:
+        super().__init__()
+        self.started_at = started_at
+        self.exit_after_paint = exit_after_paint
+        self.marks: dict[str, float] = {}
+        self._last = started_at
+
+    def mark(self, name: str) -> None:
+        now = time.perf_counter()
+        self.marks[name] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+    def watch_first_paint(self, widget: QObject) -> None:
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:  # type: ignore[override]
+        if event.type() == QEvent.Type.Paint:
+            watched.removeEventFilter(self)
+            self.mark("first_paint_ms")
+            self.report()
+            if self.exit_after_paint:
+                QTimer.singleShot(0, watched.close)  # type: ignore[attr-defined]
+        return False
+
+    def report(self) -> None:
+        total = round((time.perf_counter() - self.started_at) * 1000, 2)
+        print(json.dumps({"startup": {**self.marks, "total_ms": total}}), file=sys.stderr)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Any
+
+from cruchcount.barcodes import barcode_key
+
+
+def init_stock_schema(connection: sqlite3.Connection) -> None:
+    # Holds only the products at or below their reorder level, so the reorder
+    # list is read straight off this index however large the catalog gets.
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_products_low_stock
+        ON products(stock)
+        WHERE reorder_level > 0 AND stock <= reorder_level
+        """
+    )
+
+
+def receive_stock(connection: sqlite3.Connection, barcode: str, quantity: int) -> None:
+    connection.execute(
+        "UPDATE products SET stock = stock + ? WHERE barcode_key = ?",
+        (quantity, barcode_key(barcode)),
+    )
+
+
+def set_reorder_level(connection: sqlite3.Connection, barcode: str, reorder_level: int) -> None:
+    connection.execute(
+        "UPDATE products SET reorder_level = ? WHERE barcode_key = ?",
+        (reorder_level, barcode_key(barcode)),
+    )
+
+
+def deduct_sale(connection: sqlite3.Connection, sale_id: int) -> None:
+    # One statement for the whole sale. Lines for products that are not in the
+    # catalog (temporary items) have nothing to deduct from and are skipped.
+    connection.execute(
+        """
+        UPDATE products SET stock = products.stock - sold.quantity
+        FROM (
+            SELECT barcode, sum(quantity) AS quantity
+            FROM sale_items
+            WHERE sale_id = ?
+            GROUP BY barcode
+        ) AS sold
+        WHERE products.barcode = sold.barcode
+        """,
+        (sale_id,),
+    )
+
+
+def stock_level(connection: sqlite3.Connection, barcode: str) -> dict[str, Any] | None:
+    row = connection.execute(
+        "SELECT barcode, stock, reorder_level FROM products WHERE barcode_key = ?",
+        (barcode_key(barcode),),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def low_stock_products(connection: sqlite3.Connection, limit: int = 200) -> list[dict[str, Any]]:
+    rows = connection.execute(
+        """
+        SELECT barcode, name, price_cents, stock, reorder_level
+        FROM products INDEXED BY idx_products_low_stock
+        WHERE reorder_level > 0 AND stock <= reorder_level
+        ORDER BY stock
+        LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+    return [dict(row) for row in rows]
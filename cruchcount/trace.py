@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import Any
+
+TRACE_ENV = "CRUCHCOUNT_TRACE"
+TRACE_SUFFIX = ".trace.jsonl"
+
+# What CartPage records, and what a replay feeds back in:
+#   scan      {"text"}                  scanner input, as typed ("24*690...")
+#   manual    {"text"}                  manual entry / suggestion pick
+#   quantity  {"barcode", "quantity"}   quantity cell edited
+#   remove    {"barcode"}               line removed
+#   clear     {}                        cart emptied
+#   unknown   {"barcode", "price_cents"} pricing dialog answered (null: cancelled)
+#   member    {"member"}                member prices switched on or off
+#   checkout  {}                        sale recorded
+EVENT_KINDS = ("scan", "manual", "quantity", "remove", "clear", "unknown", "member", "checkout")
+
+
+def trace_path_from_env(
+    database_path: Path, lane_id: str, environ: Mapping[str, str] | None = None
+) -> Path | None:
+    # CRUCHCOUNT_TRACE=1 records next to the database; any other value is a path.
+    environ = os.environ if environ is None else environ
+    value = environ.get(TRACE_ENV, "").strip()
+    if value.lower() in {"", "0", "false", "no"}:
+        return None
+    if value.lower() in {"1", "true", "yes"}:
+        return database_path.with_name(f"{database_path.stem}.lane-{lane_id}{TRACE_SUFFIX}")
+    return Path(value)
+
+
+class TraceRecorder:
+    # Appends one JSON line per cart event with its offset in seconds from the
+    # start of the recording. Lines are buffered; nothing here waits on disk.
+    def __init__(self, path: Path, lane_id: str) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+        self._started = time.monotonic()
+        self._write(
+            {
+                "t": 0.0,
+                "kind": "start",
+                "lane_id": lane_id,
+                "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        )
+
+    def record(self, kind: str, **fields: Any) -> None:
+        self._write({"t": round(time.monotonic() - self._started, 4), "kind": kind, **fields})
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _write(self, event: dict[str, Any]) -> None:
+        if not self._file.closed:
+            self._file.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def read_trace(path: Path) -> Iterator[dict[str, Any]]:
+    # Yields the replayable events of a trace. A file recorded over several
+    # sessions restarts its clock at each "start"; offsets are made continuous.
+    base = 0.0
+    last = 0.0
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                event = json.loads(line)
+                kind = event["kind"]
+                offset = float(event["t"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            if kind == "start":
+                base = last
+                continue
+            if kind in EVENT_KINDS:
+                last = base + offset
+                yield {**event, "t": last}
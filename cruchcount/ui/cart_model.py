@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+from typing import Any
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt, pyqtSignal
+
+from cruchcount.cart import CartItem, CartTotals
+from cruchcount.journal import CartJournal, add_op, remove_op, set_op
+from cruchcount.money import format_cents
+from cruchcount.pricing import PricingEngine
+
+CART_HEADERS = ("条码", "商品", "单价", "数量", "小计", "优惠", "操作")
+BARCODE_COLUMN = 0
+QUANTITY_COLUMN = 3
+SUBTOTAL_COLUMN = 4
+DISCOUNT_COLUMN = 5
+ACTION_COLUMN = 6
+
+
+class CartTableModel(QAbstractTableModel):
+    totals_changed = pyqtSignal()
+    quantity_rejected = pyqtSignal()
+    # A quantity typed into the table (not set programmatically): barcode, quantity.
+    quantity_edited = pyqtSignal(str, int)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._items: list[CartItem] = []
+        self._rows: dict[str, int] = {}
+        self._totals = CartTotals()
+        self._journal: CartJournal | None = None
+        self._pricing = PricingEngine()
+
+    def set_pricing(self, pricing: PricingEngine) -> None:
+        self._pricing = pricing
+        self._reprice()
+
+    def set_journal(self, journal: CartJournal | None) -> None:
+        self._journal = journal
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(CART_HEADERS)
+
+    def headerData(
+        self,
+        section: int,
+        orientation: Qt.Orientation,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return CART_HEADERS[section]
+        return str(section + 1)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        item = self._items[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.EditRole and column == QUANTITY_COLUMN:
+            return str(item.quantity)
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if column == BARCODE_COLUMN:
+            return item.barcode
+        if column == 1:
+            return item.name
+        if column == 2:
+            return format_cents(item.price_cents)
+        if column == QUANTITY_COLUMN:
+            return str(item.quantity)
+        if column == SUBTOTAL_COLUMN:
+            return format_cents(item.subtotal_cents)
+        if column == DISCOUNT_COLUMN:
+            discount = self._pricing.line_discount(item.barcode)
+            return f"-{format_cents(discount)}" if discount else ""
+        if column == ACTION_COLUMN:
+            return "移除"
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if index.column() == QUANTITY_COLUMN:
+            return (
+                Qt.ItemFlag.ItemIsEnabled
+                | Qt.ItemFlag.ItemIsSelectable
+                | Qt.ItemFlag.ItemIsEditable
+            )
+        if index.column() == ACTION_COLUMN:
+            return Qt.ItemFlag.ItemIsEnabled
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def setData(
+        self,
+        index: QModelIndex,
+        value: Any,
+        role: int = Qt.ItemDataRole.EditRole,
+    ) -> bool:
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        if index.column() != QUANTITY_COLUMN:
+            return False
+        try:
+            quantity = int(str(value).strip())
+            if quantity <= 0:
+                raise ValueError
+        except ValueError:
+            self.quantity_rejected.emit()
+            return False
+        self.set_quantity(index.row(), quantity)
+        self.quantity_edited.emit(self._items[index.row()].barcode, quantity)
+        return True
+
+    def items(self) -> list[CartItem]:
+        return list(self._items)
+
+    def is_empty(self) -> bool:
+        return not self._items
+
+    def item_for(self, barcode: str) -> CartItem | None:
+        row = self._rows.get(barcode)
+        return self._items[row] if row is not None else None
+
+    def row_for(self, barcode: str) -> int | None:
+        return self._rows.get(barcode)
+
+    def barcode_at(self, row: int) -> str:
+        return self._items[row].barcode
+
+    def add_product(self, barcode: str, name: str, price_cents: int, quantity: int = 1) -> int:
+        self.add_products([(barcode, name, price_cents, quantity)])
+        return self._rows[barcode]
+
+    def add_products(self, entries: list[tuple[str, str, int, int]]) -> None:
+        if not entries:
+            return
+
+        self._pricing.prefetch(barcode for barcode, _, _, _ in entries)
+        changed_rows: set[int] = set()
+        new_items: dict[str, CartItem] = {}
+        for barcode, name, price_cents, quantity in entries:
+            row = self._rows.get(barcode)
+            if row is not None:
+                item = self._items[row]
+                changed_rows.add(row)
+            elif barcode in new_items:
+                item = new_items[barcode]
+            else:
+                item = new_items[barcode] = CartItem(
+                    barcode=barcode, name=name, price_cents=price_cents, quantity=0
+                )
+            item.quantity += quantity
+            self._totals.add(item.price_cents, quantity)
+            if self._journal is not None:
+                self._journal.append(add_op(item, quantity))
+        for row in changed_rows:
+            item = self._items[row]
+            self._pricing.update_line(item.barcode, item.price_cents, item.quantity)
+        for item in new_items.values():
+            self._pricing.update_line(item.barcode, item.price_cents, item.quantity)
+
+        if changed_rows:
+            self.dataChanged.emit(
+                self.index(min(changed_rows), QUANTITY_COLUMN),
+                self.index(max(changed_rows), DISCOUNT_COLUMN),
+                [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole],
+            )
+        if new_items:
+            first_row = len(self._items)
+            self.beginInsertRows(QModelIndex(), first_row, first_row + len(new_items) - 1)
+            for row, item in enumerate(new_items.values(), start=first_row):
+                self._items.append(item)
+                self._rows[item.barcode] = row
+            self.endInsertRows()
+        self.totals_changed.emit()
+
+    def set_quantity(self, row: int, quantity: int) -> None:
+        item = self._items[row]
+        if item.quantity == quantity:
+            return
+        self._totals.add(item.price_cents, quantity - item.quantity)
+        item.quantity = quantity
+        self._pricing.update_line(item.barcode, item.price_cents, quantity)
+        if self._journal is not None:
+            self._journal.append(set_op(item.barcode, quantity))
+        self._emit_row_changed(row)
+        self.totals_changed.emit()
+
+    def remove_barcode(self, barcode: str) -> bool:
+        row = self._rows.get(barcode)
+        if row is None:
+            return False
+
+        item = self._items[row]
+        self._totals.add(item.price_cents, -item.quantity)
+        self._pricing.remove_line(barcode)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._items[row]
+        del self._rows[barcode]
+        for shifted_row in range(row, len(self._items)):
+            self._rows[self._items[shifted_row].barcode] = shifted_row
+        self.endRemoveRows()
+        if self._journal is not None:
+            self._journal.append(remove_op(barcode))
+        self.totals_changed.emit()
+        return True
+
+    def clear(self) -> None:
+        if not self._items:
+            return
+        self.beginResetModel()
+        self._items.clear()
+        self._rows.clear()
+        self._totals.reset()
+        self._pricing.clear()
+        self.endResetModel()
+        if self._journal is not None:
+            self._journal.compact()
+        self.totals_changed.emit()
+
+    def restore(self, items: list[CartItem]) -> None:
+        # Loads a replayed cart without writing it back to the journal.
+        self.beginResetModel()
+        self._items = list(items)
+        self._rows = {item.barcode: row for row, item in enumerate(self._items)}
+        self._totals.reset()
+        for item in self._items:
+            self._totals.add(item.price_cents, item.quantity)
+        self._pricing.clear()
+        self._reprice()
+        self.endResetModel()
+        self.totals_changed.emit()
+
+    def set_member(self, member: bool) -> None:
+        for barcode in self._pricing.set_member(member):
+            row = self._rows[barcode]
+            self.dataChanged.emit(
+                self.index(row, DISCOUNT_COLUMN),
+                self.index(row, DISCOUNT_COLUMN),
+                [Qt.ItemDataRole.DisplayRole],
+            )
+        self.totals_changed.emit()
+
+    def is_member(self) -> bool:
+        return self._pricing.member
+
+    def total_quantity(self) -> int:
+        return self._totals.quantity
+
+    def total_amount_cents(self) -> int:
+        return self._totals.amount_cents
+
+    def total_discount_cents(self) -> int:
+        return self._pricing.discount_cents
+
+    def payable_cents(self) -> int:
+        return self._totals.amount_cents - self._pricing.discount_cents
+
+    def applied_discounts(self) -> list[tuple[int, str, int]]:
+        return self._pricing.applied()
+
+    def _reprice(self) -> None:
+        # Whole cart at once: a restored cart or a new engine; one loader call.
+        self._pricing.prefetch(item.barcode for item in self._items)
+        for item in self._items:
+            self._pricing.update_line(item.barcode, item.price_cents, item.quantity)
+
+    def _emit_row_changed(self, row: int) -> None:
+        self.dataChanged.emit(
+            self.index(row, QUANTITY_COLUMN),
+            self.index(row, DISCOUNT_COLUMN),
+            [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole],
+        )
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from cruchcount.db import Database
+
+# How long closing the window waits for a cancelled load to stop.
+SHUTDOWN_WAIT_MS = 2000
+
+
+class _DatabaseLoadWorker(QObject):
+    progress = pyqtSignal(str, int)
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path: Path, cancelled: threading.Event) -> None:
+        super().__init__()
+        self._path = path
+        self._cancelled = cancelled
+        self._database: Database | None = None
+
+    def interrupt(self) -> None:
+        # Called from the GUI thread after cancelling, to cut a long
+        # migration short instead of waiting for it.
+        database = self._database
+        if database is not None:
+            database.interrupt()
+
+    @pyqtSlot()
+    def run(self) -> None:
+        database: Database | None = None
+        try:
+            self.progress.emit("正在打开数据库……", 10)
+            database = self._database = Database(self._path)
+            if self._cancelled.is_set():
+                database.close()
+                return
+            self.progress.emit("正在检查数据结构……", 30)
+            database.init_schema()
+            if self._cancelled.is_set():
+                database.close()
+                return
+            self.progress.emit("正在预热商品缓存……", 70)
+            database.warm_up()
+        except Exception as exc:
+            if database is not None:
+                database.close()
+            self.failed.emit(str(exc))
+            return
+        self.progress.emit("数据库已就绪", 100)
+        self.loaded.emit(database)
+
+
+class DatabaseLoader(QObject):
+    # Opens, migrates and warms a database off the GUI thread. The caller keeps
+    # using its current database until `loaded` hands over the new one. The
+    # GUI thread never waits on a worker: a cancelled one is interrupted and
+    # left to wind down, and its thread is dropped once it has finished.
+    progress = pyqtSignal(str, int)
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._thread: QThread | None = None
+        self._worker: _DatabaseLoadWorker | None = None
+        self._cancelled = threading.Event()
+        # Threads told to quit that have not finished yet, with their workers.
+        self._retiring: dict[QThread, _DatabaseLoadWorker] = {}
+        self.path: Path | None = None
+
+    def is_loading(self) -> bool:
+        return self._worker is not None
+
+    def load(self, path: Path) -> None:
+        self.cancel()
+        self.path = path
+        self._cancelled = threading.Event()
+        thread = QThread()
+        worker = _DatabaseLoadWorker(path, self._cancelled)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress.connect(
+            lambda text, percent, w=worker: self._on_progress(w, text, percent)
+        )
+        worker.loaded.connect(lambda database, w=worker: self._on_loaded(w, database))
+        worker.failed.connect(lambda message, w=worker: self._on_failed(w, message))
+        thread.finished.connect(lambda t=thread: self._on_thread_finished(t))
+        self._thread = thread
+        self._worker = worker
+        thread.start()
+
+    def cancel(self) -> None:
+        if self._worker is None:
+            return
+        self._cancelled.set()
+        self._worker.interrupt()
+        self._finish()
+
+    def shutdown(self) -> None:
+        # On close: the threads must be gone before Qt tears down, but an
+        # interrupted worker stops quickly, so the wait is short and bounded.
+        self.cancel()
+        for thread in list(self._retiring):
+            thread.wait(SHUTDOWN_WAIT_MS)
+
+    def _on_progress(self, worker: _DatabaseLoadWorker, text: str, percent: int) -> None:
+        if worker is self._worker:
+            self.progress.emit(text, percent)
+
+    def _on_loaded(self, worker: _DatabaseLoadWorker, database: Database) -> None:
+        if worker is not self._worker:
+            database.close()
+            return
+        self._finish()
+        self.loaded.emit(database)
+
+    def _on_failed(self, worker: _DatabaseLoadWorker, message: str) -> None:
+        if worker is not self._worker:
+            return
+        self._finish()
+        self.failed.emit(message)
+
+    def _finish(self) -> None:
+        # The thread quits once the worker's run() returns; see _on_thread_finished.
+        if self._thread is not None and self._worker is not None:
+            self._retiring[self._thread] = self._worker
+            self._thread.quit()
+        self._thread = None
+        self._worker = None
+
+    def _on_thread_finished(self, thread: QThread) -> None:
+        worker = self._retiring.pop(thread, None)
+        if worker is not None:
+            worker.deleteLater()
+        thread.deleteLater()
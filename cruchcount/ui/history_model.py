@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import Any
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt
+
+from cruchcount.db import Database
+from cruchcount.history import SaleCursor, SaleFilter
+from cruchcount.money import format_cents
+
+HISTORY_HEADERS = ("单号", "时间", "收银台", "件数", "金额")
+HISTORY_PAGE_SIZE = 200
+# Pages whose rows are held at once; the others are read again when shown.
+HISTORY_CACHED_PAGES = 8
+
+
+class SalesHistoryModel(QAbstractTableModel):
+    # Rows arrive a page at a time as the view scrolls; each page is a keyset
+    # query that continues after the last sale of the page before it, so
+    # loading page 1000 costs the same as loading page 1. Only the cursor each
+    # page starts at is kept for every page scrolled through; the rows of at
+    # most HISTORY_CACHED_PAGES pages are held, and the page farthest from the
+    # one being shown is dropped and read again from its cursor when needed.
+    def __init__(self, database: Database, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._database = database
+        self._filter = SaleFilter()
+        self._starts: list[SaleCursor | None] = [None]
+        self._pages: dict[int, list[dict[str, Any]]] = {}
+        self._row_count = 0
+        self._has_more = False
+
+    def set_database(self, database: Database) -> None:
+        self._database = database
+        self.set_filter(self._filter)
+
+    def set_filter(self, sale_filter: SaleFilter) -> None:
+        self.beginResetModel()
+        self._filter = sale_filter
+        self._starts = [None]
+        self._pages = {}
+        self._row_count = 0
+        self._has_more = True
+        self.endResetModel()
+        self.fetchMore()
+
+    def sale(self, row: int) -> dict[str, Any] | None:
+        if not 0 <= row < self._row_count:
+            return None
+        page = self._page(row // HISTORY_PAGE_SIZE)
+        offset = row % HISTORY_PAGE_SIZE
+        return page[offset] if offset < len(page) else None
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HISTORY_HEADERS)
+
+    def headerData(
+        self,
+        section: int,
+        orientation: Qt.Orientation,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return HISTORY_HEADERS[section]
+        return str(section + 1)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        sale = self.sale(index.row())
+        if sale is None:
+            return None
+        column = index.column()
+        if role == Qt.ItemDataRole.TextAlignmentRole and column >= 3:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if column == 0:
+            return str(sale["id"])
+        if column == 1:
+            return sale["created_at"]
+        if column == 2:
+            return sale["lane_id"]
+        if column == 3:
+            return str(sale["total_quantity"])
+        if column == 4:
+            return format_cents(sale["total_cents"])
+        return None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if not self.canFetchMore(parent):
+            return
+        page = self._page(len(self._starts) - 1)
+        self._has_more = len(page) == HISTORY_PAGE_SIZE
+        if not page:
+            return
+        if self._has_more:
+            last = page[-1]
+            self._starts.append((last["created_at"], last["id"]))
+        first = self._row_count
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._row_count += len(page)
+        self.endInsertRows()
+
+    def _page(self, number: int) -> list[dict[str, Any]]:
+        page = self._pages.get(number)
+        if page is None:
+            page = self._database.sales_page(
+                self._filter, self._starts[number], HISTORY_PAGE_SIZE
+            )
+            self._pages[number] = page
+            while len(self._pages) > HISTORY_CACHED_PAGES:
+                del self._pages[max(self._pages, key=lambda kept: abs(kept - number))]
+        return page
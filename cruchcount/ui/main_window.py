@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from pathlib import Path
 
 from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QCloseEvent, QKeySequence, QShortcut
 from PyQt6.QtWidgets import (
     QFileDialog,
     QHBoxLayout,
+    QLabel,
     QMainWindow,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QStackedWidget,
     QVBoxLayout,
@@ -15,15 +19,16 @@ from PyQt6.QtWidgets import (
 )
 
 from cruchcount.db import Database
+from cruchcount.maintenance import MaintenanceScheduler
+from cruchcount.ui.database_loader import DatabaseLoader
 from cruchcount.ui.pages.cart_page import CartPage
-from cruchcount.ui.pages.inventory_page import InventoryPage
 
 
 class MainWindow(QMainWindow):
     def __init__(self, database: Database) -> None:
         super().__init__()
         self.database = database
-        self.setWindowTitle("CruchCount")
+        self.setWindowTitle(f"CruchCount - 收银台 {database.lane_id}")
         self.resize(1180, 760)
         self.setStyleSheet(
             """
@@ -37,7 +42,7 @@ class MainWindow(QMainWindow):
                 min-height: 42px;
                 padding: 0 14px;
             }
-            QTableWidget {
+            QTableView {
                 font-size: 15px;
             }
             QHeaderView::section {
@@ -55,28 +60,95 @@ class MainWindow(QMainWindow):
         nav_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.inventory_button = QPushButton("入库")
         self.cart_button = QPushButton("购物车")
+        self.report_button = QPushButton("报表")
+        self.history_button = QPushButton("销售记录")
         self.database_button = QPushButton("选择数据库")
         nav_layout.addWidget(self.inventory_button)
         nav_layout.addWidget(self.cart_button)
+        nav_layout.addWidget(self.report_button)
+        nav_layout.addWidget(self.history_button)
         nav_layout.addWidget(self.database_button)
         nav_layout.addStretch(1)
 
         self.stack = QStackedWidget()
-        self.inventory_page = InventoryPage(database=self.database)
+        self.pages: dict[str, QWidget] = {}
+        self._page_factories: dict[str, Callable[[], QWidget]] = {
+            "inventory": self._create_inventory_page,
+            "report": self._create_report_page,
+            "history": self._create_history_page,
+            "diagnostics": self._create_diagnostics_page,
+        }
         self.cart_page = CartPage(database=self.database)
-        self.stack.addWidget(self.inventory_page)
+        self.pages["cart"] = self.cart_page
         self.stack.addWidget(self.cart_page)
+        self.maintenance = MaintenanceScheduler(self.database)
+        self.cart_page.activity.connect(self.maintenance.note_activity)
+        self.maintenance.start()
 
-        self.inventory_button.clicked.connect(
-            lambda: self.stack.setCurrentWidget(self.inventory_page)
-        )
-        self.cart_button.clicked.connect(lambda: self.stack.setCurrentWidget(self.cart_page))
+        self.inventory_button.clicked.connect(lambda: self.show_page("inventory"))
+        self.cart_button.clicked.connect(lambda: self.show_page("cart"))
+        self.report_button.clicked.connect(lambda: self.show_page("report"))
+        self.history_button.clicked.connect(lambda: self.show_page("history"))
         self.database_button.clicked.connect(self._choose_database_file)
+        diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        diagnostics_shortcut.activated.connect(lambda: self.show_page("diagnostics"))
 
         layout.addLayout(nav_layout, 0)
         layout.addWidget(self.stack, 1)
         self.stack.setCurrentWidget(self.cart_page)
 
+        self.database_loader = DatabaseLoader(self)
+        self.database_loader.progress.connect(self._on_database_progress)
+        self.database_loader.loaded.connect(self._on_database_loaded)
+        self.database_loader.failed.connect(self._on_database_failed)
+        self.load_label = QLabel()
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setMaximumWidth(240)
+        self.statusBar().addWidget(self.load_label)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.load_progress.hide()
+
+    def page(self, key: str) -> QWidget:
+        page = self.pages.get(key)
+        if page is None:
+            page = self._page_factories[key]()
+            self.pages[key] = page
+            self.stack.addWidget(page)
+        return page
+
+    def show_page(self, key: str) -> None:
+        self.stack.setCurrentWidget(self.page(key))
+
+    def closeEvent(self, event: QCloseEvent) -> None:  # type: ignore[override]
+        self.database_loader.shutdown()
+        self.maintenance.stop()
+        for page in self.pages.values():
+            shutdown = getattr(page, "shutdown", None)
+            if shutdown is not None:
+                shutdown()
+        super().closeEvent(event)
+
+    def _create_inventory_page(self) -> QWidget:
+        from cruchcount.ui.pages.inventory_page import InventoryPage
+
+        return InventoryPage(database=self.database)
+
+    def _create_report_page(self) -> QWidget:
+        from cruchcount.ui.pages.report_page import ReportPage
+
+        return ReportPage(database=self.database)
+
+    def _create_history_page(self) -> QWidget:
+        from cruchcount.ui.pages.history_page import HistoryPage
+
+        return HistoryPage(database=self.database)
+
+    def _create_diagnostics_page(self) -> QWidget:
+        from cruchcount.ui.pages.diagnostics_page import DiagnosticsPage
+
+        return DiagnosticsPage(database=self.database)
+
     def _choose_database_file(self) -> None:
         selected_path, _ = QFileDialog.getOpenFileName(
             self,
@@ -94,16 +166,32 @@ class MainWindow(QMainWindow):
         if new_path == self.database.path:
             return
 
-        try:
-            new_database = Database(new_path)
-            new_database.init_schema()
-        except Exception as exc:
-            QMessageBox.critical(self, "错误", f"无法打开数据库文件：\n{exc}")
-            return
+        # The current database keeps serving scans until the new one is ready.
+        self.database_button.setEnabled(False)
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.database_loader.load(new_path)
+
+    def _on_database_progress(self, text: str, percent: int) -> None:
+        self.load_label.setText(text)
+        self.load_progress.setValue(percent)
 
+    def _on_database_loaded(self, new_database: Database) -> None:
+        self._end_database_load()
         old_database = self.database
         self.database = new_database
-        self.inventory_page.set_database(new_database)
-        self.cart_page.set_database(new_database)
+        self.maintenance.set_database(new_database)
+        for page in self.pages.values():
+            page.set_database(new_database)  # type: ignore[attr-defined]
+        old_database.clear_product_cache()
         old_database.close()
-        QMessageBox.information(self, "成功", f"已切换数据库：\n{new_path}")
+        QMessageBox.information(self, "成功", f"已切换数据库：\n{new_database.path}")
+
+    def _on_database_failed(self, message: str) -> None:
+        self._end_database_load()
+        QMessageBox.critical(self, "错误", f"无法打开数据库文件：\n{message}")
+
+    def _end_database_load(self) -> None:
+        self.load_label.clear()
+        self.load_progress.hide()
+        self.database_button.setEnabled(True)
@@ -1,50 +1,66 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from functools import partial
-
-from PyQt6.QtCore import QStringListModel, Qt
-from PyQt6.QtGui import QIntValidator
+import csv
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from PyQt6.QtCore import QEvent, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QIntValidator, QShowEvent
 from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QApplication,
+    QCheckBox,
     QComboBox,
-    QCompleter,
     QDialog,
     QDialogButtonBox,
     QDoubleSpinBox,
+    QFileDialog,
     QFormLayout,
     QGroupBox,
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QMenu,
     QMessageBox,
     QPushButton,
+    QStyle,
     QStyledItemDelegate,
-    QTableWidget,
-    QTableWidgetItem,
+    QStyleOptionButton,
+    QTableView,
     QVBoxLayout,
     QWidget,
 )
 
+from cruchcount.cart import MAX_SCAN_QUANTITY, parse_scan
+from cruchcount.catalog_io import read_order_file
 from cruchcount.db import Database
-
-
-@dataclass
-class CartItem:
-    barcode: str
-    name: str
-    price: float
-    quantity: int
-
-    @property
-    def subtotal(self) -> float:
-        return self.price * self.quantity
+from cruchcount.instrumentation import timed
+from cruchcount.journal import CartJournal, journal_path_for, replay
+from cruchcount.money import cents_to_float, format_cents, to_cents
+from cruchcount.pricing import PricingEngine
+from cruchcount.trace import TraceRecorder, trace_path_from_env
+from cruchcount.ui.cart_model import (
+    ACTION_COLUMN,
+    QUANTITY_COLUMN,
+    CartTableModel,
+)
+from cruchcount.ui.scan_queue import ScanQueue
+from cruchcount.ui.suggestions import (
+    ProductSuggestionModel,
+    SuggestionEngine,
+    attach_suggestions,
+)
 
 
 class UnknownProductDialog(QDialog):
-    def __init__(self, barcode: str, parent: QWidget | None = None) -> None:
+    def __init__(self, barcode: str, quantity: int = 1, parent: QWidget | None = None) -> None:
         super().__init__(parent)
         self.setWindowTitle("该商品未入库")
         self.barcode = barcode
+        self.quantity = quantity
+        self.quantity_label = QLabel(str(quantity))
 
         self.price_input = QDoubleSpinBox()
         self.price_input.setDecimals(2)
@@ -54,6 +70,7 @@ class UnknownProductDialog(QDialog):
 
         form = QFormLayout()
         form.addRow("条码", QLabel(barcode))
+        form.addRow("数量", self.quantity_label)
         form.addRow("临时售价", self.price_input)
 
         buttons = QDialogButtonBox(
@@ -69,8 +86,12 @@ class UnknownProductDialog(QDialog):
         layout.addWidget(buttons)
 
     @property
-    def selected_price(self) -> float:
-        return float(self.price_input.value())
+    def selected_price_cents(self) -> int:
+        return to_cents(self.price_input.value())
+
+    def add_quantity(self, quantity: int) -> None:
+        self.quantity += quantity
+        self.quantity_label.setText(str(self.quantity))
 
 
 class QuantityItemDelegate(QStyledItemDelegate):
@@ -86,14 +107,59 @@ class QuantityItemDelegate(QStyledItemDelegate):
         self.closeEditor.emit(editor, QStyledItemDelegate.EndEditHint.NoHint)
 
 
+class RemoveButtonDelegate(QStyledItemDelegate):
+    remove_requested = pyqtSignal(int)
+
+    def paint(self, painter, option, index) -> None:  # type: ignore[override]
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(4, 3, -4, -3)
+        button.text = str(index.data())
+        button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+        widget = option.widget
+        style = widget.style() if widget is not None else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, widget)
+
+    def editorEvent(self, event, model, option, index) -> bool:  # type: ignore[override]
+        if event.type() == QEvent.Type.MouseButtonRelease:
+            if event.button() == Qt.MouseButton.LeftButton and option.rect.contains(
+                event.position().toPoint()
+            ):
+                self.remove_requested.emit(index.row())
+            return True
+        return event.type() in (
+            QEvent.Type.MouseButtonPress,
+            QEvent.Type.MouseButtonDblClick,
+        )
+
+
 class CartPage(QWidget):
+    # Any scan, keystroke or cart change; background maintenance waits until
+    # this has been quiet for a while.
+    activity = pyqtSignal()
+
     def __init__(self, database: Database) -> None:
         super().__init__()
         self.database = database
-        self.cart_items: dict[str, CartItem] = {}
+        self.suggestions = SuggestionEngine(database, self)
+        self.suggestion_model = ProductSuggestionModel(self.suggestions, self)
+        self.suggestion_model.results_applied.connect(self._apply_suggestions)
+        self._suggestions_loaded = False
+        self.cart_model = CartTableModel(self)
+        self.pricing = PricingEngine(database.promotions_for)
+        self.cart_model.set_pricing(self.pricing)
+        self.cart_model.totals_changed.connect(self._refresh_totals)
+        self.cart_model.totals_changed.connect(self.activity)
+        self.cart_model.quantity_rejected.connect(self._on_quantity_rejected)
+        self.cart_model.quantity_edited.connect(self._on_quantity_edited)
+        self.scan_queue = ScanQueue(database.get_products_by_barcodes, self)
+        self.scan_queue.batch_resolved.connect(self._on_batch_resolved)
+        self.scan_queue.lookup_failed.connect(self._on_scan_lookup_failed)
+        self._unknown_pending: OrderedDict[str, int] = OrderedDict()
+        self._unknown_dialog: UnknownProductDialog | None = None
         self.scan_input = QLineEdit()
-        self.scan_input.setPlaceholderText("扫码枪输入后回车，支持连续扫码")
+        self.scan_input.setPlaceholderText("扫码枪输入后回车，支持连续扫码；整箱可输入 24*条码")
         self.scan_input.returnPressed.connect(self._on_scan_submitted)
+        self.scan_input.textEdited.connect(self.activity)
 
         self.manual_combo = QComboBox()
         self.manual_combo.setEditable(True)
@@ -102,22 +168,25 @@ class CartPage(QWidget):
         self.manual_combo.lineEdit().textEdited.connect(self._update_suggestions)
         self.manual_combo.lineEdit().returnPressed.connect(self._on_manual_submitted)
 
-        self.completer_model = QStringListModel()
-        completer = QCompleter(self.completer_model, self)
-        completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-        completer.setFilterMode(Qt.MatchFlag.MatchContains)
-        self.manual_combo.setCompleter(completer)
+        attach_suggestions(self.manual_combo, self.suggestion_model)
 
         add_manual_button = QPushButton("手动加入")
         add_manual_button.clicked.connect(self._on_manual_submitted)
 
-        self.table = QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels(["条码", "商品", "单价", "数量", "小计", "操作"])
+        self.table = QTableView()
+        self.table.setModel(self.cart_model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.setItemDelegateForColumn(3, QuantityItemDelegate(self.table))
-        self.table.cellChanged.connect(self._on_cell_changed)
+        self.table.setItemDelegateForColumn(QUANTITY_COLUMN, QuantityItemDelegate(self.table))
+        remove_delegate = RemoveButtonDelegate(self.table)
+        remove_delegate.remove_requested.connect(self._remove_item_at_row)
+        self.table.setItemDelegateForColumn(ACTION_COLUMN, remove_delegate)
 
         self.total_qty_label = QLabel("总件数：0")
+        self.total_discount_label = QLabel()
+        self.total_discount_label.setVisible(False)
+        self.member_check = QCheckBox("会员")
+        self.member_check.toggled.connect(self._on_member_toggled)
         self.total_amount_label = QLabel("总金额：¥0.00")
         self.total_amount_label.setStyleSheet(
             "color: #d32f2f; font-size: 20px; font-weight: 700;"
@@ -126,6 +195,13 @@ class CartPage(QWidget):
         checkout_button.clicked.connect(self._checkout)
         clear_button = QPushButton("清空购物车")
         clear_button.clicked.connect(self._clear_cart)
+        park_button = QPushButton("挂单")
+        park_button.clicked.connect(self.park_cart)
+        self.parked_menu = QMenu(self)
+        self.resume_button = QPushButton("取单")
+        self.resume_button.setMenu(self.parked_menu)
+        load_order_button = QPushButton("导入清单")
+        load_order_button.clicked.connect(self._choose_order_file)
 
         input_group = QGroupBox("加入购物车")
         input_layout = QFormLayout()
@@ -137,9 +213,14 @@ class CartPage(QWidget):
         input_group.setLayout(input_layout)
 
         footer = QHBoxLayout()
+        footer.addWidget(self.member_check)
         footer.addWidget(self.total_qty_label)
+        footer.addWidget(self.total_discount_label)
         footer.addWidget(self.total_amount_label)
         footer.addStretch(1)
+        footer.addWidget(park_button)
+        footer.addWidget(self.resume_button)
+        footer.addWidget(load_order_button)
         footer.addWidget(checkout_button)
         footer.addWidget(clear_button)
 
@@ -148,168 +229,369 @@ class CartPage(QWidget):
         layout.addWidget(self.table)
         layout.addLayout(footer)
 
-        self._update_suggestions("")
+        self.journal = self._open_journal(database)
+        self._refresh_parked()
+        trace_path = trace_path_from_env(database.path, database.lane_id)
+        self.trace = TraceRecorder(trace_path, database.lane_id) if trace_path else None
         self.scan_input.setFocus()
 
+    def showEvent(self, event: QShowEvent) -> None:  # type: ignore[override]
+        super().showEvent(event)
+        if not self._suggestions_loaded:
+            self._suggestions_loaded = True
+            QTimer.singleShot(0, lambda: self.suggestions.request("", immediate=True))
+
+    def shutdown(self) -> None:
+        if self.trace is not None:
+            self.trace.close()
+        self.suggestions.stop()
+        self.cart_model.set_journal(None)
+        self.journal.close()
+
     def set_database(self, database: Database) -> None:
         self.database = database
-        self.cart_items.clear()
-        self._render_table()
-        self._update_suggestions("")
+        self.suggestions.set_database(database)
+        self.scan_queue.set_resolver(database.get_products_by_barcodes)
+        self.scan_queue.clear()
+        self.pricing.set_loader(database.promotions_for)
+        self._discard_unknown_products()
+        self.cart_model.clear()
+        self.cart_model.set_journal(None)
+        self.journal.close()
+        self.journal = self._open_journal(database)
+        self._refresh_parked()
+        self.suggestions.request("", immediate=True)
         self.scan_input.setFocus()
 
+    def _open_journal(self, database: Database) -> CartJournal:
+        # Restores whatever cart was open when the app last stopped, crash or not.
+        path = journal_path_for(database.path, database.lane_id)
+        items = replay(path)
+        journal = CartJournal(path)
+        journal.compact(items)
+        self.cart_model.restore(items)
+        self.cart_model.set_journal(journal)
+        return journal
+
+    # Only queues the scan; the lookup and cart update are timed as
+    # db.get_products_by_barcodes and cart.apply_scan_batch.
+    @timed("cart.enqueue_scan")
     def _on_scan_submitted(self) -> None:
-        barcode = self.scan_input.text().strip()
-        if not barcode:
-            return
+        text = self.scan_input.text()
         self.scan_input.clear()
-        self._add_by_barcode(barcode)
+        self.submit_scan(text)
         self.scan_input.setFocus()
 
+    def submit_scan(self, text: str) -> bool:
+        self.activity.emit()
+        if self.trace is not None and text.strip():
+            self.trace.record("scan", text=text)
+        scan = self._parse_scan(text)
+        if scan is None:
+            return False
+        self.scan_queue.enqueue(*scan)
+        return True
+
     def _on_manual_submitted(self) -> None:
         text = self.manual_combo.currentText().strip()
-        if not text:
+        if not text or not self.submit_manual(text.split(" | ", 1)[0]):
             return
-        barcode = text.split(" | ", 1)[0].strip()
-        self._add_by_barcode(barcode)
         self.manual_combo.lineEdit().clear()
-        self._update_suggestions("")
+        self.suggestions.request("", immediate=True)
         self.scan_input.setFocus()
 
-    def _update_suggestions(self, query: str) -> None:
-        products = self.database.search_products(query, limit=20)
-        display_items = [
-            f"{item['barcode']} | {item['name']} | ¥{item['price']:.2f}" for item in products
-        ]
-        self.completer_model.setStringList(display_items)
-        self.manual_combo.clear()
-        self.manual_combo.addItems(display_items)
-        self.manual_combo.setEditText(query)
-
-    def _add_by_barcode(self, barcode: str) -> None:
-        product = self.database.get_product_by_barcode(barcode)
-        if product is None:
-            product = self._resolve_unknown_product(barcode)
-            if product is None:
-                return
-
-        if barcode in self.cart_items:
-            self.cart_items[barcode].quantity += 1
-        else:
-            self.cart_items[barcode] = CartItem(
-                barcode=barcode,
-                name=str(product["name"]),
-                price=float(product["price"]),
-                quantity=1,
-            )
-        self._render_table()
-
-    def _resolve_unknown_product(self, barcode: str) -> dict[str, str | float] | None:
-        dialog = UnknownProductDialog(barcode=barcode, parent=self)
-        if dialog.exec() != QDialog.DialogCode.Accepted:
+    def submit_manual(self, text: str) -> bool:
+        self.activity.emit()
+        if self.trace is not None:
+            self.trace.record("manual", text=text)
+        scan = self._parse_scan(text)
+        if scan is None:
+            return False
+        self.scan_queue.enqueue(*scan)
+        return True
+
+    def _parse_scan(self, text: str) -> tuple[str, int] | None:
+        try:
+            barcode, quantity = parse_scan(text)
+        except ValueError:
+            QMessageBox.warning(self, "提示", f"数量必须是 1 到 {MAX_SCAN_QUANTITY} 之间的整数")
             return None
+        return (barcode, quantity) if barcode else None
 
-        return {
-            "barcode": barcode,
-            "name": f"临时商品-{barcode[-4:] if len(barcode) >= 4 else barcode}",
-            "price": dialog.selected_price,
-        }
-
-    def _render_table(self) -> None:
-        items = list(self.cart_items.values())
-        self.table.blockSignals(True)
-        self.table.setRowCount(len(items))
-
-        total_qty = 0
-        total_amount = 0.0
-        for row, item in enumerate(items):
-            total_qty += item.quantity
-            total_amount += item.subtotal
-
-            barcode_item = QTableWidgetItem(item.barcode)
-            name_item = QTableWidgetItem(item.name)
-            price_item = QTableWidgetItem(f"¥{item.price:.2f}")
-            quantity_item = QTableWidgetItem(str(item.quantity))
-            subtotal_item = QTableWidgetItem(f"¥{item.subtotal:.2f}")
-
-            barcode_item.setFlags(barcode_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            name_item.setFlags(name_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            price_item.setFlags(price_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            subtotal_item.setFlags(subtotal_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            quantity_item.setFlags(
-                quantity_item.flags() | Qt.ItemFlag.ItemIsEditable | Qt.ItemFlag.ItemIsEnabled
+    def _choose_order_file(self) -> None:
+        selected_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "导入购物清单",
+            str(self.database.path.parent),
+            "购物清单 (*.csv *.tsv *.txt);;All Files (*)",
+        )
+        if selected_path:
+            self.load_order_file(Path(selected_path))
+        self.scan_input.setFocus()
+
+    def load_order_file(self, path: Path) -> int:
+        # Every line goes through the scan queue as one batch: one lookup query
+        # and one cart update however long the list is. Unknown barcodes get
+        # the usual pricing dialog.
+        self.activity.emit()
+        try:
+            order = read_order_file(path)
+        except (OSError, UnicodeDecodeError, csv.Error) as exc:
+            QMessageBox.warning(self, "提示", f"无法读取该清单：\n{exc}")
+            return 0
+        self.scan_queue.enqueue_many(order.lines)
+        self.scan_queue.drain()
+        if order.rejected:
+            lines = [f"已加入 {len(order.lines)} 行，跳过 {len(order.rejected)} 行"]
+            lines.extend(
+                f"第 {rejected.line_no} 行：{rejected.reason}" for rejected in order.rejected[:10]
             )
+            QMessageBox.warning(self, "导入清单", "\n".join(lines))
+        return len(order.lines)
+
+    @timed("cart.update_suggestions")
+    def _update_suggestions(self, query: str) -> None:
+        self.activity.emit()
+        self.suggestions.request(query)
+
+    def _apply_suggestions(self, query: str) -> None:
+        if self.manual_combo.currentText() != query:
+            self.manual_combo.setEditText(query)
+
+    @timed("cart.apply_scan_batch")
+    def _on_batch_resolved(
+        self,
+        known: list[tuple[dict[str, Any], int]],
+        unknown: list[tuple[str, int]],
+    ) -> None:
+        entries = [
+            (str(product["barcode"]), str(product["name"]), int(product["price_cents"]), quantity)
+            for product, quantity in known
+        ]
+        for barcode, quantity in unknown:
+            priced_item = self.cart_model.item_for(barcode)
+            if priced_item is not None:
+                entries.append((barcode, priced_item.name, priced_item.price_cents, quantity))
+            else:
+                self._queue_unknown_product(barcode, quantity)
+        self.cart_model.add_products(entries)
+
+    def _on_scan_lookup_failed(self, _message: str) -> None:
+        QMessageBox.critical(self, "错误", "本地数据读取失败，扫码已保留，请稍后重试")
+
+    def _queue_unknown_product(self, barcode: str, quantity: int) -> None:
+        dialog = self._unknown_dialog
+        if dialog is not None and dialog.barcode == barcode:
+            dialog.add_quantity(quantity)
+            return
+        self._unknown_pending[barcode] = self._unknown_pending.get(barcode, 0) + quantity
+        self._show_next_unknown_product()
+
+    def _show_next_unknown_product(self) -> None:
+        if self._unknown_dialog is not None or not self._unknown_pending:
+            return
 
-            self.table.setItem(row, 0, barcode_item)
-            self.table.setItem(row, 1, name_item)
-            self.table.setItem(row, 2, price_item)
-            self.table.setItem(row, 3, quantity_item)
-            self.table.setItem(row, 4, subtotal_item)
+        barcode, quantity = self._unknown_pending.popitem(last=False)
+        dialog = UnknownProductDialog(barcode=barcode, quantity=quantity, parent=self)
+        # Shown without taking focus so the scanner keeps typing into scan_input.
+        dialog.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.finished.connect(lambda result, d=dialog: self._on_unknown_finished(d, result))
+        self._unknown_dialog = dialog
+        dialog.show()
+
+    def answer_unknown_product(self, barcode: str, price_cents: int | None) -> bool:
+        # Prices (or, with None, cancels) the open dialog for `barcode` exactly as
+        # the cashier would; lets a trace replay get past unknown products.
+        dialog = self._unknown_dialog
+        if dialog is None or dialog.barcode != barcode:
+            return False
+        if price_cents is None:
+            dialog.reject()
+        else:
+            dialog.price_input.setValue(cents_to_float(price_cents))
+            dialog.accept()
+        return True
 
-            remove_button = QPushButton("移除")
-            remove_button.clicked.connect(partial(self._remove_item_by_barcode, item.barcode))
-            self.table.setCellWidget(row, 5, remove_button)
+    def _on_unknown_finished(self, dialog: UnknownProductDialog, result: int) -> None:
+        if self._unknown_dialog is not dialog:
+            return
+        self._unknown_dialog = None
+        accepted = result == QDialog.DialogCode.Accepted
+        if self.trace is not None:
+            self.trace.record(
+                "unknown",
+                barcode=dialog.barcode,
+                price_cents=dialog.selected_price_cents if accepted else None,
+            )
+        if accepted:
+            barcode = dialog.barcode
+            self.cart_model.add_product(
+                barcode=barcode,
+                name=f"临时商品-{barcode[-4:] if len(barcode) >= 4 else barcode}",
+                price_cents=dialog.selected_price_cents,
+                quantity=dialog.quantity,
+            )
+        self._show_next_unknown_product()
+        self.scan_input.setFocus()
 
-        self.total_qty_label.setText(f"总件数：{total_qty}")
-        self.total_amount_label.setText(f"总金额：¥{total_amount:.2f}")
-        self.table.blockSignals(False)
+    def _discard_unknown_products(self) -> None:
+        self._unknown_pending.clear()
+        dialog = self._unknown_dialog
+        self._unknown_dialog = None
+        if dialog is not None:
+            dialog.close()
+
+    def _refresh_totals(self) -> None:
+        discount = self.cart_model.total_discount_cents()
+        self.total_qty_label.setText(f"总件数：{self.cart_model.total_quantity()}")
+        self.total_discount_label.setText(f"优惠：-{format_cents(discount)}")
+        self.total_discount_label.setVisible(discount > 0)
+        self.total_amount_label.setText(f"总金额：{format_cents(self.cart_model.payable_cents())}")
+        # A new customer (cleared, resumed or restored cart) starts as a non-member.
+        if self.member_check.isChecked() != self.cart_model.is_member():
+            self.member_check.blockSignals(True)
+            self.member_check.setChecked(self.cart_model.is_member())
+            self.member_check.blockSignals(False)
+
+    def _on_member_toggled(self, member: bool) -> None:
+        self.activity.emit()
+        if self.trace is not None:
+            self.trace.record("member", member=member)
+        self.cart_model.set_member(member)
+        self.scan_input.setFocus()
 
     def _clear_cart(self) -> None:
-        if not self.cart_items:
+        if self.cart_model.is_empty():
             return
         answer = QMessageBox.question(self, "确认", "确定要清空购物车吗？")
         if answer == QMessageBox.StandardButton.Yes:
-            self.cart_items.clear()
-            self._render_table()
+            if self.trace is not None:
+                self.trace.record("clear")
+            self.cart_model.clear()
             self.scan_input.setFocus()
 
-    def _remove_item_by_barcode(self, barcode: str) -> None:
-        if barcode in self.cart_items:
-            del self.cart_items[barcode]
-            self._render_table()
+    def _remove_item_at_row(self, row: int) -> None:
+        if 0 <= row < self.cart_model.rowCount():
+            barcode = self.cart_model.barcode_at(row)
+            if self.trace is not None:
+                self.trace.record("remove", barcode=barcode)
+            self.cart_model.remove_barcode(barcode)
         self.scan_input.setFocus()
 
-    def _on_cell_changed(self, row: int, column: int) -> None:
-        if column != 3:
-            return
+    def _on_quantity_edited(self, barcode: str, quantity: int) -> None:
+        if self.trace is not None:
+            self.trace.record("quantity", barcode=barcode, quantity=quantity)
+
+    def _on_quantity_rejected(self) -> None:
+        QMessageBox.warning(self, "提示", "数量必须是大于 0 的整数")
+
+    def _settle_scans(self) -> bool:
+        # Applies queued scans; False while some could not be looked up or
+        # unknown products still await a price.
+        if not self.scan_queue.drain():
+            return False
+        if self._unknown_dialog is not None or self._unknown_pending:
+            QMessageBox.information(self, "提示", "还有未入库商品等待定价，请先处理")
+            return False
+        return True
+
+    def park_cart(self) -> int | None:
+        # Sets the current cart aside so the next customer can be served.
+        self.activity.emit()
+        if not self._settle_scans():
+            return None
+        if self.cart_model.is_empty():
+            QMessageBox.information(self, "提示", "购物车为空，无需挂单")
+            return None
+        try:
+            parked_id = self.database.park_cart(self.cart_model.items())
+        except sqlite3.Error:
+            QMessageBox.critical(self, "错误", "本地数据写入失败，请重试")
+            return None
+        # Parked first, cleared second: a crash in between leaves a duplicate, not a loss.
+        self.cart_model.clear()
+        self._refresh_parked()
+        self.scan_input.setFocus()
+        return parked_id
+
+    def resume_parked(self, parked_id: int) -> bool:
+        # A cart in progress is parked in its place, so switching is one click.
+        self.activity.emit()
+        if not self._settle_scans():
+            return False
+        if not self.cart_model.is_empty() and self.park_cart() is None:
+            return False
+        try:
+            items = self.database.parked_cart_items(parked_id)
+            if items is None:
+                QMessageBox.information(self, "提示", "该挂单已被取走")
+            else:
+                self.cart_model.restore(items)
+                self.journal.compact(items)
+                self.database.delete_parked_cart(parked_id)
+        except sqlite3.Error:
+            QMessageBox.critical(self, "错误", "本地数据读取失败，请重试")
+            items = None
+        self._refresh_parked()
+        self.scan_input.setFocus()
+        return items is not None
+
+    def _refresh_parked(self) -> None:
+        carts = self.database.parked_carts()
+        self.parked_menu.clear()
+        for cart in carts:
+            action = self.parked_menu.addAction(
+                f"{cart['parked_at'][11:16]}  {cart['total_quantity']} 件  "
+                f"{format_cents(cart['total_cents'])}"
+            )
+            action.triggered.connect(lambda _checked, i=cart["id"]: self.resume_parked(i))
+        self.resume_button.setText(f"取单 ({len(carts)})" if carts else "取单")
+        self.resume_button.setEnabled(bool(carts))
+
+    def complete_checkout(self) -> int:
+        # Records the cart as a sale and empties it, without any confirmation;
+        # _checkout asks first, a trace replay calls this directly.
+        if not self.scan_queue.drain():
+            raise sqlite3.OperationalError("queued scans could not be looked up")
+        sale_id = self.database.record_sale(
+            self.cart_model.items(), self.cart_model.applied_discounts()
+        )
+        # Only a sale that was written counts; a failed one is retried and recorded then.
+        if self.trace is not None:
+            self.trace.record("checkout")
+        # Clearing compacts the journal, so do it before any dialog waits on the user.
+        self.cart_model.clear()
+        return sale_id
 
-        barcode_item = self.table.item(row, 0)
-        quantity_item = self.table.item(row, 3)
-        if barcode_item is None or quantity_item is None:
+    def _checkout(self) -> None:
+        self.activity.emit()
+        if not self._settle_scans():
             return
-
-        barcode = barcode_item.text()
-        cart_item = self.cart_items.get(barcode)
-        if cart_item is None:
+        if self.cart_model.is_empty():
+            QMessageBox.information(self, "提示", "购物车为空，无法结账")
             return
 
-        text = quantity_item.text().strip()
-        try:
-            quantity = int(text)
-            if quantity <= 0:
-                raise ValueError
-        except ValueError:
-            QMessageBox.warning(self, "提示", "数量必须是大于 0 的整数")
-            self._render_table()
+        total_qty = self.cart_model.total_quantity()
+        discount = self.cart_model.total_discount_cents()
+        total_amount = format_cents(self.cart_model.payable_cents())
+        if discount:
+            summary = (
+                f"共 {total_qty} 件，原价 {format_cents(self.cart_model.total_amount_cents())}，"
+                f"优惠 {format_cents(discount)}，应收 {total_amount}。"
+            )
+        else:
+            summary = f"共 {total_qty} 件，合计 {total_amount}。"
+        answer = QMessageBox.question(self, "确认结账", f"{summary}\n确认结账吗？")
+        if answer != QMessageBox.StandardButton.Yes:
             return
 
-        cart_item.quantity = quantity
-        self._render_table()
-
-    def _checkout(self) -> None:
-        if not self.cart_items:
-            QMessageBox.information(self, "提示", "购物车为空，无法结账")
+        try:
+            sale_id = self.complete_checkout()
+        except (sqlite3.Error, ValueError):
+            QMessageBox.critical(self, "错误", "本地数据写入失败，请重试")
             return
-
-        total_qty = sum(item.quantity for item in self.cart_items.values())
-        total_amount = sum(item.subtotal for item in self.cart_items.values())
-        answer = QMessageBox.question(
-            self,
-            "确认结账",
-            f"共 {total_qty} 件，合计 ¥{total_amount:.2f}。\n确认结账吗？",
+        QMessageBox.information(
+            self, "结账完成", f"单号：{sale_id}\n实收金额：{total_amount}"
         )
-        if answer == QMessageBox.StandardButton.Yes:
-            QMessageBox.information(self, "结账完成", f"实收金额：¥{total_amount:.2f}")
-            self.cart_items.clear()
-            self._render_table()
-            self.scan_input.setFocus()
+        self.scan_input.setFocus()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QHideEvent, QShowEvent
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QCheckBox,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QMessageBox,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from cruchcount.db import Database
+from cruchcount.instrumentation import instrumentation
+
+REFRESH_INTERVAL_MS = 1000
+SUMMARY_COLUMNS = ("calls", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+
+
+class DiagnosticsPage(QWidget):
+    def __init__(self, database: Database) -> None:
+        super().__init__()
+        self.database = database
+
+        self.enabled_checkbox = QCheckBox("启用计时")
+        self.enabled_checkbox.setChecked(instrumentation.enabled)
+        self.enabled_checkbox.toggled.connect(self._set_enabled)
+        reset_button = QPushButton("清空")
+        reset_button.clicked.connect(self._reset)
+        dump_button = QPushButton("导出 JSON")
+        dump_button.clicked.connect(self._dump_json)
+
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(self.enabled_checkbox)
+        toolbar.addStretch(1)
+        toolbar.addWidget(reset_button)
+        toolbar.addWidget(dump_button)
+
+        self.cache_label = QLabel()
+        self.table = QTableWidget(0, len(SUMMARY_COLUMNS) + 1)
+        self.table.setHorizontalHeaderLabels(
+            ["操作", "调用次数", "p50 (ms)", "p95 (ms)", "p99 (ms)", "最大 (ms)"]
+        )
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(toolbar)
+        layout.addWidget(self.cache_label)
+        layout.addWidget(self.table, 1)
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+
+    def set_database(self, database: Database) -> None:
+        self.database = database
+        self.refresh()
+
+    def showEvent(self, event: QShowEvent) -> None:  # type: ignore[override]
+        super().showEvent(event)
+        self.refresh()
+        self._refresh_timer.start()
+
+    def hideEvent(self, event: QHideEvent) -> None:  # type: ignore[override]
+        self._refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self) -> None:
+        stats = self.database.cache_stats()
+        self.cache_label.setText(
+            f"商品缓存：命中 {stats['hits']}，未命中 {stats['misses']}，"
+            f"已缓存 {stats['size']}/{stats['capacity']}"
+        )
+
+        summaries = instrumentation.summaries()
+        self.table.setRowCount(len(summaries))
+        for row, (name, summary) in enumerate(summaries.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for column, key in enumerate(SUMMARY_COLUMNS, start=1):
+                value = summary.get(key)
+                text = "-" if value is None else str(value) if key == "calls" else f"{value:.3f}"
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
+    def _set_enabled(self, enabled: bool) -> None:
+        instrumentation.enabled = enabled
+
+    def _reset(self) -> None:
+        instrumentation.reset()
+        self.refresh()
+
+    def _dump_json(self) -> None:
+        selected_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "导出诊断数据",
+            str(self.database.path.parent / "diagnostics.json"),
+            "JSON (*.json)",
+        )
+        if not selected_path:
+            return
+        try:
+            instrumentation.dump_json(
+                Path(selected_path), extra={"product_cache": self.database.cache_stats()}
+            )
+        except OSError as exc:
+            QMessageBox.critical(self, "错误", f"导出失败：\n{exc}")
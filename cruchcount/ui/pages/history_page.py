@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from typing import Any
+
+from PyQt6.QtCore import QDate, QItemSelection, Qt
+from PyQt6.QtGui import QShowEvent
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QCheckBox,
+    QDateEdit,
+    QDoubleSpinBox,
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QSplitter,
+    QTableView,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from cruchcount.db import Database
+from cruchcount.history import SaleFilter
+from cruchcount.money import format_cents, to_cents
+from cruchcount.ui.history_model import SalesHistoryModel
+
+DEFAULT_RANGE_DAYS = 7
+
+
+def _amount_input() -> QDoubleSpinBox:
+    spin_box = QDoubleSpinBox()
+    spin_box.setDecimals(2)
+    spin_box.setRange(0, 999999.99)
+    spin_box.setPrefix("¥")
+    spin_box.setSpecialValueText("不限")
+    return spin_box
+
+
+class HistoryPage(QWidget):
+    def __init__(self, database: Database) -> None:
+        super().__init__()
+        self.database = database
+        self.history_model = SalesHistoryModel(database, self)
+
+        today = QDate.currentDate()
+        self.date_check = QCheckBox("日期")
+        self.date_check.setChecked(True)
+        self.start_date = QDateEdit(today.addDays(1 - DEFAULT_RANGE_DAYS))
+        self.start_date.setCalendarPopup(True)
+        self.start_date.setDisplayFormat("yyyy-MM-dd")
+        self.end_date = QDateEdit(today)
+        self.end_date.setCalendarPopup(True)
+        self.end_date.setDisplayFormat("yyyy-MM-dd")
+        self.date_check.toggled.connect(self.start_date.setEnabled)
+        self.date_check.toggled.connect(self.end_date.setEnabled)
+        self.min_amount = _amount_input()
+        self.max_amount = _amount_input()
+        self.barcode_input = QLineEdit()
+        self.barcode_input.setPlaceholderText("含该条码的小票")
+        self.barcode_input.returnPressed.connect(self.refresh)
+        search_button = QPushButton("查询")
+        search_button.clicked.connect(self.refresh)
+
+        filter_row = QHBoxLayout()
+        filter_row.addWidget(self.date_check)
+        filter_row.addWidget(self.start_date)
+        filter_row.addWidget(QLabel("至"))
+        filter_row.addWidget(self.end_date)
+        filter_row.addWidget(QLabel("金额"))
+        filter_row.addWidget(self.min_amount)
+        filter_row.addWidget(QLabel("至"))
+        filter_row.addWidget(self.max_amount)
+        filter_row.addWidget(QLabel("条码"))
+        filter_row.addWidget(self.barcode_input, 1)
+        filter_row.addWidget(search_button)
+
+        self.sales_table = QTableView()
+        self.sales_table.setModel(self.history_model)
+        self.sales_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.sales_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.sales_table.horizontalHeader().setStretchLastSection(True)
+        self.sales_table.verticalHeader().setVisible(False)
+        selection_model = self.sales_table.selectionModel()
+        if selection_model is not None:
+            selection_model.selectionChanged.connect(self._on_selection_changed)
+
+        self.detail_label = QLabel("选择一张小票查看明细")
+        self.detail_table = QTableWidget(0, 5)
+        self.detail_table.setHorizontalHeaderLabels(["条码", "商品", "单价", "数量", "小计"])
+        self.detail_table.horizontalHeader().setStretchLastSection(True)
+        self.detail_table.verticalHeader().setVisible(False)
+        self.detail_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        detail_layout = QVBoxLayout()
+        detail_layout.addWidget(self.detail_label)
+        detail_layout.addWidget(self.detail_table)
+        detail_group = QGroupBox("小票明细")
+        detail_group.setLayout(detail_layout)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.sales_table)
+        splitter.addWidget(detail_group)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 2)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(filter_row)
+        layout.addWidget(splitter, 1)
+
+    def set_database(self, database: Database) -> None:
+        self.database = database
+        self.history_model.set_database(database)
+        self._show_sale(None)
+
+    def showEvent(self, event: QShowEvent) -> None:  # type: ignore[override]
+        super().showEvent(event)
+        self.refresh()
+
+    def sale_filter(self) -> SaleFilter:
+        start_day = end_day = None
+        if self.date_check.isChecked():
+            start_day = self.start_date.date().toString("yyyy-MM-dd")
+            end_day = self.end_date.date().toString("yyyy-MM-dd")
+            if start_day > end_day:
+                start_day, end_day = end_day, start_day
+        min_cents = to_cents(self.min_amount.value()) if self.min_amount.value() else None
+        max_cents = to_cents(self.max_amount.value()) if self.max_amount.value() else None
+        return SaleFilter(
+            start_day=start_day,
+            end_day=end_day,
+            min_cents=min_cents,
+            max_cents=max_cents,
+            barcode=self.barcode_input.text().strip() or None,
+        )
+
+    def refresh(self) -> None:
+        self.history_model.set_filter(self.sale_filter())
+        self._show_sale(None)
+
+    def _on_selection_changed(self, selected: QItemSelection, _deselected: QItemSelection) -> None:
+        indexes = selected.indexes()
+        self._show_sale(self.history_model.sale(indexes[0].row()) if indexes else None)
+
+    def _show_sale(self, sale: dict[str, Any] | None) -> None:
+        if sale is None:
+            self.detail_label.setText("选择一张小票查看明细")
+            self.detail_table.setRowCount(0)
+            return
+        lines = self.database.sale_lines(sale["id"])
+        text = (
+            f"单号 {sale['id']}  {sale['created_at']}  收银台 {sale['lane_id']}  "
+            f"共 {sale['total_quantity']} 件  {format_cents(sale['total_cents'])}"
+        )
+        if sale["discount_cents"]:
+            discounts = self.database.sale_discounts(sale["id"])
+            text += f"（已优惠 {format_cents(sale['discount_cents'])}："
+            text += "、".join(
+                f"{discount['name']} {format_cents(discount['amount_cents'])}"
+                for discount in discounts
+            )
+            text += "）"
+        self.detail_label.setText(text)
+        self.detail_table.setRowCount(len(lines))
+        for row_index, line in enumerate(lines):
+            values = (
+                line["barcode"],
+                line["name"],
+                format_cents(line["price_cents"]),
+                str(line["quantity"]),
+                format_cents(line["price_cents"] * line["quantity"]),
+            )
+            for column, value in enumerate(values):
+                self.detail_table.setItem(row_index, column, QTableWidgetItem(value))
@@ -1,28 +1,89 @@
 from __future__ import annotations
 
-from PyQt6.QtCore import QStringListModel, Qt
+import sqlite3
+import threading
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, Qt, QThread, QTimer, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QShowEvent
 from PyQt6.QtWidgets import (
+    QAbstractItemView,
     QComboBox,
-    QCompleter,
     QDoubleSpinBox,
+    QFileDialog,
     QFormLayout,
     QGroupBox,
     QHBoxLayout,
     QLabel,
     QLineEdit,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
 
+from cruchcount.barcodes import has_bad_check_digit
+from cruchcount.catalog_io import (
+    CatalogFormatError,
+    ImportResult,
+    export_catalog,
+    import_catalog,
+)
 from cruchcount.db import Database
+from cruchcount.money import cents_to_float, to_cents
+from cruchcount.ui.suggestions import (
+    ProductSuggestionModel,
+    SuggestionEngine,
+    attach_suggestions,
+)
+
+
+LOW_STOCK_LIMIT = 200
+
+
+class _CatalogImportWorker(QObject):
+    progress = pyqtSignal(int, int, int)
+    completed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, database: Database, path: Path, cancelled: threading.Event) -> None:
+        super().__init__()
+        self._database = database
+        self._path = path
+        self._cancelled = cancelled
+
+    @pyqtSlot()
+    def run(self) -> None:
+        try:
+            result = import_catalog(self._database, self._path, progress=self._report)
+        except (CatalogFormatError, UnicodeDecodeError, OSError, sqlite3.Error) as exc:
+            self.failed.emit(str(exc))
+            return
+        self.completed.emit(result)
+
+    def _report(self, processed: int, bytes_read: int, total_bytes: int) -> bool:
+        self.progress.emit(processed, bytes_read, total_bytes)
+        return not self._cancelled.is_set()
 
 
 class InventoryPage(QWidget):
     def __init__(self, database: Database) -> None:
         super().__init__()
         self.database = database
+        self.suggestions = SuggestionEngine(database, self)
+        self.suggestion_model = ProductSuggestionModel(self.suggestions, self)
+        self.suggestion_model.results_applied.connect(self._apply_suggestions)
+        self._suggestions_loaded = False
+        # The barcode whose category and reorder level are shown in the form.
+        self._loaded_barcode: str | None = None
+        self._import_thread: QThread | None = None
+        self._import_worker: _CatalogImportWorker | None = None
+        self._import_cancelled = threading.Event()
+        self._import_progress: QProgressDialog | None = None
 
         self.barcode_combo = QComboBox()
         self.barcode_combo.setEditable(True)
@@ -32,12 +93,7 @@ class InventoryPage(QWidget):
         self.barcode_combo.lineEdit().editingFinished.connect(
             self._on_barcode_editing_finished
         )
-
-        self.barcode_completer_model = QStringListModel()
-        barcode_completer = QCompleter(self.barcode_completer_model, self)
-        barcode_completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-        barcode_completer.setFilterMode(Qt.MatchFlag.MatchContains)
-        self.barcode_combo.setCompleter(barcode_completer)
+        attach_suggestions(self.barcode_combo, self.suggestion_model)
 
         self.name_input = QLineEdit()
         self.name_input.setPlaceholderText("请输入商品名称")
@@ -46,6 +102,14 @@ class InventoryPage(QWidget):
         self.price_input.setRange(0.01, 999999.99)
         self.price_input.setValue(1.0)
         self.price_input.setPrefix("¥")
+        self.category_input = QLineEdit()
+        self.category_input.setPlaceholderText("可选，按分类设置的促销会用到")
+        self.received_input = QSpinBox()
+        self.received_input.setRange(0, 999999)
+        self.reorder_input = QSpinBox()
+        self.reorder_input.setRange(0, 999999)
+        self.reorder_input.setSpecialValueText("不提醒")
+        self.stock_label = QLabel("-")
 
         save_button = QPushButton("保存/入库")
         save_button.clicked.connect(self.save_product)
@@ -54,35 +118,71 @@ class InventoryPage(QWidget):
         form.addRow("条码", self.barcode_combo)
         form.addRow("商品名称", self.name_input)
         form.addRow("售价", self.price_input)
+        form.addRow("分类", self.category_input)
+        form.addRow("当前库存", self.stock_label)
+        form.addRow("入库数量", self.received_input)
+        form.addRow("补货线", self.reorder_input)
 
         group = QGroupBox("商品入库")
         group.setLayout(form)
 
+        self.import_button = QPushButton("批量导入")
+        self.import_button.clicked.connect(self.import_catalog_file)
+        export_button = QPushButton("导出商品")
+        export_button.clicked.connect(self.export_catalog_file)
+
         button_row = QHBoxLayout()
+        button_row.addWidget(self.import_button)
+        button_row.addWidget(export_button)
         button_row.addStretch(1)
         button_row.addWidget(save_button)
 
-        self.hint_label = QLabel("规则：条码重复时将自动覆盖商品信息。")
+        self.hint_label = QLabel("规则：条码重复时将自动覆盖商品信息，入库数量累加到库存。")
+
+        self.low_stock_table = QTableWidget(0, 4)
+        self.low_stock_table.setHorizontalHeaderLabels(["条码", "商品名称", "库存", "补货线"])
+        self.low_stock_table.verticalHeader().setVisible(False)
+        self.low_stock_table.horizontalHeader().setStretchLastSection(True)
+        self.low_stock_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.low_stock_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.low_stock_table.cellDoubleClicked.connect(self._edit_low_stock_row)
+        refresh_button = QPushButton("刷新")
+        refresh_button.clicked.connect(self.refresh_low_stock)
+        low_stock_layout = QVBoxLayout()
+        low_stock_layout.addWidget(self.low_stock_table)
+        low_stock_layout.addWidget(refresh_button, alignment=Qt.AlignmentFlag.AlignRight)
+        low_stock_group = QGroupBox("待补货（库存不高于补货线）")
+        low_stock_group.setLayout(low_stock_layout)
 
         layout = QVBoxLayout(self)
         layout.addWidget(group)
         layout.addLayout(button_row)
         layout.addWidget(self.hint_label)
-        layout.addStretch(1)
+        layout.addWidget(low_stock_group, 1)
+
+    def showEvent(self, event: QShowEvent) -> None:  # type: ignore[override]
+        super().showEvent(event)
+        self.refresh_low_stock()
+        if not self._suggestions_loaded:
+            self._suggestions_loaded = True
+            QTimer.singleShot(0, lambda: self.suggestions.request("", immediate=True))
 
-        self._update_barcode_suggestions("")
+    def shutdown(self) -> None:
+        self._stop_import()
+        self.suggestions.stop()
 
     def set_database(self, database: Database) -> None:
+        self._stop_import()
         self.database = database
-        self.barcode_combo.lineEdit().clear()
-        self.name_input.clear()
-        self.price_input.setValue(1.0)
-        self._update_barcode_suggestions("")
+        self.suggestions.set_database(database)
+        self._reset_form()
+        self.suggestions.request("", immediate=True)
+        self.refresh_low_stock()
 
     def save_product(self) -> None:
         barcode = self.barcode_combo.currentText().strip().split(" | ", 1)[0].strip()
         name = self.name_input.text().strip()
-        price = float(self.price_input.value())
+        price_cents = to_cents(self.price_input.value())
 
         if not barcode:
             QMessageBox.warning(self, "提示", "请输入条码")
@@ -90,30 +190,170 @@ class InventoryPage(QWidget):
         if not name:
             QMessageBox.warning(self, "提示", "请输入商品名称")
             return
+        if has_bad_check_digit(barcode):
+            answer = QMessageBox.question(
+                self, "条码校验位不符", f"条码 {barcode} 的校验位不正确，可能输错了。\n仍然保存吗？"
+            )
+            if answer != QMessageBox.StandardButton.Yes:
+                return
 
+        received = self.received_input.value()
+        # Category and reorder level are sent only when they were loaded for
+        # this product or filled in here; None keeps what is on file.
+        loaded = self._loaded_barcode == barcode
+        reorder_level = self.reorder_input.value()
+        category = self.category_input.text()
         exists = self.database.get_product_by_barcode(barcode) is not None
-        self.database.upsert_product(barcode=barcode, name=name, price=price)
+        self.database.upsert_product(
+            barcode=barcode,
+            name=name,
+            price_cents=price_cents,
+            received=received,
+            reorder_level=reorder_level if loaded or reorder_level else None,
+            category=category if loaded or category.strip() else None,
+        )
+
+        message = "商品已覆盖更新" if exists else "商品已新增入库"
+        if received:
+            message += f"，库存增加 {received}"
+        QMessageBox.information(self, "成功", message)
+
+        self._reset_form()
+        self.suggestions.request("", immediate=True)
+        self.refresh_low_stock()
+        self.barcode_combo.setFocus()
+
+    def refresh_low_stock(self) -> None:
+        rows = self.database.low_stock_products(LOW_STOCK_LIMIT)
+        self.low_stock_table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, key in enumerate(("barcode", "name", "stock", "reorder_level")):
+                self.low_stock_table.setItem(row_index, column, QTableWidgetItem(str(row[key])))
 
-        if exists:
-            QMessageBox.information(self, "成功", "商品已覆盖更新")
-        else:
-            QMessageBox.information(self, "成功", "商品已新增入库")
+    def _edit_low_stock_row(self, row: int, _column: int) -> None:
+        item = self.low_stock_table.item(row, 0)
+        if item is None:
+            return
+        self.barcode_combo.setEditText(item.text())
+        self._on_barcode_editing_finished()
+        self.received_input.setFocus()
 
+    def _reset_form(self) -> None:
         self.barcode_combo.lineEdit().clear()
         self.name_input.clear()
         self.price_input.setValue(1.0)
-        self._update_barcode_suggestions("")
-        self.barcode_combo.setFocus()
+        self.category_input.clear()
+        self.received_input.setValue(0)
+        self.reorder_input.setValue(0)
+        self.stock_label.setText("-")
+        self._loaded_barcode = None
+
+    def import_catalog_file(self) -> None:
+        selected_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "选择商品清单",
+            str(self.database.path.parent),
+            "商品清单 (*.csv *.tsv *.txt);;All Files (*)",
+        )
+        if not selected_path:
+            return
+
+        # Runs on a worker thread so scanning on the cart page keeps working;
+        # each chunk is its own transaction on the shared writer connection.
+        progress_dialog = QProgressDialog("正在导入商品……", "取消", 0, 100, self)
+        progress_dialog.setWindowTitle("批量导入")
+        progress_dialog.setWindowModality(Qt.WindowModality.NonModal)
+        progress_dialog.setMinimumDuration(300)
+        progress_dialog.setAutoClose(False)
+        progress_dialog.setAutoReset(False)
+
+        self._import_cancelled = threading.Event()
+        progress_dialog.canceled.connect(self._import_cancelled.set)
+        thread = QThread()
+        worker = _CatalogImportWorker(self.database, Path(selected_path), self._import_cancelled)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress.connect(
+            lambda processed, read, total, w=worker: self._on_import_progress(
+                w, processed, read, total
+            )
+        )
+        worker.completed.connect(lambda result, w=worker: self._on_import_completed(w, result))
+        worker.failed.connect(lambda message, w=worker: self._on_import_failed(w, message))
+
+        self._import_thread = thread
+        self._import_worker = worker
+        self._import_progress = progress_dialog
+        self.import_button.setEnabled(False)
+        thread.start()
+
+    def _on_import_progress(
+        self, worker: _CatalogImportWorker, processed: int, bytes_read: int, total_bytes: int
+    ) -> None:
+        if worker is not self._import_worker or self._import_progress is None:
+            return
+        self._import_progress.setLabelText(f"已处理 {processed} 行")
+        self._import_progress.setValue(bytes_read * 100 // total_bytes if total_bytes else 100)
+
+    def _on_import_completed(self, worker: _CatalogImportWorker, result: ImportResult) -> None:
+        if worker is not self._import_worker:
+            return
+        self._finish_import()
+        lines = [f"导入 {result.imported} 条，拒绝 {len(result.rejected)} 条"]
+        if result.cancelled:
+            lines.append("导入已取消，已导入的商品会保留")
+        lines.extend(
+            f"第 {rejected.line_no} 行：{rejected.reason}" for rejected in result.rejected[:10]
+        )
+        QMessageBox.information(self, "导入完成", "\n".join(lines))
+        self.suggestions.request("", immediate=True)
+
+    def _on_import_failed(self, worker: _CatalogImportWorker, message: str) -> None:
+        if worker is not self._import_worker:
+            return
+        self._finish_import()
+        QMessageBox.warning(self, "提示", f"无法导入该文件：\n{message}")
+
+    def _finish_import(self) -> None:
+        if self._import_thread is not None:
+            self._import_thread.quit()
+            self._import_thread.wait()
+        if self._import_progress is not None:
+            self._import_progress.close()
+        self._import_thread = None
+        self._import_worker = None
+        self._import_progress = None
+        self.import_button.setEnabled(True)
+
+    def _stop_import(self) -> None:
+        if self._import_thread is None:
+            return
+        self._import_cancelled.set()
+        self._finish_import()
+
+    def export_catalog_file(self) -> None:
+        selected_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "导出商品",
+            str(self.database.path.parent / "products.csv"),
+            "CSV (*.csv);;TSV (*.tsv)",
+        )
+        if not selected_path:
+            return
+
+        try:
+            count = export_catalog(self.database, Path(selected_path))
+        except (OSError, sqlite3.Error) as exc:
+            QMessageBox.critical(self, "错误", f"导出失败：\n{exc}")
+            return
+        QMessageBox.information(self, "导出完成", f"已导出 {count} 条商品")
 
     def _update_barcode_suggestions(self, query: str) -> None:
-        products = self.database.search_products(query, limit=20)
-        display_items = [
-            f"{item['barcode']} | {item['name']} | ¥{item['price']:.2f}" for item in products
-        ]
-        self.barcode_completer_model.setStringList(display_items)
-        self.barcode_combo.clear()
-        self.barcode_combo.addItems(display_items)
-        self.barcode_combo.setEditText(query)
+        self.suggestions.request(query)
+
+    def _apply_suggestions(self, query: str) -> None:
+        if self.barcode_combo.currentText() != query:
+            self.barcode_combo.setEditText(query)
 
     def _on_barcode_editing_finished(self) -> None:
         text = self.barcode_combo.currentText().strip()
@@ -123,7 +363,13 @@ class InventoryPage(QWidget):
         barcode = text.split(" | ", 1)[0].strip()
         product = self.database.get_product_by_barcode(barcode)
         self.barcode_combo.setEditText(barcode)
-        if product is None:
+        level = self.database.stock_level(barcode)
+        self.stock_label.setText(str(level["stock"]) if level else "-")
+        self._loaded_barcode = None
+        if product is None or level is None:
             return
         self.name_input.setText(str(product["name"]))
-        self.price_input.setValue(float(product["price"]))
+        self.price_input.setValue(cents_to_float(product["price_cents"]))
+        self.category_input.setText(self.database.product_category(barcode) or "")
+        self.reorder_input.setValue(level["reorder_level"])
+        self._loaded_barcode = barcode
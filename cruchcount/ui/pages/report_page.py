@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import Any
+
+from PyQt6.QtCore import QDate
+from PyQt6.QtGui import QShowEvent
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QDateEdit,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QTabWidget,
+    QVBoxLayout,
+    QWidget,
+)
+
+from cruchcount.db import Database
+from cruchcount.money import format_cents
+
+DEFAULT_RANGE_DAYS = 7
+TOP_PRODUCT_LIMIT = 50
+
+
+def _read_only_table(headers: list[str]) -> QTableWidget:
+    table = QTableWidget(0, len(headers))
+    table.setHorizontalHeaderLabels(headers)
+    table.horizontalHeader().setStretchLastSection(True)
+    table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    return table
+
+
+def _fill_table(table: QTableWidget, rows: list[tuple[Any, ...]]) -> None:
+    table.setRowCount(len(rows))
+    for row_index, values in enumerate(rows):
+        for column, value in enumerate(values):
+            table.setItem(row_index, column, QTableWidgetItem(str(value)))
+
+
+class ReportPage(QWidget):
+    def __init__(self, database: Database) -> None:
+        super().__init__()
+        self.database = database
+
+        today = QDate.currentDate()
+        self.start_date = QDateEdit(today.addDays(1 - DEFAULT_RANGE_DAYS))
+        self.start_date.setCalendarPopup(True)
+        self.start_date.setDisplayFormat("yyyy-MM-dd")
+        self.end_date = QDateEdit(today)
+        self.end_date.setCalendarPopup(True)
+        self.end_date.setDisplayFormat("yyyy-MM-dd")
+        refresh_button = QPushButton("查询")
+        refresh_button.clicked.connect(self.refresh)
+
+        range_row = QHBoxLayout()
+        range_row.addWidget(QLabel("开始日期"))
+        range_row.addWidget(self.start_date)
+        range_row.addWidget(QLabel("结束日期"))
+        range_row.addWidget(self.end_date)
+        range_row.addStretch(1)
+        range_row.addWidget(refresh_button)
+
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("font-size: 18px; font-weight: 700;")
+
+        # Sales are reported as paid, products at list price; the two differ
+        # by the 优惠 column, which is what reconciles them.
+        self.daily_table = _read_only_table(["日期", "单数", "件数", "优惠", "实收"])
+        self.hourly_table = _read_only_table(["小时", "单数", "件数", "实收"])
+        self.product_table = _read_only_table(["条码", "商品", "件数", "原价销售额"])
+
+        tabs = QTabWidget()
+        tabs.addTab(self.daily_table, "按日")
+        tabs.addTab(self.hourly_table, "按小时（结束日期）")
+        tabs.addTab(self.product_table, "商品排行")
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(range_row)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(tabs, 1)
+
+    def set_database(self, database: Database) -> None:
+        self.database = database
+        if self.isVisible():
+            self.refresh()
+
+    def showEvent(self, event: QShowEvent) -> None:  # type: ignore[override]
+        super().showEvent(event)
+        self.refresh()
+
+    def refresh(self) -> None:
+        start_day = self.start_date.date().toString("yyyy-MM-dd")
+        end_day = self.end_date.date().toString("yyyy-MM-dd")
+        if start_day > end_day:
+            start_day, end_day = end_day, start_day
+
+        daily = self.database.daily_report(start_day, end_day)
+        hourly = self.database.hourly_report(end_day)
+        products = self.database.product_report(start_day, end_day, TOP_PRODUCT_LIMIT)
+
+        sale_count = sum(row["sale_count"] for row in daily)
+        units = sum(row["units"] for row in daily)
+        revenue_cents = sum(row["revenue_cents"] for row in daily)
+        discount_cents = sum(row["discount_cents"] for row in daily)
+        self.summary_label.setText(
+            f"{start_day} 至 {end_day}：{sale_count} 单，{units} 件，"
+            f"原价 {format_cents(revenue_cents + discount_cents)}，"
+            f"优惠 {format_cents(discount_cents)}，实收 {format_cents(revenue_cents)}"
+        )
+        _fill_table(
+            self.daily_table,
+            [
+                (
+                    row["day"],
+                    row["sale_count"],
+                    row["units"],
+                    format_cents(row["discount_cents"]),
+                    format_cents(row["revenue_cents"]),
+                )
+                for row in daily
+            ],
+        )
+        _fill_table(
+            self.hourly_table,
+            [
+                (
+                    f"{row['hour']:02d}:00",
+                    row["sale_count"],
+                    row["units"],
+                    format_cents(row["revenue_cents"]),
+                )
+                for row in hourly
+            ],
+        )
+        _fill_table(
+            self.product_table,
+            [
+                (row["barcode"], row["name"], row["units"], format_cents(row["revenue_cents"]))
+                for row in products
+            ],
+        )
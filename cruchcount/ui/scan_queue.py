@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import sqlite3
+from collections import deque
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+# Looks up a batch of barcodes at once (Database.get_products_by_barcodes).
+ProductResolver = Callable[[list[str]], dict[str, dict[str, Any]]]
+
+
+class ScanQueue(QObject):
+    # (known products with quantities, unknown barcodes with quantities), in scan order.
+    batch_resolved = pyqtSignal(list, list)
+    # The lookup failed (a locked database, say); the scans stay queued.
+    lookup_failed = pyqtSignal(str)
+
+    def __init__(self, resolve: ProductResolver, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._resolve = resolve
+        self._pending: deque[tuple[str, int]] = deque()
+        self._drain_timer = QTimer(self)
+        self._drain_timer.setSingleShot(True)
+        self._drain_timer.setInterval(0)
+        self._drain_timer.timeout.connect(self.drain)
+
+    def set_resolver(self, resolve: ProductResolver) -> None:
+        self._resolve = resolve
+
+    def enqueue(self, barcode: str, quantity: int = 1) -> None:
+        self._pending.append((barcode, quantity))
+        if not self._drain_timer.isActive():
+            self._drain_timer.start()
+
+    def enqueue_many(self, lines: Iterable[tuple[str, int]]) -> None:
+        self._pending.extend(lines)
+        if self._pending and not self._drain_timer.isActive():
+            self._drain_timer.start()
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def clear(self) -> None:
+        self._drain_timer.stop()
+        self._pending.clear()
+
+    def drain(self) -> bool:
+        # Returns whether the queue is empty afterwards. A batch leaves the
+        # queue only once it has been looked up; after a failure it is tried
+        # again with the next scan or drain.
+        self._drain_timer.stop()
+        if not self._pending:
+            return True
+
+        batch = list(self._pending)
+        try:
+            products = self._resolve([barcode for barcode, _ in batch])
+        except sqlite3.Error as exc:
+            self.lookup_failed.emit(str(exc))
+            return False
+        self._pending.clear()
+        known: list[tuple[dict[str, Any], int]] = []
+        unknown: list[tuple[str, int]] = []
+        for barcode, quantity in batch:
+            product = products.get(barcode)
+            if product is None:
+                unknown.append((barcode, quantity))
+            else:
+                known.append((product, quantity))
+        self.batch_resolved.emit(known, unknown)
+        return True
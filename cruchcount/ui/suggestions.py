@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from typing import Any
+
+from PyQt6.QtCore import (
+    QAbstractListModel,
+    QAbstractProxyModel,
+    QCoreApplication,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    Qt,
+    QThread,
+    QTimer,
+    pyqtSignal,
+    pyqtSlot,
+)
+from PyQt6.QtGui import QPainter
+from PyQt6.QtWidgets import (
+    QComboBox,
+    QCompleter,
+    QListView,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
+)
+
+from cruchcount.connection import ReadPool
+from cruchcount.db import Database
+from cruchcount.money import format_cents
+from cruchcount.search import search_products
+
+DEFAULT_DEBOUNCE_MS = 120
+DEFAULT_SUGGESTION_LIMIT = 20
+PRODUCT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class _SuggestionWorker(QObject):
+    results_ready = pyqtSignal(int, str, int, list)
+
+    def __init__(self, pool: ReadPool) -> None:
+        super().__init__()
+        self._pool = pool
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._running_generation = 0
+        self.latest_generation = 0
+
+    @pyqtSlot(int, str, int, int)
+    def run_query(self, generation: int, query: str, limit: int, offset: int) -> None:
+        if generation != self.latest_generation:
+            return
+
+        pool = self._pool
+        try:
+            connection = pool.acquire()
+        except sqlite3.Error:
+            return
+        with self._lock:
+            self._running_generation = generation
+            self._connection = connection
+        try:
+            products = search_products(connection, query, limit, offset)
+        except sqlite3.Error:
+            return
+        finally:
+            with self._lock:
+                self._running_generation = 0
+                self._connection = None
+            pool.release(connection)
+
+        if generation == self.latest_generation:
+            self.results_ready.emit(generation, query, offset, products)
+
+    @pyqtSlot(object)
+    def switch_database(self, pool: ReadPool) -> None:
+        self._pool = pool
+
+    def cancel_stale(self, generation: int) -> None:
+        self.latest_generation = generation
+        with self._lock:
+            if self._running_generation and self._connection is not None:
+                self._connection.interrupt()
+
+
+class SuggestionEngine(QObject):
+    # (query, offset, products): offset 0 starts a new result list, anything
+    # else is a further page of the same query.
+    suggestions_ready = pyqtSignal(str, int, list)
+    _query_requested = pyqtSignal(int, str, int, int)
+    _database_switched = pyqtSignal(object)
+
+    def __init__(
+        self,
+        database: Database,
+        parent: QObject | None = None,
+        debounce_ms: int = DEFAULT_DEBOUNCE_MS,
+        limit: int = DEFAULT_SUGGESTION_LIMIT,
+    ) -> None:
+        super().__init__(parent)
+        self.limit = limit
+        self._generation = 0
+        self._pending_query = ""
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self._dispatch)
+
+        self._thread = QThread()
+        self._worker = _SuggestionWorker(database.read_pool)
+        self._worker.moveToThread(self._thread)
+        self._query_requested.connect(self._worker.run_query)
+        self._database_switched.connect(self._worker.switch_database)
+        self._worker.results_ready.connect(self._on_results_ready)
+        self._thread.start()
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+    def request(self, query: str, immediate: bool = False) -> None:
+        self._generation += 1
+        self._pending_query = query
+        self._worker.cancel_stale(self._generation)
+        if immediate:
+            self._debounce.stop()
+            self._dispatch()
+        else:
+            self._debounce.start()
+
+    def request_more(self, query: str, offset: int) -> None:
+        # Same generation: a newer request() still makes this page stale.
+        if query == self._pending_query and not self._debounce.isActive():
+            self._query_requested.emit(self._generation, query, self.limit, offset)
+
+    def set_database(self, database: Database) -> None:
+        self._generation += 1
+        self._debounce.stop()
+        self._worker.cancel_stale(self._generation)
+        self._database_switched.emit(database.read_pool)
+
+    def stop(self) -> None:
+        if not self._thread.isRunning():
+            return
+        self._debounce.stop()
+        self._generation += 1
+        self._worker.cancel_stale(self._generation)
+        self._thread.quit()
+        self._thread.wait()
+
+    def _dispatch(self) -> None:
+        self._query_requested.emit(self._generation, self._pending_query, self.limit, 0)
+
+    def _on_results_ready(
+        self, generation: int, query: str, offset: int, products: list[Any]
+    ) -> None:
+        if generation != self._generation:
+            return
+        self.suggestions_ready.emit(query, offset, products)
+
+
+class ProductSuggestionModel(QAbstractListModel):
+    # Holds the engine's result rows as-is; an editable combo box and its
+    # completer both view this one model. Display and edit text is the bare
+    # barcode and ProductSuggestionDelegate formats only the rows it paints.
+    results_applied = pyqtSignal(str)
+
+    def __init__(self, engine: SuggestionEngine, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._engine = engine
+        self._engine.suggestions_ready.connect(self._on_suggestions_ready)
+        self._products: list[dict[str, Any]] = []
+        self._query = ""
+        self._has_more = False
+        self._fetching = False
+        self._tail_shown = False
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._products)
+
+    def data(
+        self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        if not index.isValid() or index.row() >= len(self._products):
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._products[index.row()]["barcode"]
+        if role == PRODUCT_ROLE:
+            return self._products[index.row()]
+        return None
+
+    def canFetchMore(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> bool:
+        # QCompleter asks for more after every change and hidden views think
+        # they are 640x480, so a page is only fetched once its predecessor's
+        # last row has actually been painted.
+        return not parent.isValid() and self._has_more and self._tail_shown and not self._fetching
+
+    def fetchMore(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> None:
+        if not self.canFetchMore(parent):
+            return
+        self._fetching = True
+        self._engine.request_more(self._query, len(self._products))
+
+    def product(self, row: int) -> dict[str, Any] | None:
+        return self._products[row] if 0 <= row < len(self._products) else None
+
+    def row_painted(self, row: int) -> None:
+        if row == len(self._products) - 1 and not self._tail_shown:
+            self._tail_shown = True
+            QTimer.singleShot(0, self.fetchMore)
+
+    def _on_suggestions_ready(self, query: str, offset: int, products: list[Any]) -> None:
+        if offset == 0:
+            self._query = query
+            self._replace(products)
+        elif query == self._query and offset == len(self._products):
+            self._append(products)
+        else:
+            return
+        self._fetching = False
+        self._tail_shown = False
+        self._has_more = len(products) == self._engine.limit
+        self.results_applied.emit(query)
+
+    def _replace(self, products: list[dict[str, Any]]) -> None:
+        # Rows that exist before and after are updated in place and only the
+        # difference is removed or inserted, so the views keep their layout.
+        # (A model reset would also make an editable QComboBox clear its text.)
+        kept = min(len(self._products), len(products))
+        if len(self._products) > kept:
+            self.beginRemoveRows(QModelIndex(), kept, len(self._products) - 1)
+            del self._products[kept:]
+            self.endRemoveRows()
+        if kept:
+            self._products[:kept] = products[:kept]
+            self.dataChanged.emit(self.index(0), self.index(kept - 1))
+        self._append(products[kept:])
+
+    def _append(self, products: list[dict[str, Any]]) -> None:
+        if not products:
+            return
+        first = len(self._products)
+        self.beginInsertRows(QModelIndex(), first, first + len(products) - 1)
+        self._products.extend(products)
+        self.endInsertRows()
+
+
+class ProductSuggestionDelegate(QStyledItemDelegate):
+    def initStyleOption(
+        self, option: QStyleOptionViewItem | None, index: QModelIndex | QPersistentModelIndex
+    ) -> None:
+        super().initStyleOption(option, index)
+        product = index.data(PRODUCT_ROLE)
+        if option is not None and product is not None:
+            option.text = (
+                f"{product['barcode']} | {product['name']} | {format_cents(product['price_cents'])}"
+            )
+
+    def paint(
+        self,
+        painter: QPainter | None,
+        option: QStyleOptionViewItem,
+        index: QModelIndex | QPersistentModelIndex,
+    ) -> None:
+        super().paint(painter, option, index)
+        model = index.model()
+        if isinstance(model, QAbstractProxyModel):
+            # QCompleter's popup shows the model through its own proxy.
+            index = model.mapToSource(index)
+            model = index.model()
+        if isinstance(model, ProductSuggestionModel):
+            model.row_painted(index.row())
+
+
+def attach_suggestions(combo: QComboBox, model: ProductSuggestionModel) -> QCompleter:
+    # The drop-down list and the completer popup share one model and delegate.
+    # Uniform row sizes keep the views from asking the delegate to format
+    # every row just to lay them out.
+    delegate = ProductSuggestionDelegate(combo)
+    combo.setModel(model)
+    # With a placeholder the combo does not select the first suggestion (and
+    # overwrite what is being typed with it) when results arrive.
+    combo.setPlaceholderText(combo.lineEdit().placeholderText())
+    completer = QCompleter(model, combo)
+    completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+    combo.setCompleter(completer)
+    for view in (combo.view(), completer.popup()):
+        view.setItemDelegate(delegate)
+        if isinstance(view, QListView):
+            view.setUniformItemSizes(True)
+    return completer
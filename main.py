@@ -1,8 +1,12 @@
-from cruchcount.app import run_app
+import time
+
+STARTED_AT = time.perf_counter()
+
+from cruchcount.app import run_app  # noqa: E402
 
 
 def main():
-    run_app()
+    run_app(started_at=STARTED_AT)
 
 
 if __name__ == "__main__":
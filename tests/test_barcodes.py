@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from cruchcount.barcodes import barcode_key, clean_barcode, has_bad_check_digit
+from cruchcount.db import Database
+
+UPC_A = "036000291452"
+SPELLINGS = (
+    UPC_A,
+    "0036000291452",  # EAN-13
+    "00036000291452",  # GTIN-14
+    " 0360 0029 1452\n",
+    "036000291452-12",
+    "03600029145212",  # add-on appended directly
+    "0036000291452+54321",
+)
+
+
+class BarcodeKeyTest(unittest.TestCase):
+    def test_spellings_of_one_gtin_share_a_key(self) -> None:
+        for spelling in SPELLINGS:
+            with self.subTest(spelling=spelling):
+                self.assertEqual(barcode_key(spelling), "00036000291452")
+        self.assertEqual(barcode_key("96385074"), "00000096385074")
+
+    def test_scanner_noise_is_cleaned(self) -> None:
+        self.assertEqual(clean_barcode(" 0360 0029 1452\n"), UPC_A)
+        self.assertEqual(clean_barcode("036000291452-12"), UPC_A)
+        self.assertEqual(clean_barcode("A 123"), "A123")
+
+    def test_bad_check_digits_are_flagged_and_kept_apart(self) -> None:
+        self.assertTrue(has_bad_check_digit("036000291453"))
+        self.assertFalse(has_bad_check_digit(UPC_A))
+        # Store codes are not GTINs, so there is no check digit to get wrong.
+        self.assertFalse(has_bad_check_digit("A123"))
+        self.assertFalse(has_bad_check_digit("2001"))
+        self.assertEqual(barcode_key("036000291453"), "036000291453")
+        self.assertNotEqual(barcode_key("036000291453"), barcode_key(UPC_A))
+
+
+class BarcodeLookupTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.database = Database(Path(self._tmp.name) / "cruchcount.db", lane_id="1")
+        self.database.init_schema()
+
+    def tearDown(self) -> None:
+        self.database.close()
+        self._tmp.cleanup()
+
+    def test_lookup_by_another_spelling_finds_the_stored_product(self) -> None:
+        self.database.upsert_product(UPC_A, "可乐", 300)
+
+        for spelling in SPELLINGS:
+            with self.subTest(spelling=spelling):
+                product = self.database.get_product_by_barcode(spelling)
+                self.assertIsNotNone(product)
+                self.assertEqual(product["barcode"], UPC_A)
+        found = self.database.get_products_by_barcodes(SPELLINGS)
+        self.assertEqual({product["barcode"] for product in found.values()}, {UPC_A})
+        self.assertEqual(set(found), set(SPELLINGS))
+
+    def test_upsert_by_another_spelling_updates_the_same_product(self) -> None:
+        self.database.upsert_product(UPC_A, "可乐", 300)
+        self.database.upsert_product("00036000291452", "可乐 330ml", 350)
+
+        with self.database.read_pool.connection() as connection:
+            count = connection.execute("SELECT count(*) FROM products").fetchone()[0]
+        product = self.database.get_product_by_barcode(UPC_A)
+        self.assertEqual(count, 1)
+        self.assertEqual((product["name"], product["price_cents"]), ("可乐 330ml", 350))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from typing import NamedTuple
+from unittest import mock
+
+from cruchcount.db import Database
+from cruchcount.history import SaleFilter
+from cruchcount.ui import history_model
+from cruchcount.ui.history_model import SalesHistoryModel
+
+
+class _Line(NamedTuple):
+    barcode: str
+    name: str
+    price_cents: int
+    quantity: int
+
+
+@mock.patch.object(history_model, "HISTORY_CACHED_PAGES", 3)
+@mock.patch.object(history_model, "HISTORY_PAGE_SIZE", 5)
+class SalesHistoryModelTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.database = Database(Path(self._tmp.name) / "cruchcount.db", lane_id="1")
+        self.database.init_schema()
+        self.sale_ids = [
+            self.database.record_sale([_Line("6901234567892", "可乐", 300, quantity)])
+            for quantity in range(1, 43)
+        ]
+
+    def tearDown(self) -> None:
+        self.database.close()
+        self._tmp.cleanup()
+
+    def test_scrolling_holds_a_bounded_window_of_pages(self) -> None:
+        model = SalesHistoryModel(self.database)
+        model.set_filter(SaleFilter())
+        while model.canFetchMore():
+            model.fetchMore()
+
+        self.assertEqual(model.rowCount(), 42)
+        self.assertLessEqual(len(model._pages), 3)
+        newest_first = list(reversed(self.sale_ids))
+        self.assertEqual([model.sale(row)["id"] for row in range(42)], newest_first)
+        # Jumping back and forth re-reads dropped pages from their cursors.
+        for row in (41, 0, 20):
+            self.assertEqual(model.sale(row)["id"], newest_first[row])
+        self.assertLessEqual(len(model._pages), 3)
+        self.assertIsNone(model.sale(42))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from cruchcount.cart import CartItem
+from cruchcount.journal import CartJournal, add_op, remove_op, replay, set_op
+
+COLA = CartItem("6901234567892", "可乐", 300, 1)
+CHIPS = CartItem("6901234567893", "薯片", 800, 1)
+
+
+class CartJournalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "cruchcount.lane-1.cart.jsonl"
+        self.journal = CartJournal(self.path, group_commit_s=0)
+
+    def tearDown(self) -> None:
+        self.journal.close()
+        self._tmp.cleanup()
+
+    def _write(self, *records: dict) -> None:
+        for record in records:
+            self.journal.append(record)
+        self.journal.flush()
+
+    def test_replay_applies_add_set_and_remove_in_order(self) -> None:
+        self._write(
+            add_op(COLA, 1),
+            add_op(CHIPS, 2),
+            add_op(COLA, 2),
+            set_op(CHIPS.barcode, 5),
+            remove_op(COLA.barcode),
+            add_op(COLA, 1),
+        )
+
+        self.assertEqual(
+            replay(self.path),
+            [CartItem(CHIPS.barcode, "薯片", 800, 5), CartItem(COLA.barcode, "可乐", 300, 1)],
+        )
+
+    def test_torn_last_line_is_skipped(self) -> None:
+        self._write(add_op(COLA, 3))
+        with self.path.open("ab") as handle:
+            handle.write(b'{"op":"add","barcode":"6901234567893","na')
+
+        self.assertEqual(replay(self.path), [CartItem(COLA.barcode, "可乐", 300, 3)])
+
+    def test_compact_replays_to_the_current_cart(self) -> None:
+        self._write(add_op(COLA, 2), add_op(CHIPS, 1), remove_op(CHIPS.barcode))
+        cart = [CartItem(COLA.barcode, "可乐", 300, 4)]
+        self.journal.compact(cart)
+        self.assertEqual(replay(self.path), cart)
+
+        # Appends after compaction land on top of the snapshot.
+        self._write(set_op(COLA.barcode, 6))
+        self.assertEqual(replay(self.path), [CartItem(COLA.barcode, "可乐", 300, 6)])
+        self.assertEqual(len(self.path.read_bytes().splitlines()), 2)
+
+    def test_missing_journal_replays_to_an_empty_cart(self) -> None:
+        self.assertEqual(replay(self.path.with_name("other.cart.jsonl")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from cruchcount.db import Database
+from cruchcount.maintenance import (
+    MaintenanceCancelled,
+    MaintenanceScheduler,
+    MaintenanceSettings,
+    backup_database,
+    list_backups,
+    verify_backup,
+)
+
+
+class BackupTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.backup_dir = Path(self._tmp.name) / "backups"
+        self.database = Database(Path(self._tmp.name) / "cruchcount.db", lane_id="1")
+        self.database.init_schema()
+        self.database.upsert_products(
+            (f"69{i:011d}", f"商品 {i}", 100 + i) for i in range(2000)
+        )
+
+    def tearDown(self) -> None:
+        self.database.close()
+        self._tmp.cleanup()
+
+    def test_interrupted_backup_leaves_nothing_behind(self) -> None:
+        steps = []
+
+        def between_steps() -> None:
+            steps.append(1)
+            if len(steps) == 2:
+                raise MaintenanceCancelled()
+
+        with self.assertRaises(MaintenanceCancelled):
+            backup_database(self.database.path, self.backup_dir, 1, between_steps)
+        self.assertEqual(list_backups(self.database.path, self.backup_dir), [])
+        self.assertEqual(list(self.backup_dir.iterdir()), [])
+
+        backup = backup_database(self.database.path, self.backup_dir, 64)
+        self.assertEqual(verify_backup(backup), "ok")
+
+    def test_backup_steps_give_up_instead_of_waiting_for_idle(self) -> None:
+        settings = MaintenanceSettings(idle_after_s=30, step_pause_ms=0)
+        scheduler = MaintenanceScheduler(self.database, settings, self.backup_dir)
+        scheduler.note_activity()
+
+        with self.assertRaises(MaintenanceCancelled):
+            scheduler._step_check(self.database, wait=False)()
+
+
+if __name__ == "__main__":
+    unittest.main()
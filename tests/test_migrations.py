@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from cruchcount.db import Database
+from cruchcount.migrations import SCHEMA_VERSION, migrate
+
+
+class BarcodeKeyMigrationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "cruchcount.db"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_products_only_database_with_duplicate_spellings(self) -> None:
+        # A catalog from before sales were recorded: no sales or sale_items.
+        connection = sqlite3.connect(str(self.path))
+        connection.execute(
+            """
+            CREATE TABLE products (
+                barcode TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                price REAL NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        connection.executemany(
+            "INSERT INTO products(barcode, name, price, updated_at) VALUES (?, ?, ?, ?)",
+            [
+                ("012345678905", "旧名称", 3.5, "2024-01-01 10:00:00"),
+                ("0012345678905", "新名称", 4.0, "2024-02-01 10:00:00"),
+            ],
+        )
+        connection.commit()
+        connection.close()
+
+        database = Database(self.path, lane_id="1")
+        try:
+            database.init_schema()
+            product = database.get_product_by_barcode("012345678905")
+            with database.read_pool.connection() as reader:
+                count = reader.execute("SELECT count(*) FROM products").fetchone()[0]
+        finally:
+            database.close()
+        self.assertEqual(count, 1)
+        self.assertEqual(product["name"], "新名称")
+        self.assertEqual(product["price_cents"], 400)
+
+
+class MigrateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "cruchcount.db"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_version_is_committed_with_the_steps(self) -> None:
+        # A second lane that takes the lock after the first has migrated must
+        # find the new version, not run the steps again.
+        connection = sqlite3.connect(str(self.path), isolation_level=None)
+        connection.execute(
+            "CREATE TABLE products (barcode TEXT PRIMARY KEY, name TEXT, price REAL, updated_at TEXT)"
+        )
+        migrate(connection)
+        connection.close()
+
+        other = sqlite3.connect(str(self.path))
+        try:
+            self.assertEqual(other.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+        finally:
+            other.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
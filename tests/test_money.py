@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import random
+import unittest
+from decimal import Decimal
+
+from cruchcount.money import cents_to_text, format_cents, to_cents
+from cruchcount.ui.cart_model import CartTableModel
+
+
+class ToCentsTest(unittest.TestCase):
+    def test_half_cents_round_up(self) -> None:
+        for value, cents in (
+            ("1.005", 101),
+            ("2.675", 268),
+            ("0.125", 13),
+            ("0.004", 0),
+            ("-1.005", -101),
+            ("19.999", 2000),
+        ):
+            with self.subTest(value=value):
+                self.assertEqual(to_cents(value), cents)
+
+    def test_floats_round_by_their_shortest_spelling(self) -> None:
+        # 2.675 is stored as 2.67499999...; the price typed was 2.675.
+        self.assertEqual(to_cents(2.675), 268)
+        self.assertEqual(to_cents(1.005), 101)
+        self.assertEqual(to_cents(0.1 + 0.2), 30)
+        self.assertEqual(to_cents(3), 300)
+        self.assertEqual(to_cents(Decimal("4.5")), 450)
+        self.assertEqual(to_cents(" 3.50 "), 350)
+
+    def test_rejects_what_is_not_an_amount(self) -> None:
+        for value in ("", "abc", "1,50", "nan", "inf"):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    to_cents(value)
+
+
+class FormatCentsTest(unittest.TestCase):
+    def test_format(self) -> None:
+        self.assertEqual(format_cents(0), "¥0.00")
+        self.assertEqual(format_cents(5), "¥0.05")
+        self.assertEqual(format_cents(350), "¥3.50")
+        self.assertEqual(format_cents(123456), "¥1234.56")
+        self.assertEqual(format_cents(-205), "¥-2.05")
+        self.assertEqual(cents_to_text(-5), "-0.05")
+
+
+class CartTotalsTest(unittest.TestCase):
+    def test_running_totals_match_a_full_recompute(self) -> None:
+        rnd = random.Random(7)
+        model = CartTableModel()
+        barcodes = [f"69012345678{i:02d}" for i in range(12)]
+        prices = {barcode: rnd.randint(1, 5000) for barcode in barcodes}
+        for _ in range(400):
+            barcode = rnd.choice(barcodes)
+            row = model.row_for(barcode)
+            action = rnd.random()
+            if row is None or action < 0.5:
+                model.add_product(barcode, barcode, prices[barcode], rnd.randint(1, 24))
+            elif action < 0.8:
+                model.set_quantity(row, rnd.randint(1, 99))
+            else:
+                model.remove_barcode(barcode)
+
+            items = model.items()
+            self.assertEqual(model.total_quantity(), sum(item.quantity for item in items))
+            self.assertEqual(
+                model.total_amount_cents(), sum(item.subtotal_cents for item in items)
+            )
+        model.clear()
+        self.assertEqual((model.total_quantity(), model.total_amount_cents()), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
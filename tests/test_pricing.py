@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import random
+import unittest
+
+from cruchcount.pricing import PricingEngine, price_cart
+from cruchcount.promotions import MEMBER_PRICE, MULTI_BUY, SPEND_THRESHOLD, Promotion
+
+STORE_WIDE = Promotion(1, "全场满 10 减 8", SPEND_THRESHOLD, None, None, 1000, 800)
+SNACKS = Promotion(2, "零食满 10 减 8", SPEND_THRESHOLD, None, "零食", 1000, 800)
+
+
+def _engine(rules: dict[str, list[Promotion]]) -> PricingEngine:
+    return PricingEngine(lambda barcodes: {barcode: rules[barcode] for barcode in barcodes})
+
+
+class OverlappingThresholdTest(unittest.TestCase):
+    def test_stacked_thresholds_never_exceed_the_cart(self) -> None:
+        rules = {"A": [SNACKS, STORE_WIDE]}
+        engine = _engine(rules)
+        engine.update_line("A", 1000, 1)
+
+        self.assertEqual(engine.discount_cents, 1000)
+        self.assertEqual(price_cart([("A", 1000, 1)], rules), 1000)
+        self.assertEqual(engine.applied(), [(1, STORE_WIDE.name, 800), (2, SNACKS.name, 200)])
+
+    def test_cap_lifts_as_the_cart_grows(self) -> None:
+        rules = {"A": [SNACKS, STORE_WIDE]}
+        engine = _engine(rules)
+        engine.update_line("A", 1000, 1)
+        engine.update_line("A", 1000, 2)
+
+        self.assertEqual(engine.discount_cents, 1600)
+        self.assertEqual(sum(amount for _, _, amount in engine.applied()), 1600)
+
+    def test_incremental_matches_full_evaluation(self) -> None:
+        rnd = random.Random(1)
+        barcodes = [f"B{i}" for i in range(40)]
+        rules: dict[str, list[Promotion]] = {}
+        for i, barcode in enumerate(barcodes):
+            own = [
+                Promotion(100 + i, "多件", MULTI_BUY, barcode, None, 2, 150),
+                Promotion(200 + i, "会员", MEMBER_PRICE, barcode, None, 0, 90),
+            ]
+            scope = [SNACKS] if i % 2 else []
+            rules[barcode] = [*rnd.sample(own, rnd.randint(0, 2)), *scope, STORE_WIDE]
+        engine = _engine(rules)
+        cart: dict[str, tuple[int, int]] = {}
+        for step in range(500):
+            barcode = rnd.choice(barcodes)
+            price, quantity = rnd.randint(50, 900), rnd.randint(0, 4)
+            engine.update_line(barcode, price, quantity)
+            if quantity:
+                cart[barcode] = (price, quantity)
+            else:
+                cart.pop(barcode, None)
+            if step % 50 == 0:
+                engine.set_member(not engine.member)
+            lines = [(barcode, *line) for barcode, line in cart.items()]
+            gross = sum(price * quantity for _, price, quantity in lines)
+            self.assertEqual(engine.discount_cents, price_cart(lines, rules, engine.member))
+            self.assertLessEqual(engine.discount_cents, gross)
+            self.assertEqual(
+                sum(amount for _, _, amount in engine.applied()), engine.discount_cents
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from cruchcount.db import Database
+
+COLA = "6901234567892"
+
+
+class ProductCacheTest(unittest.TestCase):
+    # Two lanes on one file: `lane` caches, `other` writes behind its back.
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        path = Path(self._tmp.name) / "cruchcount.db"
+        self.lane = Database(path, product_cache_size=4, lane_id="1")
+        self.lane.init_schema()
+        self.other = Database(path, lane_id="2")
+        self.other.init_schema()
+
+    def tearDown(self) -> None:
+        self.other.close()
+        self.lane.close()
+        self._tmp.cleanup()
+
+    def test_own_upsert_evicts_the_cached_product(self) -> None:
+        self.lane.upsert_product(COLA, "可乐", 300)
+        self.lane.poll_catalog_changes()
+        self.assertEqual(self.lane.get_product_by_barcode(COLA)["price_cents"], 300)
+        self.assertEqual(self.lane.get_product_by_barcode(COLA)["price_cents"], 300)
+        self.assertEqual(self.lane.cache_hits, 1)
+
+        self.lane.upsert_product(COLA, "可乐", 350)
+        self.assertEqual(self.lane.get_product_by_barcode(COLA)["price_cents"], 350)
+
+    def test_cached_miss_is_dropped_once_another_lane_adds_the_product(self) -> None:
+        self.assertIsNone(self.lane.get_product_by_barcode(COLA))
+        self.assertEqual(self.lane.cache_stats()["size"], 1)
+
+        self.other.upsert_product(COLA, "可乐", 300)
+        self.assertEqual(self.lane.poll_catalog_changes(), 1)
+        self.assertEqual(self.lane.cache_stats()["size"], 0)
+        self.assertEqual(self.lane.get_product_by_barcode(COLA)["name"], "可乐")
+
+    def test_other_lanes_price_change_reaches_the_cache(self) -> None:
+        self.other.upsert_product(COLA, "可乐", 300)
+        self.lane.poll_catalog_changes()
+        self.assertEqual(self.lane.get_product_by_barcode(COLA)["price_cents"], 300)
+
+        self.other.upsert_product(COLA, "可乐", 280)
+        self.lane.poll_catalog_changes()
+        self.assertEqual(self.lane.get_product_by_barcode(COLA)["price_cents"], 280)
+
+    def test_falling_too_far_behind_clears_the_whole_cache(self) -> None:
+        self.other.upsert_products([(COLA, "可乐", 300), ("6901234567893", "薯片", 800)])
+        self.lane.poll_catalog_changes()
+        self.lane.get_products_by_barcodes([COLA, "6901234567893", "123"])
+        self.assertEqual(self.lane.cache_stats()["size"], 3)
+
+        # More changes than the cache holds: replaying them is not worth it.
+        self.other.upsert_products((f"69{i:011d}", f"商品 {i}", 100) for i in range(10))
+        self.assertEqual(self.lane.poll_catalog_changes(), 10)
+        self.assertEqual(self.lane.cache_stats()["size"], 0)
+        self.assertEqual(self.lane.poll_catalog_changes(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
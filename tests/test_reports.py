@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from typing import NamedTuple
+
+from cruchcount.db import Database
+
+
+class _Line(NamedTuple):
+    barcode: str
+    name: str
+    price_cents: int
+    quantity: int
+
+
+class DiscountedSalesReportTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.database = Database(Path(self._tmp.name) / "cruchcount.db", lane_id="1")
+        self.database.init_schema()
+
+    def tearDown(self) -> None:
+        self.database.close()
+        self._tmp.cleanup()
+
+    def test_products_at_list_price_reconcile_with_paid_plus_discounts(self) -> None:
+        self.database.record_sale(
+            [_Line("6901234567892", "可乐", 300, 4), _Line("6901234567893", "薯片", 800, 1)],
+            [(1, "可乐 3 件 ¥8", 100), (2, "满 20 减 5", 500)],
+        )
+        self.database.record_sale([_Line("6901234567893", "薯片", 800, 2)])
+
+        today = date.today().isoformat()
+        daily = self.database.daily_report(today, today)
+        products = self.database.product_report(today, today)
+
+        self.assertEqual(len(daily), 1)
+        self.assertEqual(daily[0]["revenue_cents"], 3600 - 600)
+        self.assertEqual(daily[0]["discount_cents"], 600)
+        self.assertEqual(
+            sum(row["revenue_cents"] for row in products),
+            daily[0]["revenue_cents"] + daily[0]["discount_cents"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import sqlite3
+import unittest
+from typing import Any
+
+from cruchcount.ui.scan_queue import ScanQueue
+
+COLA = {"barcode": "6901234567892", "name": "可乐", "price_cents": 300}
+
+
+class ScanQueueTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.locked = False
+        self.queue = ScanQueue(self._resolve)
+        self.batches: list[tuple[list[Any], list[Any]]] = []
+        self.failures: list[str] = []
+        self.queue.batch_resolved.connect(
+            lambda known, unknown: self.batches.append((known, unknown))
+        )
+        self.queue.lookup_failed.connect(self.failures.append)
+
+    def _resolve(self, barcodes: list[str]) -> dict[str, dict[str, Any]]:
+        if self.locked:
+            raise sqlite3.OperationalError("database is locked")
+        return {barcode: COLA for barcode in barcodes if barcode == COLA["barcode"]}
+
+    def test_failed_lookup_keeps_the_batch_for_the_next_drain(self) -> None:
+        self.queue.enqueue(COLA["barcode"], 2)
+        self.queue.enqueue("123", 1)
+        self.locked = True
+
+        self.assertFalse(self.queue.drain())
+        self.assertEqual(self.failures, ["database is locked"])
+        self.assertEqual(self.queue.pending_count(), 2)
+        self.assertEqual(self.batches, [])
+
+        self.locked = False
+        self.queue.enqueue(COLA["barcode"], 1)
+        self.assertTrue(self.queue.drain())
+        self.assertEqual(self.queue.pending_count(), 0)
+        self.assertEqual(self.batches, [([(COLA, 2), (COLA, 1)], [("123", 1)])])
+
+
+if __name__ == "__main__":
+    unittest.main()